@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -77,10 +78,17 @@ WSGI_APPLICATION = 'core.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLite ignorira select_for_update, pa transakcije odmah uzimaju zakljucavanje za pisanje (IMMEDIATE)
+# i cekaju do 20 sekundi umjesto da istovremene rezervacije padnu s 'database is locked'
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
@@ -130,13 +138,105 @@ CORS_ALLOWED_ORIGINS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'rezervacije.authentication.KesiranaTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
+    'DEFAULT_PAGINATION_CLASS': 'rezervacije.pagination.KursorPaginacija',
+}
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Mreza slobodnih termina sprema se u zaseban cache. Lokalna memorija je dovoljna za jedan proces i testove,
+# a za vise workera postavite DOSTUPNOST_REDIS_URL kako bi svi dijelili isti cache.
+# LocMem kod MAX_ENTRIES zapisa izbacuje 1/CULL_FREQUENCY zapisa, pa je velicina odabrana za
+# tri kljuca po salonu i danu (mreza, zauzetost, radno vrijeme) za oko 1000 salona kroz mjesec.
+# Brojaci verzija (dostupnost.py) su u zasebnom cacheu koji se ne smije prazniti: izbaceni brojac
+# ponovno krece od trenutnog vremena, pa podaci ostaju ispravni, ali se ponistavaju svi spremljeni dani
+# i ETagovi salona. Brojaca je najvise dva po salonu, pa ih MAX_ENTRIES u praksi nikad ne dostize.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'dostupnost': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'dostupnost',
+        'OPTIONS': {'MAX_ENTRIES': 100000, 'CULL_FREQUENCY': 10},
+    },
+    'dostupnost_verzije': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'dostupnost_verzije',
+        'OPTIONS': {'MAX_ENTRIES': 1000000},
+    },
+    'autentikacija': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'autentikacija',
+    },
+    'opozivi': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'opozivi',
+        'OPTIONS': {'MAX_ENTRIES': 1000000},
+    },
+    'limiti': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'limiti',
+        'OPTIONS': {'MAX_ENTRIES': 100000, 'CULL_FREQUENCY': 10},
+    },
 }
 
+# Brojaci verzija nemaju TTL, pa ih Redis s maxmemory-policy volatile-lru (ili noeviction) ne izbacuje
+if os.environ.get('DOSTUPNOST_REDIS_URL'):
+    CACHES['dostupnost'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['DOSTUPNOST_REDIS_URL'],
+    }
+    CACHES['dostupnost_verzije'] = CACHES['dostupnost']
+
+if os.environ.get('AUTH_REDIS_URL'):
+    CACHES['autentikacija'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['AUTH_REDIS_URL'],
+    }
+    CACHES['opozivi'] = CACHES['autentikacija']
+    CACHES['limiti'] = CACHES['autentikacija']
+
+DOSTUPNOST_CACHE = 'dostupnost'
+DOSTUPNOST_VERZIJE_CACHE = 'dostupnost_verzije'
+DOSTUPNOST_CACHE_TIMEOUT = 60 * 60
+
+# Tokeni s korisnicima spremaju se u cache autentikacije; s vise workera koristite AUTH_REDIS_URL,
+# inace odjava i promjena korisnika ponistavaju samo cache procesa koji ih je obradio (ostali nakon TTL-a)
+AUTH_CACHE = 'autentikacija'
+AUTH_CACHE_TIMEOUT = 5 * 60
+
+# Potpisani tokeni s istekom umjesto trajnih tokena iz baze (AUTH_POTPISANI_TOKENI=1); provjeravaju se bez upita.
+# Lista opoziva je u zasebnom cacheu koji se ne smije prazniti: izbacen opoziv ponovno bi ucinio valjanim
+# token odjavljenog korisnika. Zapisa je po jedan za odjavu i promjenu korisnika unutar AUTH_TOKEN_TRAJANJE,
+# pa MAX_ENTRIES s velikom rezervom pokriva to razdoblje. S vise workera treba i AUTH_REDIS_URL, uz
+# maxmemory-policy noeviction (ili dovoljno memorije), jer zapisi opoziva imaju TTL.
+AUTH_OPOZIV_CACHE = 'opozivi'
+AUTH_POTPISANI_TOKENI = os.environ.get('AUTH_POTPISANI_TOKENI') == '1'
+AUTH_TOKEN_TRAJANJE = 7 * 24 * 60 * 60
+
+# Ogranicenje prijava (klizni prozor, throttling.py): (kapacitet, pokusaja u minuti).
+# 'ip' vrijedi za sve pokusaje prijave i registracije s jedne adrese, 'racun' za neuspjele prijave na jedan email.
+# Brojaci su u zasebnom cacheu, kako ih ne bi izbacivali tokeni; s vise workera koristite AUTH_REDIS_URL
+PRIJAVA_LIMITI_CACHE = 'limiti'
+PRIJAVA_LIMITI = {
+    'ip': (30, 30),
+    'racun': (5, 1),
+}
+
+# Obavijesti o slobodnim mjestima (SSE): LokalniBroker za jedan ASGI proces,
+# a s vise procesa postavite OBAVIJESTI_REDIS_URL kako bi se obavijesti prenosile kroz Redis pub/sub
+OBAVIJESTI_BROKER = 'rezervacije.obavijesti.LokalniBroker'
+if os.environ.get('OBAVIJESTI_REDIS_URL'):
+    OBAVIJESTI_BROKER = 'rezervacije.obavijesti.RedisBroker'
+    OBAVIJESTI_REDIS_URL = os.environ['OBAVIJESTI_REDIS_URL']
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
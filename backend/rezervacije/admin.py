@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Salon, Frizer, Termin, Rezervacija
+from .models import Salon, Frizer, RadnoVrijeme, Termin, Rezervacija, DnevnaStatistika
 
 
 @admin.register(Salon)
@@ -16,6 +16,13 @@ class FrizerAdmin(admin.ModelAdmin):
     search_fields = ('ime_prezime',)
 
 
+@admin.register(RadnoVrijeme)
+class RadnoVrijemeAdmin(admin.ModelAdmin):
+    list_display = ('salon', 'frizer', 'dan_u_tjednu', 'datum', 'vrijeme_od', 'vrijeme_do', 'napomena')
+    list_filter = ('salon', 'dan_u_tjednu')
+    search_fields = ('salon__naziv', 'frizer__ime_prezime', 'napomena')
+
+
 @admin.register(Termin)
 class TerminAdmin(admin.ModelAdmin):
     list_display = ('salon', 'frizer', 'datum', 'vrijeme_od', 'vrijeme_do', 'slobodan')
@@ -34,3 +41,9 @@ class RezervacijaAdmin(admin.ModelAdmin):
 
     def salon_naziv(self, obj):
         return obj.termin.salon.naziv
+
+
+@admin.register(DnevnaStatistika)
+class DnevnaStatistikaAdmin(admin.ModelAdmin):
+    list_display = ('salon', 'frizer', 'datum', 'sat', 'potvrdene', 'otkazane')
+    list_filter = ('salon', 'datum')
@@ -0,0 +1,179 @@
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef, Subquery
+from django.utils import timezone
+
+from .dostupnost import ponisti_dan, radni_frizeri
+from .models import Frizer, Termin, Rezervacija
+from .obavijesti import javi_promjenu
+
+
+# Dodjela termina pri rezervaciji bez zakljucavanja redova termina.
+# Termin se zauzima jednom uvjetnom naredbom UPDATE ... WHERE slobodan = true, a termin koji jos ne postoji
+# kreira se odmah kao zauzet, pa jedinstveno ogranicenje po frizeru i vremenu sprjecava dvostruku dodjelu.
+# Ako drugi zahtjev preuzme frizera prije nas, pokusava se sljedeci frizer.
+
+
+# Greska rezervacije koju view vraca korisniku kao 400 odgovor
+class GreskaRezervacije(Exception):
+    pass
+
+
+# Zauzeti termini koji se preklapaju s [vrijeme_od, vrijeme_do), i kad su drugog trajanja
+# (npr. rezervirani prije promjene trajanja termina salona)
+def _zauzeti_termini(datum, vrijeme_od, vrijeme_do):
+    return Termin.objects.filter(datum=datum, slobodan=False, vrijeme_od__lt=vrijeme_do, vrijeme_do__gt=vrijeme_od)
+
+
+# Rezervacija termina koja nije otkazana. Termin s takvom rezervacijom se ne zauzima ni kad je oznacen
+# slobodnim (npr. osoblje ga je rucno oslobodilo), jer bi se inace tuda rezervacija preuzela za drugog korisnika.
+def _aktivna_rezervacija():
+    return Rezervacija.objects.filter(termin=OuterRef('pk')).exclude(status='otkazana')
+
+
+# Jedan upit: aktivni frizeri salona koji u terminu rade i nisu zauzeti, uz ID vec postojeceg termina frizera
+# i ID otkazane rezervacije tog termina
+def _kandidati(salon, datum, vrijeme_od, vrijeme_do, radni):
+    termin_frizera = Termin.objects.filter(
+        frizer=OuterRef('pk'),
+        datum=datum,
+        vrijeme_od=vrijeme_od,
+        vrijeme_do=vrijeme_do,
+    )
+    zauzeti_frizeri = _zauzeti_termini(datum, vrijeme_od, vrijeme_do).filter(salon=salon).values('frizer_id')
+    return (
+        Frizer.objects.filter(salon=salon, aktivan=True, id__in=radni)
+        .exclude(id__in=zauzeti_frizeri)
+        .annotate(
+            termin_id=Subquery(termin_frizera.values('id')[:1]),
+            rezervacija_id=Subquery(
+                termin_frizera.filter(rezervacija__status='otkazana').values('rezervacija__id')[:1]
+            ),
+        )
+        .order_by('id')
+        .values_list('id', 'termin_id', 'rezervacija_id')
+    )
+
+
+# UPDATE ne salje post_save signal, pa se nakon zauzimanja postojeceg termina spremljena mreza slobodnih termina
+# ponistava ovdje, a pretplatnici dana dobivaju novo stanje termina (novi termin to radi kroz signal)
+def _termin_zauzet(termin):
+    ponisti_dan(termin.salon_id, termin.datum)
+    javi_promjenu(termin.salon_id, termin.datum, termin.vrijeme_od)
+
+
+# Zauzima termin prvog slobodnog frizera od onih koji u terminu rade.
+# Vraca (termin, ID postojece rezervacije termina) ili None.
+# Kandidati su odabrani prije pisanja, pa se preklapanje s drugim zauzetim terminom frizera provjerava ponovno:
+# u UPDATE-u postojeceg termina, a za novi termin nakon zakljucavanja frizera, jer jedinstveno ogranicenje
+# ne sprjecava preklapanje termina razlicitog trajanja.
+def _zauzmi_termin(salon, datum, vrijeme_od, vrijeme_do, radni):
+    for frizer_id, termin_id, rezervacija_id in _kandidati(salon, datum, vrijeme_od, vrijeme_do, radni):
+        preklapanje = _zauzeti_termini(datum, vrijeme_od, vrijeme_do).filter(frizer_id=frizer_id)
+        termin = Termin(
+            id=termin_id,
+            salon=salon,
+            frizer_id=frizer_id,
+            datum=datum,
+            vrijeme_od=vrijeme_od,
+            vrijeme_do=vrijeme_do,
+            slobodan=False,
+        )
+        if termin_id:
+            zauzet = (
+                Termin.objects.filter(pk=termin_id, slobodan=True)
+                .exclude(Exists(preklapanje))
+                .exclude(Exists(_aktivna_rezervacija()))
+                .update(slobodan=False)
+            )
+            if zauzet:
+                _termin_zauzet(termin)
+                return termin, rezervacija_id
+            continue
+
+        # Savepoint: ako isti termin istovremeno kreira drugi zahtjev, ponistava se samo ovo kreiranje.
+        # Zakljucani frizer ostaje zakljucan do kraja transakcije, pa drugi zahtjev za istog frizera
+        # preklapanje provjerava tek kad je ovaj termin spremljen.
+        try:
+            with transaction.atomic():
+                list(Frizer.objects.select_for_update().filter(pk=frizer_id).values_list('pk', flat=True))
+                if preklapanje.exists():
+                    continue
+                termin.save(force_insert=True)
+        except IntegrityError:
+            continue
+        return termin, None
+    return None
+
+
+# Rezervira termin za korisnika. Zadani termin (rezervacija po ID-u termina) zauzima se izravno,
+# a inace se dodjeljuje prvi slobodni frizer salona u trazenom vremenu. Oba puta frizer mora u terminu raditi
+# prema rasporedu (raspored.py), pa se npr. unaprijed otvoreni termin ne moze rezervirati na praznik.
+# Zauzeti termin moze imati samo otkazanu rezervaciju, koja se preuzima za novog korisnika.
+def rezerviraj(korisnik, napomena='', termin=None, salon=None, datum=None, vrijeme_od=None, vrijeme_do=None):
+    if termin:
+        salon, datum, vrijeme_od, vrijeme_do = termin.salon, termin.datum, termin.vrijeme_od, termin.vrijeme_do
+    radni = radni_frizeri(salon, datum, vrijeme_od, vrijeme_do)
+
+    with transaction.atomic():
+        # Zakljucava se samo korisnik, kako dva istovremena zahtjeva istog korisnika
+        # ne bi oba prosla provjeru postojece rezervacije
+        list(User.objects.select_for_update().filter(pk=korisnik.pk).values_list('pk', flat=True))
+
+        postojeca_rezervacija_korisnika = Rezervacija.objects.filter(
+            korisnik=korisnik,
+            termin__salon=salon,
+            termin__datum=datum,
+            termin__vrijeme_od=vrijeme_od,
+            status='potvrdena',
+        ).exists()
+        if postojeca_rezervacija_korisnika:
+            raise GreskaRezervacije('Već imate rezervaciju u ovom salonu za odabrano vrijeme.')
+
+        if termin:
+            if termin.frizer_id not in radni:
+                raise GreskaRezervacije('Frizer u odabrano vrijeme ne radi.')
+            preklapanje = _zauzeti_termini(termin.datum, termin.vrijeme_od, termin.vrijeme_do).filter(
+                frizer_id=termin.frizer_id,
+            )
+            azurirano = (
+                Termin.objects.filter(pk=termin.pk, slobodan=True)
+                .exclude(Exists(preklapanje))
+                .exclude(Exists(_aktivna_rezervacija()))
+                .update(slobodan=False)
+            )
+            if not azurirano:
+                raise GreskaRezervacije('Termin više nije slobodan.')
+            termin.slobodan = False
+            _termin_zauzet(termin)
+            rezervacija_id = (
+                Rezervacija.objects.filter(termin=termin, status='otkazana').values_list('id', flat=True).first()
+            )
+        else:
+            zauzeto = _zauzmi_termin(salon, datum, vrijeme_od, vrijeme_do, radni) if radni else None
+            if not zauzeto:
+                if not Frizer.objects.filter(salon=salon, aktivan=True).exists():
+                    raise GreskaRezervacije('Salon nema aktivnih zaposlenika.')
+                if not radni:
+                    raise GreskaRezervacije('Salon u odabrano vrijeme ne radi.')
+                raise GreskaRezervacije('Termin više nije slobodan.')
+            termin, rezervacija_id = zauzeto
+
+        rezervacija = Rezervacija(
+            id=rezervacija_id,
+            korisnik=korisnik,
+            termin=termin,
+            status='potvrdena',
+            napomena=napomena,
+            kreirano=timezone.now(),
+        )
+        if rezervacija_id:
+            Rezervacija.objects.filter(pk=rezervacija_id, status='otkazana').update(
+                korisnik=korisnik,
+                status='potvrdena',
+                napomena=napomena,
+                kreirano=rezervacija.kreirano,
+            )
+        else:
+            rezervacija.save(force_insert=True)
+    return rezervacija
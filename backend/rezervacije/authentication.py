@@ -0,0 +1,198 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import signing
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+
+# Korisnik po emailu bez obzira na velika i mala slova; LOWER(email) ima indeks (migracija 0008)
+def korisnik_po_emailu(email):
+    return User.objects.alias(email_lower=Lower('email')).filter(email_lower=email.lower()).first()
+
+
+# Token autentikacija s cacheom: token zajedno s korisnikom sprema se u cache po kljucu tokena,
+# pa autenticirani zahtjev ne radi upit na Token i User tablicu dok je zapis u cacheu.
+# Zapis se ponistava kod odjave (brisanje tokena) i svake promjene korisnika (lozinka, is_staff, is_active),
+# a TTL ogranicava koliko dugo zastarjeli zapis moze prezivjeti ako ponistavanje ne stigne do cachea.
+# Backend se bira postavkom AUTH_CACHE (alias iz CACHES).
+def _kes():
+    return caches[getattr(settings, 'AUTH_CACHE', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'AUTH_CACHE_TIMEOUT', 5 * 60)
+
+
+def _kljuc_tokena(kljuc):
+    return f'auth:token:{kljuc}'
+
+
+def _kljuc_brojaca(naziv):
+    return f'auth:brojac:{naziv}'
+
+
+def _povecaj(naziv):
+    kes = _kes()
+    kljuc = _kljuc_brojaca(naziv)
+    # add ne mijenja postojeci brojac, a incr je atomski i na Redisu
+    kes.add(kljuc, 0, None)
+    try:
+        kes.incr(kljuc)
+    except ValueError:
+        kes.set(kljuc, 1, None)
+
+
+# Broj pogodaka i promasaja cachea od pokretanja (ili od zadnjeg resetiranja) i udio pogodaka
+def statistika_autentikacije():
+    brojaci = _kes().get_many([_kljuc_brojaca('pogoci'), _kljuc_brojaca('promasaji')])
+    pogoci = brojaci.get(_kljuc_brojaca('pogoci'), 0)
+    promasaji = brojaci.get(_kljuc_brojaca('promasaji'), 0)
+    ukupno = pogoci + promasaji
+    return {
+        'pogoci': pogoci,
+        'promasaji': promasaji,
+        'udio_pogodaka': round(pogoci / ukupno, 4) if ukupno else None,
+    }
+
+
+def resetiraj_statistiku_autentikacije():
+    _kes().delete_many([_kljuc_brojaca('pogoci'), _kljuc_brojaca('promasaji')])
+
+
+# Brise spremljene tokene odmah i ponovno nakon commita, kako zahtjev koji je u meduvremenu
+# procitao stare podatke iz baze ne bi ostavio zastarjeli zapis u cacheu
+def ponisti_tokene(kljucevi):
+    kljucevi = [_kljuc_tokena(kljuc) for kljuc in kljucevi]
+    if not kljucevi:
+        return
+    kes = _kes()
+    kes.delete_many(kljucevi)
+    transaction.on_commit(lambda: kes.delete_many(kljucevi))
+
+
+# Potpisani tokeni (AUTH_POTPISANI_TOKENI = True): korisnik, is_staff, vrijeme izdavanja i istek zapisani su
+# u samom tokenu i potpisani HMAC-om (SECRET_KEY), pa se token provjerava bez baze.
+# Odjava i promjena korisnika upisuju se u malu listu opoziva, a zapis iz liste istjece zajedno s najduljim
+# trajanjem tokena. Lista je u zasebnom cacheu (AUTH_OPOZIV_CACHE), odvojenom od tokena i spremnika
+# ogranicenja prijava, kako je puno drugih zapisa ne bi izbacilo prije isteka.
+SALT_TOKENA = 'rezervacije.authentication.token'
+
+
+def _kes_opoziva():
+    return caches[getattr(settings, 'AUTH_OPOZIV_CACHE', 'default')]
+
+
+def _trajanje_tokena():
+    return getattr(settings, 'AUTH_TOKEN_TRAJANJE', 7 * 24 * 60 * 60)
+
+
+def _kljuc_opozvanog_tokena(potpis):
+    return f'auth:opozvan:{potpis}'
+
+
+def _kljuc_opoziva_korisnika(korisnik_id):
+    return f'auth:opoziv:{korisnik_id}'
+
+
+class PotpisaniToken:
+    def __init__(self, kljuc, korisnik_id, is_staff, izdan_ms, istjece):
+        self.key = kljuc
+        self.korisnik_id = korisnik_id
+        self.is_staff = is_staff
+        self.izdan_ms = izdan_ms
+        self.istjece = istjece
+
+    @property
+    def potpis(self):
+        return self.key.rsplit(':', 1)[1]
+
+
+def izdaj_potpisani_token(user):
+    izdan_ms = int(time.time() * 1000)
+    istjece = izdan_ms // 1000 + _trajanje_tokena()
+    return signing.Signer(salt=SALT_TOKENA).sign_object([user.id, int(user.is_staff), izdan_ms, istjece])
+
+
+def je_potpisani_token(kljuc):
+    return ':' in kljuc
+
+
+def procitaj_potpisani_token(kljuc):
+    try:
+        korisnik_id, is_staff, izdan_ms, istjece = signing.Signer(salt=SALT_TOKENA).unsign_object(kljuc)
+    except (signing.BadSignature, ValueError, TypeError):
+        raise AuthenticationFailed(_('Invalid token.'))
+    if istjece <= time.time():
+        raise AuthenticationFailed('Token je istekao.')
+    return PotpisaniToken(kljuc, korisnik_id, bool(is_staff), izdan_ms, istjece)
+
+
+# Token koji se vraca kod prijave i registracije: potpisani ako je ukljucen, inace trajni Token iz baze
+def izdaj_token(user):
+    if getattr(settings, 'AUTH_POTPISANI_TOKENI', False):
+        return izdaj_potpisani_token(user)
+    token, _created = Token.objects.get_or_create(user=user)
+    return token.key
+
+
+# Opoziv jednog tokena (odjava)
+def opozovi_token(token):
+    preostalo = int(token.istjece - time.time()) + 1
+    if preostalo > 0:
+        _kes_opoziva().set(_kljuc_opozvanog_tokena(token.potpis), 1, preostalo)
+
+
+# Opoziv svih tokena korisnika izdanih do sada (promjena lozinke ili ovlasti, brisanje korisnika)
+def opozovi_tokene_korisnika(korisnik_id):
+    _kes_opoziva().set(_kljuc_opoziva_korisnika(korisnik_id), int(time.time() * 1000), _trajanje_tokena())
+
+
+def _je_opozvan(token):
+    opozivi = _kes_opoziva().get_many([
+        _kljuc_opozvanog_tokena(token.potpis),
+        _kljuc_opoziva_korisnika(token.korisnik_id),
+    ])
+    if opozivi.get(_kljuc_opozvanog_tokena(token.potpis)):
+        return True
+    opozvano_do = opozivi.get(_kljuc_opoziva_korisnika(token.korisnik_id))
+    return opozvano_do is not None and token.izdan_ms <= opozvano_do
+
+
+# Korisnik iz potpisanog tokena bez upita: poznata su samo polja iz tokena, a ostala (username, email...)
+# su odgodena kao kod .only(), pa se iz baze ucitavaju tek ako ih view zaista koristi
+def _korisnik_iz_tokena(token):
+    return User.from_db(
+        'default',
+        ['id', 'is_staff', 'is_active'],
+        [token.korisnik_id, token.is_staff, True],
+    )
+
+
+class KesiranaTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        if je_potpisani_token(key):
+            token = procitaj_potpisani_token(key)
+            if _je_opozvan(token):
+                raise AuthenticationFailed('Token je opozvan.')
+            return _korisnik_iz_tokena(token), token
+
+        kes = _kes()
+        kljuc = _kljuc_tokena(key)
+        token = kes.get(kljuc)
+        if token is None:
+            _povecaj('promasaji')
+            user, token = super().authenticate_credentials(key)
+            kes.set(kljuc, token, _timeout())
+            return user, token
+
+        _povecaj('pogoci')
+        if not token.user.is_active:
+            raise AuthenticationFailed(_('User inactive or deleted.'))
+        return token.user, token
@@ -0,0 +1,381 @@
+import heapq
+import time as _time
+from collections import defaultdict
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import FilteredRelation, Q
+
+from . import mreza
+from .models import Frizer, Termin
+from .raspored import radna_vremena_salona
+
+
+# Mreza slobodnih termina mijenja se samo kod rezervacije, otkazivanja i izmjene salona, frizera ili rasporeda,
+# pa se izracunata mreza sprema u cache po (salon, datum) i ponistava iz tih mjesta.
+# Backend se bira postavkom DOSTUPNOST_CACHE (alias iz CACHES), npr. LocMem za testove, Redis za produkciju.
+def _kes():
+    return caches[getattr(settings, 'DOSTUPNOST_CACHE', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'DOSTUPNOST_CACHE_TIMEOUT', 60 * 60)
+
+
+# Brojaci verzija drze se u cacheu koji ne izbacuje zapise (DOSTUPNOST_VERZIJE_CACHE, vidi settings),
+# kako punjenje cachea mreza ne bi ponistavalo sve salone
+def _kes_verzija():
+    return caches[getattr(settings, 'DOSTUPNOST_VERZIJE_CACHE', getattr(settings, 'DOSTUPNOST_CACHE', 'default'))]
+
+
+# Verzija salona je dio kljuca, pa povecanje verzije ponistava sve spremljene dane salona odjednom.
+# Ako brojac ispadne iz cachea, novi pocinje od trenutnog vremena kako se stari kljucevi ne bi ponovno koristili.
+def _kljuc_verzije(salon_id):
+    return f'dostupnost:verzija:{salon_id}'
+
+
+# Brojac zauzeca salona raste kod svake rezervacije i otkazivanja (uz ponistavanje dana),
+# a brojac kataloga kod svake promjene bilo kojeg salona ili frizera.
+# Zajedno s verzijom salona sluze za ETag odgovora (uvjetni.py).
+def _kljuc_zauzeca(salon_id):
+    return f'dostupnost:zauzeca:{salon_id}'
+
+
+KLJUC_KATALOGA = 'dostupnost:katalog'
+
+
+def _brojaci(kljucevi):
+    kes = _kes_verzija()
+    vrijednosti = kes.get_many(kljucevi)
+    for kljuc in kljucevi:
+        if kljuc not in vrijednosti:
+            kes.add(kljuc, int(_time.time() * 1000), None)
+            vrijednosti[kljuc] = kes.get(kljuc)
+    return [vrijednosti[kljuc] for kljuc in kljucevi]
+
+
+def _povecaj_brojac(kljuc):
+    try:
+        _kes_verzija().incr(kljuc)
+    except ValueError:
+        _brojaci([kljuc])
+
+
+def verzija_salona(salon_id):
+    return _brojaci([_kljuc_verzije(salon_id)])[0]
+
+
+# Verzije podataka o salonima i frizerima, jednim dohvatom iz cachea
+def verzije_salona(salon_ids):
+    return _brojaci([_kljuc_verzije(salon_id) for salon_id in salon_ids])
+
+
+def verzija_kataloga():
+    return _brojaci([KLJUC_KATALOGA])[0]
+
+
+# Verzija mreze slobodnih termina salona (radno vrijeme i frizeri te zauzeca)
+def verzija_mreze(salon_id):
+    return _brojaci([_kljuc_verzije(salon_id), _kljuc_zauzeca(salon_id)])
+
+
+def _kljuc_dana(salon_id, verzija, datum):
+    if not isinstance(datum, str):
+        datum = datum.isoformat()
+    return f'dostupnost:mjesta:{salon_id}:{verzija}:{datum}'
+
+
+def _kljuc_zauzetosti(salon_id, verzija, datum):
+    if not isinstance(datum, str):
+        datum = datum.isoformat()
+    return f'dostupnost:zauzetost:{salon_id}:{verzija}:{datum}'
+
+
+# Radno vrijeme frizera za dan mijenja se samo s rasporedom ili frizerima (verzija salona), a ne s rezervacijama
+def _kljuc_rada(salon_id, verzija, datum):
+    if not isinstance(datum, str):
+        datum = datum.isoformat()
+    return f'dostupnost:rad:{salon_id}:{verzija}:{datum}'
+
+
+# Pocetci termina salona u minutama od ponoci. Isti su za svaki dan jer ovise samo o radnom vremenu
+# i trajanju termina, pa se za dan pamti samo broj slobodnih mjesta po pocetku.
+def pocetci_termina(salon):
+    return list(mreza.pocetci_termina(
+        mreza.minute(salon.radno_od), mreza.minute(salon.radno_do), salon.trajanje_termina_min
+    ))
+
+
+# Racuna broj slobodnih mjesta po terminu za svaki dan u rasponu [datum_od, datum_do] za vise salona
+# Vraca {salon_id: {datum: [broj frizera koji taj dan rade, [slobodnih mjesta za svaki pocetak iz pocetci_termina]]}}
+# Mjesta termina su frizeri koji rade cijeli termin (radna_vremena, vidi raspored.py) i nemaju zauzeti termin
+# koji se s njim preklapa, kao kod rezervacije (slobodni_frizeri, alokacija.py).
+# Zauzeti termini svih salona dohvacaju se jednim upitom i slazu u bitmape zauzetosti po frizeru i danu.
+# Dani s istim radnim vremenom i zauzetoscu frizera (npr. isti dan u tjednu bez rezervacija) racunaju se jednom.
+def izracunaj_slobodna_mjesta(saloni, datum_od, datum_do, radna_vremena):
+    zauzetost = defaultdict(lambda: defaultdict(int))
+    redovi = Termin.objects.filter(
+        salon_id__in=[salon.id for salon in saloni],
+        datum__range=(datum_od, datum_do),
+        slobodan=False,
+    ).values_list('salon_id', 'datum', 'frizer_id', 'vrijeme_od', 'vrijeme_do')
+    for salon_id, datum, frizer_id, vrijeme_od, vrijeme_do in redovi:
+        zauzetost[(salon_id, datum)][frizer_id] |= mreza.maska(mreza.minute(vrijeme_od), mreza.minute(vrijeme_do))
+
+    broj_dana = (datum_do - datum_od).days + 1
+    rezultat = {}
+    for salon in saloni:
+        pocetci = pocetci_termina(salon)
+        mjesta_po_stanju = {}
+        rezultat[salon.id] = {}
+        for dan in range(broj_dana):
+            datum = datum_od + timedelta(days=dan)
+            zauzeto = zauzetost.get((salon.id, datum), {})
+            frizeri = tuple(
+                (rad, zauzeto.get(frizer_id, 0)) for frizer_id, rad in radna_vremena[salon.id].maske(datum).items()
+            )
+            if frizeri not in mjesta_po_stanju:
+                mjesta_po_stanju[frizeri] = mreza.mjesta_po_terminu(frizeri, pocetci, salon.trajanje_termina_min)
+            rezultat[salon.id][datum] = [sum(1 for rad, _zauzeto in frizeri if rad), mjesta_po_stanju[frizeri]]
+    return rezultat
+
+
+# Za svaki salon vraca (pocetci termina, [(datum, ukupno mjesta, [slobodnih mjesta po pocetku]) za svaki dan]),
+# koristeci spremljene dane iz cachea. Dan se u cacheu cuva kao [ukupno mjesta, slobodna mjesta],
+# a dani kojih nema racunaju se zajedno za sve salone (jedan upit za frizere s rasporedom i jedan za zauzeca)
+# i spremaju, zajedno s radnim vremenom frizera tih dana (za rezervaciju i slobodne frizere).
+def dohvati_slobodna_mjesta_salona(saloni, datum_od, datum_do):
+    kes = _kes()
+    datumi = [datum_od + timedelta(days=pomak) for pomak in range((datum_do - datum_od).days + 1)]
+    verzije = verzije_salona([salon.id for salon in saloni])
+    kljucevi = {
+        (salon.id, datum): _kljuc_dana(salon.id, verzija, datum)
+        for salon, verzija in zip(saloni, verzije)
+        for datum in datumi
+    }
+    spremljeno = kes.get_many(list(kljucevi.values()))
+
+    nedostaju = [(salon_id, datum) for (salon_id, datum), kljuc in kljucevi.items() if kljuc not in spremljeno]
+    if nedostaju:
+        nepotpuni = {salon_id for salon_id, _datum in nedostaju}
+        prvi = min(datum for _salon_id, datum in nedostaju)
+        zadnji = max(datum for _salon_id, datum in nedostaju)
+        radna_vremena = radna_vremena_salona([salon for salon in saloni if salon.id in nepotpuni], prvi, zadnji)
+        s_frizerima = [salon for salon in saloni if salon.id in radna_vremena]
+        izracunato = {}
+        if s_frizerima:
+            izracunato = izracunaj_slobodna_mjesta(s_frizerima, prvi, zadnji, radna_vremena)
+        novi = {
+            kljucevi[(salon_id, datum)]: izracunato.get(salon_id, {}).get(datum, [0, []])
+            for salon_id, datum in nedostaju
+        }
+        verzija_po_salonu = {salon.id: verzija for salon, verzija in zip(saloni, verzije)}
+        rad = {
+            _kljuc_rada(salon_id, verzija_po_salonu[salon_id], datum): (
+                radna_vremena[salon_id].maske(datum) if salon_id in radna_vremena else {}
+            )
+            for salon_id, datum in nedostaju
+        }
+        kes.set_many({**novi, **rad}, _timeout())
+        spremljeno.update(novi)
+
+    return {
+        salon.id: (
+            pocetci_termina(salon),
+            [(datum, *spremljeno[kljucevi[(salon.id, datum)]]) for datum in datumi],
+        )
+        for salon in saloni
+    }
+
+
+def dohvati_slobodna_mjesta(salon, datum_od, datum_do):
+    return dohvati_slobodna_mjesta_salona([salon], datum_od, datum_do)[salon.id]
+
+
+def _zapis_termina(salon, datum, vrijeme_od, vrijeme_do, slobodnih_mjesta, ukupno_mjesta):
+    return {
+        'id': f'{datum}-{vrijeme_od}-{vrijeme_do}',
+        'salon': salon.id,
+        'salon_naziv': salon.naziv,
+        'datum': datum,
+        'vrijeme_od': vrijeme_od,
+        'vrijeme_do': vrijeme_do,
+        'slobodan': slobodnih_mjesta > 0,
+        'slobodnih_mjesta': slobodnih_mjesta,
+        'ukupno_mjesta': ukupno_mjesta,
+    }
+
+
+# Mreza slobodnih termina kao popis termina (jedan rjecnik po terminu)
+def dohvati_slobodne_termine(salon, datum_od, datum_do):
+    pocetci, dani = dohvati_slobodna_mjesta(salon, datum_od, datum_do)
+    vremena = [(mreza.hhmm(pocetak), mreza.hhmm(pocetak + salon.trajanje_termina_min)) for pocetak in pocetci]
+    rezultat = []
+    for datum, ukupno_mjesta, mjesta in dani:
+        datum = datum.isoformat()
+        for (vrijeme_od, vrijeme_do), slobodnih_mjesta in zip(vremena, mjesta):
+            rezultat.append(_zapis_termina(salon, datum, vrijeme_od, vrijeme_do, slobodnih_mjesta, ukupno_mjesta))
+    return rezultat
+
+
+# Zapis mreze za jedan termin dana koji pocinje u vrijeme_od, ili None ako termin nije u mrezi salona
+def dohvati_slobodan_termin(salon, datum, vrijeme_od):
+    pocetci, [(_datum, ukupno_mjesta, mjesta)] = dohvati_slobodna_mjesta(salon, datum, datum)
+    pocetak = mreza.minute(vrijeme_od)
+    if pocetak not in pocetci:
+        return None
+    slobodnih_mjesta = mjesta[pocetci.index(pocetak)] if mjesta else 0
+    return _zapis_termina(
+        salon,
+        datum.isoformat(),
+        mreza.hhmm(pocetak),
+        mreza.hhmm(pocetak + salon.trajanje_termina_min),
+        slobodnih_mjesta,
+        ukupno_mjesta,
+    )
+
+
+# Broj dana koji pretraga prvih slobodnih termina ucitava odjednom za sve salone
+BLOK_PRETRAGE_DANA = 3
+
+
+def _slobodni_termini_salona(salon_id, pocetci, dani, od_datuma, od_minute):
+    for datum, ukupno_mjesta, mjesta in dani:
+        for pocetak, slobodnih_mjesta in zip(pocetci, mjesta):
+            if slobodnih_mjesta and (datum, pocetak) >= (od_datuma, od_minute):
+                yield datum, pocetak, salon_id, slobodnih_mjesta, ukupno_mjesta
+
+
+# Najranijih `broj` slobodnih termina u zadanim salonima od trenutka `od` (datum i minuta) do datuma datum_do.
+# Dani se ucitavaju u blokovima za sve salone odjednom (iz cachea ili s dva upita), a slobodni termini salona,
+# vec poredani po vremenu, spajaju se heapq.merge-om. Pretraga staje cim je pronadeno dovoljno termina,
+# pa se za vecinu upita ucitava samo prvi blok.
+def prvi_slobodni_termini(saloni, od_datuma, od_minute, datum_do, broj):
+    saloni = {salon.id: salon for salon in saloni}
+    pronadeno = []
+    datum = od_datuma
+    while saloni and datum <= datum_do and len(pronadeno) < broj:
+        kraj_bloka = min(datum + timedelta(days=BLOK_PRETRAGE_DANA - 1), datum_do)
+        mjesta = dohvati_slobodna_mjesta_salona(list(saloni.values()), datum, kraj_bloka)
+        tokovi = [
+            _slobodni_termini_salona(salon_id, pocetci, dani, od_datuma, od_minute)
+            for salon_id, (pocetci, dani) in mjesta.items()
+        ]
+        pronadeno.extend(islice(heapq.merge(*tokovi), broj - len(pronadeno)))
+        datum = kraj_bloka + timedelta(days=1)
+
+    rezultat = []
+    for datum, pocetak, salon_id, slobodnih_mjesta, ukupno_mjesta in pronadeno:
+        salon = saloni[salon_id]
+        rezultat.append(_zapis_termina(
+            salon,
+            datum.isoformat(),
+            mreza.hhmm(pocetak),
+            mreza.hhmm(pocetak + salon.trajanje_termina_min),
+            slobodnih_mjesta,
+            ukupno_mjesta,
+        ))
+    return rezultat
+
+
+# Mreza slobodnih termina u stupcima (?oblik=stupci): zajednicko zaglavlje s pocetcima termina u minutama
+# i za svaki dan samo niz slobodnih mjesta, bez rjecnika po terminu. Prazan niz znaci da salon nema aktivnih frizera.
+def stupci_slobodnih_termina(salon, datum_od, datum_do):
+    pocetci, dani = dohvati_slobodna_mjesta(salon, datum_od, datum_do)
+    return {
+        'salon': salon.id,
+        'salon_naziv': salon.naziv,
+        'trajanje_min': salon.trajanje_termina_min,
+        'pocetak_min': pocetci,
+        'dani': [
+            {'datum': datum.isoformat(), 'ukupno_mjesta': ukupno_mjesta, 'slobodnih_mjesta': mjesta}
+            for datum, ukupno_mjesta, mjesta in dani
+        ],
+    }
+
+
+# Zauzetost aktivnih frizera salona za dan kao {frizer_id: bitmapa} (mreza.maska), iz jednog upita nad
+# zauzetim terminima. Sprema se u cache uz mrezu dana i ponistava zajedno s njom (ponisti_dan, ponisti_salon).
+def zauzetost_frizera(salon_id, datum):
+    kes = _kes()
+    kljuc = _kljuc_zauzetosti(salon_id, verzija_salona(salon_id), datum)
+    bitmape = kes.get(kljuc)
+    if bitmape is not None:
+        return bitmape
+
+    redovi = (
+        Frizer.objects.filter(salon_id=salon_id, aktivan=True)
+        .annotate(zauzeti=FilteredRelation('termini', condition=Q(termini__datum=datum, termini__slobodan=False)))
+        .values_list('id', 'zauzeti__vrijeme_od', 'zauzeti__vrijeme_do')
+    )
+    bitmape = {}
+    for frizer_id, vrijeme_od, vrijeme_do in redovi:
+        bitmape.setdefault(frizer_id, 0)
+        if vrijeme_od is not None:
+            bitmape[frizer_id] |= mreza.maska(mreza.minute(vrijeme_od), mreza.minute(vrijeme_do))
+    kes.set(kljuc, bitmape, _timeout())
+    return bitmape
+
+
+# Radno vrijeme aktivnih frizera salona za dan kao {frizer_id: bitmapa} (vidi raspored.RadnoVrijemeSalona).
+# Obicno je vec spremljeno uz mrezu dana, a inace se racuna jednim upitom.
+def radno_vrijeme_frizera(salon, datum):
+    kes = _kes()
+    kljuc = _kljuc_rada(salon.id, verzija_salona(salon.id), datum)
+    maske = kes.get(kljuc)
+    if maske is not None:
+        return maske
+
+    radno_vrijeme = radna_vremena_salona([salon], datum, datum).get(salon.id)
+    maske = radno_vrijeme.maske(datum) if radno_vrijeme else {}
+    kes.set(kljuc, maske, _timeout())
+    return maske
+
+
+# Aktivni frizeri salona koji rade cijelo vrijeme [vrijeme_od, vrijeme_do)
+def radni_frizeri(salon, datum, vrijeme_od, vrijeme_do):
+    maska = mreza.maska(mreza.minute(vrijeme_od), mreza.minute(vrijeme_do))
+    return [frizer_id for frizer_id, rad in radno_vrijeme_frizera(salon, datum).items() if rad & maska == maska]
+
+
+# Aktivni frizeri salona koji rade u [vrijeme_od, vrijeme_do) i nemaju nijedan zauzeti termin koji se s njim
+# preklapa, bez obzira na trajanje postojecih termina
+def slobodni_frizeri(salon, datum, vrijeme_od, vrijeme_do):
+    maska = mreza.maska(mreza.minute(vrijeme_od), mreza.minute(vrijeme_do))
+    radni = set(radni_frizeri(salon, datum, vrijeme_od, vrijeme_do))
+    return [
+        frizer_id for frizer_id, bitmapa in zauzetost_frizera(salon.id, datum).items()
+        if frizer_id in radni and not bitmapa & maska
+    ]
+
+
+# Ponistava spremljenu mrezu i zauzetost frizera jednog dana salona
+# Brise se odmah (za citanja unutar iste transakcije) i ponovno nakon commita,
+# kako istovremeni zahtjev ne bi spremio stanje prije commita
+def ponisti_dan(salon_id, datum):
+    def obrisi():
+        verzija = verzija_salona(salon_id)
+        _kes().delete_many([_kljuc_dana(salon_id, verzija, datum), _kljuc_zauzetosti(salon_id, verzija, datum)])
+        _povecaj_brojac(_kljuc_zauzeca(salon_id))
+
+    obrisi()
+    transaction.on_commit(obrisi)
+
+
+# Ponistava sve spremljene dane salona (promjena radnog vremena, rasporeda, trajanja termina ili frizera)
+def ponisti_salon(salon_id):
+    def povecaj_verziju():
+        _povecaj_brojac(_kljuc_verzije(salon_id))
+        _povecaj_brojac(KLJUC_KATALOGA)
+
+    povecaj_verziju()
+    transaction.on_commit(povecaj_verziju)
+
+
+# Promjena podataka koji se prikazuju uz salone, a nisu dio salona (npr. ime vlasnika)
+def ponisti_katalog():
+    _povecaj_brojac(KLJUC_KATALOGA)
+    transaction.on_commit(lambda: _povecaj_brojac(KLJUC_KATALOGA))
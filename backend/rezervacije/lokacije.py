@@ -0,0 +1,104 @@
+import math
+import threading
+from collections import defaultdict
+
+from .dostupnost import verzija_kataloga
+from .models import Salon
+
+
+# Pretraga salona po udaljenosti (SalonViewSet, ?lokacija=45.81,15.98).
+# Koordinate aktivnih salona drze se u memoriji procesa u mrezi celija od KORAK_STUPNJEVA (oko 1 km),
+# pa se za upit pregledavaju samo celije oko zadane tocke, a udaljenost se racuna samo za salone u njima.
+# Mreza se gradi jednim upitom i ponovno gradi kad se promijeni verzija kataloga (bilo koja promjena salona).
+ZEMLJA_RADIJUS_KM = 6371.0
+KM_PO_STUPNJU = math.pi * ZEMLJA_RADIJUS_KM / 180
+KORAK_STUPNJEVA = 0.01
+
+# Pretraga najblizih salona krece od ovog radijusa i udvostrucuje ga dok ne pronade dovoljno salona
+POCETNI_RADIJUS_KM = 2.0
+MAKS_RADIJUS_KM = 200.0
+
+
+def udaljenost_km(sirina1, duzina1, sirina2, duzina2):
+    fi1, fi2 = math.radians(sirina1), math.radians(sirina2)
+    d_fi = fi2 - fi1
+    d_lambda = math.radians(duzina2 - duzina1)
+    a = math.sin(d_fi / 2) ** 2 + math.cos(fi1) * math.cos(fi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * ZEMLJA_RADIJUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class ProstornaMreza:
+    def __init__(self, tocke, korak=KORAK_STUPNJEVA):
+        self.korak = korak
+        self.celije = defaultdict(list)
+        for salon_id, sirina, duzina in tocke:
+            self.celije[self._celija(sirina, duzina)].append((salon_id, sirina, duzina))
+
+    def _celija(self, sirina, duzina):
+        return math.floor(sirina / self.korak), math.floor(duzina / self.korak)
+
+    # [(udaljenost_km, salon_id)] za salone unutar radijusa, od najblizeg
+    def u_radijusu(self, sirina, duzina, radijus_km):
+        sirina_celija = math.ceil(radijus_km / KM_PO_STUPNJU / self.korak)
+        # Stupanj duzine je kraci prema polovima; blizu pola pregledava se cijeli krug
+        kosinus = math.cos(math.radians(sirina))
+        if kosinus < 0.01:
+            duzina_celija = math.ceil(180 / self.korak)
+        else:
+            duzina_celija = math.ceil(radijus_km / (KM_PO_STUPNJU * kosinus) / self.korak)
+
+        sredina_sirine, sredina_duzine = self._celija(sirina, duzina)
+        rezultat = []
+        for i in range(sredina_sirine - sirina_celija, sredina_sirine + sirina_celija + 1):
+            for j in range(sredina_duzine - duzina_celija, sredina_duzine + duzina_celija + 1):
+                for salon_id, salon_sirina, salon_duzina in self.celije.get((i, j), ()):
+                    udaljenost = udaljenost_km(sirina, duzina, salon_sirina, salon_duzina)
+                    if udaljenost <= radijus_km:
+                        rezultat.append((udaljenost, salon_id))
+        rezultat.sort()
+        return rezultat
+
+    # Najblizih `broj` salona: saloni unutar radijusa su sigurno blizi od svih izvan njega,
+    # pa se radijus povecava dok ih unutar njega nema dovoljno
+    def najblizi(self, sirina, duzina, broj, maks_radijus_km=MAKS_RADIJUS_KM):
+        radijus = min(POCETNI_RADIJUS_KM, maks_radijus_km)
+        while True:
+            rezultat = self.u_radijusu(sirina, duzina, radijus)
+            if len(rezultat) >= broj or radijus >= maks_radijus_km:
+                return rezultat[:broj]
+            radijus = min(radijus * 2, maks_radijus_km)
+
+
+_indeks = (None, None)
+_lock = threading.Lock()
+
+
+def prostorni_indeks():
+    global _indeks
+    verzija = verzija_kataloga()
+    spremljena_verzija, mreza = _indeks
+    if spremljena_verzija == verzija:
+        return mreza
+    with _lock:
+        if _indeks[0] != verzija:
+            tocke = Salon.objects.filter(
+                aktivan=True,
+                geo_sirina__isnull=False,
+                geo_duzina__isnull=False,
+            ).values_list('id', 'geo_sirina', 'geo_duzina')
+            _indeks = (verzija, ProstornaMreza(tocke))
+        return _indeks[1]
+
+
+# Saloni oko tocke: unutar radijusa (ako je zadan) ili najblizi, kao [(udaljenost_km, salon_id)].
+# Zadani queryset (npr. rezultat pretrage) vec je suzen, pa se mreza gradi samo od njegovih salona.
+def saloni_u_blizini(sirina, duzina, broj, radijus_km=None, queryset=None):
+    if queryset is None:
+        indeks = prostorni_indeks()
+    else:
+        indeks = ProstornaMreza(
+            queryset.filter(geo_sirina__isnull=False, geo_duzina__isnull=False).values_list('id', 'geo_sirina', 'geo_duzina')
+        )
+    if radijus_km is not None:
+        return indeks.u_radijusu(sirina, duzina, radijus_km)[:broj]
+    return indeks.najblizi(sirina, duzina, broj)
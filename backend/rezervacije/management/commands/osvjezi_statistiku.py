@@ -0,0 +1,32 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from rezervacije.statistika import osvjezi_dnevnu_statistiku
+
+
+def parsiraj_datum(vrijednost):
+    try:
+        return datetime.strptime(vrijednost, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f'Datum nije ispravan: {vrijednost}')
+
+
+class Command(BaseCommand):
+    help = 'Preracunava dnevnu statistiku rezervacija (DnevnaStatistika) za zadani raspon datuma'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--od', dest='datum_od', help='Početni datum (YYYY-MM-DD), zadano: prije 30 dana')
+        parser.add_argument('--do', dest='datum_do', help='Završni datum (YYYY-MM-DD), zadano: danas')
+        parser.add_argument('--salon', type=int, action='append', dest='saloni', help='ID salona (može više puta)')
+
+    def handle(self, *args, **options):
+        danas = timezone.localdate()
+        datum_od = parsiraj_datum(options['datum_od']) if options['datum_od'] else danas - timedelta(days=30)
+        datum_do = parsiraj_datum(options['datum_do']) if options['datum_do'] else danas
+        if datum_od > datum_do:
+            raise CommandError('Početni datum mora biti prije završnog.')
+
+        broj = osvjezi_dnevnu_statistiku(datum_od, datum_do, options['saloni'])
+        self.stdout.write(self.style.SUCCESS(f'Spremljeno {broj} redova statistike za {datum_od} - {datum_do}.'))
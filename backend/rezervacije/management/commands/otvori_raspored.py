@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from rezervacije.management.commands.osvjezi_statistiku import parsiraj_datum
+from rezervacije.models import Salon
+from rezervacije.raspored import VELICINA_BLOKA, otvori_raspored
+
+
+class Command(BaseCommand):
+    help = 'Otvara raspored salona: kreira sve termine za raspon datuma prema radnom vremenu salona'
+
+    def add_arguments(self, parser):
+        parser.add_argument('salon', type=int, help='ID salona')
+        parser.add_argument('--od', dest='datum_od', required=True, help='Početni datum (YYYY-MM-DD)')
+        parser.add_argument('--do', dest='datum_do', required=True, help='Završni datum (YYYY-MM-DD)')
+        parser.add_argument('--frizer', type=int, action='append', dest='frizeri', help='ID frizera (može više puta), zadano: svi aktivni')
+        parser.add_argument('--blok', type=int, default=VELICINA_BLOKA, help='Broj termina po bulk_create upitu')
+
+    def handle(self, *args, **options):
+        salon = Salon.objects.filter(id=options['salon']).first()
+        if not salon:
+            raise CommandError(f"Salon {options['salon']} ne postoji.")
+
+        datum_od = parsiraj_datum(options['datum_od'])
+        datum_do = parsiraj_datum(options['datum_do'])
+        if datum_od > datum_do:
+            raise CommandError('Početni datum mora biti prije završnog.')
+
+        frizeri = salon.frizeri.filter(aktivan=True)
+        if options['frizeri']:
+            frizeri = salon.frizeri.filter(id__in=options['frizeri'])
+        frizeri = list(frizeri)
+        if not frizeri:
+            raise CommandError('Salon nema odabranih aktivnih zaposlenika.')
+
+        kreirano = otvori_raspored(salon, frizeri, datum_od, datum_do, options['blok'])
+        self.stdout.write(self.style.SUCCESS(f'Kreirano {kreirano} novih termina za salon {salon.naziv}.'))
@@ -0,0 +1,149 @@
+import logging
+import statistics
+import threading
+import time as _time
+from collections import Counter
+from datetime import time, timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from rezervacije.models import Salon, Frizer, Rezervacija
+
+
+# Testiranje opterecenja rezervacija: puno istovremenih zahtjeva za isti termin iz vise dretvi
+# nad stvarnom (lokalnom) bazom. Ispisuje propusnost, udio gresaka i dvostruke rezervacije.
+# Dvostruka rezervacija je vise potvrdenih rezervacija nego frizera, vise rezervacija istog frizera
+# ili vise rezervacija istog korisnika za isti termin.
+def pronadji_dvostruke_rezervacije(salon, datum, vrijeme_od, broj_frizera):
+    potvrdene = Rezervacija.objects.filter(
+        termin__salon=salon,
+        termin__datum=datum,
+        termin__vrijeme_od=vrijeme_od,
+        status='potvrdena',
+    )
+    problemi = []
+    ukupno = potvrdene.count()
+    if ukupno > broj_frizera:
+        problemi.append(f'{ukupno} potvrdenih rezervacija za {broj_frizera} frizera')
+    for red in potvrdene.values('termin__frizer').annotate(broj=Count('id')).filter(broj__gt=1):
+        problemi.append(f"frizer {red['termin__frizer']} ima {red['broj']} rezervacije")
+    for red in potvrdene.values('korisnik').annotate(broj=Count('id')).filter(broj__gt=1):
+        problemi.append(f"korisnik {red['korisnik']} ima {red['broj']} rezervacije")
+    return problemi
+
+
+class Command(BaseCommand):
+    help = 'Stres test: istovremene rezervacije istog termina iz više dretvi, provjera dvostrukih rezervacija'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--zahtjeva', type=int, default=200, help='Ukupan broj zahtjeva za rezervaciju')
+        parser.add_argument('--dretvi', type=int, default=50, help='Broj istovremenih dretvi')
+        parser.add_argument('--frizera', type=int, default=5, help='Broj frizera (slobodnih mjesta) u terminu')
+        parser.add_argument('--korisnika', type=int, help='Broj različitih korisnika, zadano: jedan po zahtjevu')
+        parser.add_argument('--zadrzi', action='store_true', help='Ne briši generirani salon i korisnike nakon testa')
+
+    def handle(self, *args, **options):
+        broj_zahtjeva = options['zahtjeva']
+        broj_dretvi = min(options['dretvi'], broj_zahtjeva)
+        broj_korisnika = options['korisnika'] or broj_zahtjeva
+        if broj_zahtjeva < 1 or broj_dretvi < 1 or options['frizera'] < 1 or broj_korisnika < 1:
+            raise CommandError('Broj zahtjeva, dretvi, frizera i korisnika mora biti pozitivan.')
+
+        oznaka = f'stres{int(_time.time())}'
+        salon = Salon.objects.create(
+            naziv=f'Stres test {oznaka}',
+            adresa='Stres test',
+            radno_od=time(8, 0),
+            radno_do=time(16, 0),
+            trajanje_termina_min=30,
+        )
+        Frizer.objects.bulk_create(
+            Frizer(salon=salon, ime_prezime=f'Frizer {broj}') for broj in range(options['frizera'])
+        )
+        lozinka = make_password(None)
+        korisnici = User.objects.bulk_create(
+            User(username=f'{oznaka}_{broj}', password=lozinka) for broj in range(broj_korisnika)
+        )
+        datum = timezone.localdate() + timedelta(days=1)
+        podaci = {
+            'salon': salon.id,
+            'datum': datum.isoformat(),
+            'vrijeme_od': '10:00',
+            'vrijeme_do': '10:30',
+        }
+
+        self.stdout.write(
+            f'Slanje {broj_zahtjeva} zahtjeva iz {broj_dretvi} dretvi za termin s {options["frizera"]} mjesta...'
+        )
+        # Zahtjevi idu kroz Django bez HTTP servera, ali Host mora biti dopusten (ALLOWED_HOSTS)
+        host = next((host.lstrip('.') for host in settings.ALLOWED_HOSTS if host != '*'), 'localhost')
+        rezultati = []
+        zakljucavanje = threading.Lock()
+        sljedeci = iter(range(broj_zahtjeva))
+        start = threading.Barrier(broj_dretvi)
+
+        # Testni klijent hvata iznimke viewa kroz globalni signal got_request_exception, pa bi s vise dretvi
+        # greska jednog zahtjeva bila podignuta u drugoj dretvi. Zato se iznimke ne podizu, nego greska
+        # servera stize kao odgovor 500, a ishod se odreduje samo po statusu odgovora.
+        def radnik():
+            client = APIClient(HTTP_HOST=host, raise_request_exception=False)
+            start.wait()
+            try:
+                while True:
+                    with zakljucavanje:
+                        redni_broj = next(sljedeci, None)
+                    if redni_broj is None:
+                        return
+                    client.force_authenticate(user=korisnici[redni_broj % broj_korisnika])
+                    pocetak = _time.perf_counter()
+                    response = client.post('/api/rezervacije/', podaci, format='json')
+                    trajanje = (_time.perf_counter() - pocetak) * 1000
+                    with zakljucavanje:
+                        rezultati.append((response.status_code, trajanje))
+            finally:
+                connection.close()
+
+        # Odbijene rezervacije (400) su ocekivane, pa se ne ispisuju za svaki zahtjev
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+        pocetak = _time.perf_counter()
+        dretve = [threading.Thread(target=radnik) for _ in range(broj_dretvi)]
+        for dretva in dretve:
+            dretva.start()
+        for dretva in dretve:
+            dretva.join()
+        ukupno_s = _time.perf_counter() - pocetak
+
+        ishodi = Counter(ishod for ishod, _ in rezultati)
+        trajanja = sorted(trajanje for _, trajanje in rezultati)
+        uspjesne = ishodi.get(201, 0)
+        odbijene = ishodi.get(400, 0)
+        # Greske su odgovori servera 5xx i svi ostali neocekivani statusi (npr. 401 ili 429)
+        greske = len(rezultati) - uspjesne - odbijene
+        problemi = pronadji_dvostruke_rezervacije(salon, datum, time(10, 0), options['frizera'])
+
+        self.stdout.write(f'Trajanje: {ukupno_s:.2f} s, propusnost: {len(rezultati) / ukupno_s:.1f} zahtjeva/s')
+        p95 = statistics.quantiles(trajanja, n=20, method='inclusive')[-1] if len(trajanja) > 1 else trajanja[0]
+        self.stdout.write(
+            f'Latencija: p50 {statistics.median(trajanja):.1f} ms, p95 {p95:.1f} ms, max {trajanja[-1]:.1f} ms'
+        )
+        self.stdout.write(f'Uspješne: {uspjesne}, odbijene (termin zauzet): {odbijene}, greške: {greske}')
+        self.stdout.write(f'Udio grešaka: {greske / len(rezultati):.1%}, ishodi: {dict(ishodi)}')
+
+        if not options['zadrzi']:
+            salon.delete()
+            User.objects.filter(username__startswith=f'{oznaka}_').delete()
+
+        if problemi:
+            raise CommandError('Dvostruke rezervacije: ' + '; '.join(problemi))
+        if greske or uspjesne < min(options['frizera'], broj_korisnika, broj_zahtjeva):
+            raise CommandError(
+                f'Rezervirano je {uspjesne} od {options["frizera"]} slobodnih mjesta, greške: {greske}.'
+            )
+        self.stdout.write(self.style.SUCCESS('Nema dvostrukih rezervacija.'))
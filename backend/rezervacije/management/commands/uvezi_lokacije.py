@@ -0,0 +1,63 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rezervacije.dostupnost import ponisti_katalog
+from rezervacije.models import Salon
+from rezervacije.pretraga import presavij
+
+
+class Command(BaseCommand):
+    help = 'Uvozi geografske koordinate salona iz CSV datoteke (stupci: adresa, sirina, duzina i po želji salon)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('datoteka', help='Putanja do CSV datoteke')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['datoteka'], newline='', encoding='utf-8') as datoteka:
+                redovi = list(csv.DictReader(datoteka))
+        except OSError as greska:
+            raise CommandError(f'Datoteku nije moguće pročitati: {greska}')
+        if redovi and not {'sirina', 'duzina'} <= redovi[0].keys():
+            raise CommandError('CSV mora imati stupce sirina i duzina.')
+
+        saloni = {salon.id: salon for salon in Salon.objects.only('id', 'adresa', 'geo_sirina', 'geo_duzina')}
+        po_adresi = {}
+        for salon in saloni.values():
+            po_adresi.setdefault(presavij(salon.adresa).strip(), []).append(salon)
+
+        promijenjeni = {}
+        nepronadeni = []
+        for broj_reda, red in enumerate(redovi, start=2):
+            try:
+                sirina, duzina = float(red['sirina']), float(red['duzina'])
+            except (TypeError, ValueError):
+                raise CommandError(f'Red {broj_reda}: neispravne koordinate.')
+            if not (-90 <= sirina <= 90 and -180 <= duzina <= 180):
+                raise CommandError(f'Red {broj_reda}: koordinate izvan raspona.')
+
+            # Salon se trazi po ID-u ako je zadan, a inace po adresi bez obzira na velika slova i dijakritike
+            if (red.get('salon') or '').strip():
+                try:
+                    salon_id = int(red['salon'])
+                except ValueError:
+                    raise CommandError(f'Red {broj_reda}: neispravan ID salona.')
+                pronadeni = [saloni[salon_id]] if salon_id in saloni else []
+            else:
+                pronadeni = po_adresi.get(presavij(red.get('adresa')).strip(), [])
+            if not pronadeni:
+                nepronadeni.append(red.get('adresa') or red.get('salon'))
+                continue
+            for salon in pronadeni:
+                salon.geo_sirina, salon.geo_duzina = sirina, duzina
+                promijenjeni[salon.id] = salon
+
+        # bulk_update ne salje signale, pa se verzija kataloga (i prostorni indeks) ponistava ovdje
+        Salon.objects.bulk_update(promijenjeni.values(), ['geo_sirina', 'geo_duzina'], batch_size=500)
+        if promijenjeni:
+            ponisti_katalog()
+
+        self.stdout.write(self.style.SUCCESS(f'Ažurirano {len(promijenjeni)} salona.'))
+        for adresa in nepronadeni:
+            self.stdout.write(self.style.WARNING(f'Salon nije pronađen: {adresa}'))
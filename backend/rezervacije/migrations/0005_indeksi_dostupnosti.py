@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rezervacije', '0004_termin_termin_pocetak_prije_kraja'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rezervacija',
+            index=models.Index(fields=['korisnik', 'status'], name='rezervacija_korisnik_stat_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='termin',
+            index=models.Index(condition=models.Q(('slobodan', False)), fields=['salon', 'datum', 'vrijeme_od', 'vrijeme_do', 'frizer'], name='termin_zauzet_salon_datum_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='termin',
+            index=models.Index(fields=['salon', 'datum', 'slobodan', 'vrijeme_od'], name='termin_salon_datum_idx'),
+        ),
+    ]
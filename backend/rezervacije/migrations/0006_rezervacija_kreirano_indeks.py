@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rezervacije', '0005_indeksi_dostupnosti'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rezervacija',
+            index=models.Index(fields=['-kreirano', '-id'], name='rezervacija_kreirano_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rezervacije', '0006_rezervacija_kreirano_indeks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DnevnaStatistika',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('datum', models.DateField()),
+                ('sat', models.PositiveSmallIntegerField()),
+                ('potvrdene', models.PositiveIntegerField(default=0)),
+                ('otkazane', models.PositiveIntegerField(default=0)),
+                ('frizer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dnevna_statistika', to='rezervacije.frizer')),
+                ('salon', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dnevna_statistika', to='rezervacije.salon')),
+            ],
+            options={
+                'ordering': ['datum', 'sat'],
+                'indexes': [models.Index(fields=['salon', 'datum'], name='statistika_salon_datum_idx')],
+                'constraints': [models.UniqueConstraint(fields=('frizer', 'datum', 'sat'), name='jedinstvena_statistika_po_frizeru')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+# Prijava i registracija traze korisnika po emailu bez obzira na velika i mala slova,
+# a auth_user.email nema indeks. Tablica pripada aplikaciji auth, pa se indeks nad LOWER(email)
+# dodaje SQL-om (sintaksa je ista za SQLite i PostgreSQL).
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rezervacije', '0007_dnevna_statistika'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql='CREATE INDEX IF NOT EXISTS korisnik_email_lower_idx ON auth_user (LOWER(email))',
+            reverse_sql='DROP INDEX IF EXISTS korisnik_email_lower_idx',
+        ),
+    ]
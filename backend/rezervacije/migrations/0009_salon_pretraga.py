@@ -0,0 +1,99 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:51
+
+import unicodedata
+
+from django.db import migrations, models
+
+
+# Kopija presavijanja iz pretraga.py, kako migracija ne bi ovisila o kasnijim promjenama koda
+def _presavij(tekst):
+    return ''.join(
+        znak for znak in unicodedata.normalize('NFD', tekst) if unicodedata.category(znak) != 'Mn'
+    ).replace('đ', 'd').replace('Đ', 'D').lower()
+
+
+def popuni_pretragu(apps, schema_editor):
+    Salon = apps.get_model('rezervacije', 'Salon')
+    saloni = list(Salon.objects.only('naziv', 'adresa', 'opis'))
+    for salon in saloni:
+        salon.pretraga = _presavij(' '.join(dio for dio in (salon.naziv, salon.adresa, salon.opis) if dio))
+    Salon.objects.bulk_update(saloni, ['pretraga'], batch_size=1000)
+
+
+# SQLite: FTS5 tablica nad stupcem pretraga (external content) koju okidaci drze uskladenom sa salonima.
+# Ako SQLite nema FTS5, tablica se ne kreira i pretraga koristi LIKE.
+# Napomena: SQLite migracija koja ponovno kreira tablicu salona (npr. AlterField) brise i okidace,
+# pa ih takva migracija mora ponovno kreirati.
+SQLITE_INDEKS = [
+    "CREATE VIRTUAL TABLE rezervacije_salon_fts USING fts5(pretraga, content='rezervacije_salon', content_rowid='id')",
+    """CREATE TRIGGER rezervacije_salon_fts_ai AFTER INSERT ON rezervacije_salon BEGIN
+        INSERT INTO rezervacije_salon_fts(rowid, pretraga) VALUES (new.id, new.pretraga);
+    END""",
+    """CREATE TRIGGER rezervacije_salon_fts_ad AFTER DELETE ON rezervacije_salon BEGIN
+        INSERT INTO rezervacije_salon_fts(rezervacije_salon_fts, rowid, pretraga) VALUES ('delete', old.id, old.pretraga);
+    END""",
+    """CREATE TRIGGER rezervacije_salon_fts_au AFTER UPDATE OF pretraga ON rezervacije_salon BEGIN
+        INSERT INTO rezervacije_salon_fts(rezervacije_salon_fts, rowid, pretraga) VALUES ('delete', old.id, old.pretraga);
+        INSERT INTO rezervacije_salon_fts(rowid, pretraga) VALUES (new.id, new.pretraga);
+    END""",
+    "INSERT INTO rezervacije_salon_fts(rezervacije_salon_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BRISANJE = [
+    'DROP TRIGGER IF EXISTS rezervacije_salon_fts_ai',
+    'DROP TRIGGER IF EXISTS rezervacije_salon_fts_ad',
+    'DROP TRIGGER IF EXISTS rezervacije_salon_fts_au',
+    'DROP TABLE IF EXISTS rezervacije_salon_fts',
+]
+
+# PostgreSQL: trigram GIN indeks ubrzava LIKE '%rijec%' i slicnost rijeci (potrebno je prava za CREATE EXTENSION)
+POSTGRESQL_INDEKS = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX IF NOT EXISTS salon_pretraga_trgm_idx ON rezervacije_salon USING gin (pretraga gin_trgm_ops)',
+]
+
+POSTGRESQL_BRISANJE = [
+    'DROP INDEX IF EXISTS salon_pretraga_trgm_idx',
+]
+
+
+def _izvrsi(schema_editor, naredbe):
+    for naredba in naredbe:
+        schema_editor.execute(naredba)
+
+
+def kreiraj_indeks(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _izvrsi(schema_editor, POSTGRESQL_INDEKS)
+    elif vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+            fts5 = cursor.fetchone()[0]
+        if fts5:
+            _izvrsi(schema_editor, SQLITE_INDEKS)
+
+
+def obrisi_indeks(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _izvrsi(schema_editor, POSTGRESQL_BRISANJE)
+    elif vendor == 'sqlite':
+        _izvrsi(schema_editor, SQLITE_BRISANJE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rezervacije', '0008_korisnik_email_indeks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salon',
+            name='pretraga',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(popuni_pretragu, migrations.RunPython.noop),
+        migrations.RunPython(kreiraj_indeks, obrisi_indeks),
+    ]
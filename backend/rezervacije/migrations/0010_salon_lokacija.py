@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rezervacije', '0009_salon_pretraga'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salon',
+            name='geo_duzina',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='salon',
+            name='geo_sirina',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
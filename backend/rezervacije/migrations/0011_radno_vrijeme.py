@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rezervacije', '0010_salon_lokacija'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RadnoVrijeme',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dan_u_tjednu', models.PositiveSmallIntegerField(blank=True, choices=[(0, 'Ponedjeljak'), (1, 'Utorak'), (2, 'Srijeda'), (3, 'Četvrtak'), (4, 'Petak'), (5, 'Subota'), (6, 'Nedjelja')], null=True)),
+                ('datum', models.DateField(blank=True, null=True)),
+                ('vrijeme_od', models.TimeField(blank=True, null=True)),
+                ('vrijeme_do', models.TimeField(blank=True, null=True)),
+                ('napomena', models.CharField(blank=True, max_length=120)),
+                ('frizer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='radno_vrijeme', to='rezervacije.frizer')),
+                ('salon', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='radno_vrijeme', to='rezervacije.salon')),
+            ],
+            options={
+                'ordering': ['datum', 'dan_u_tjednu', 'vrijeme_od'],
+                'indexes': [models.Index(fields=['salon', 'datum'], name='radno_vrijeme_salon_datum_idx')],
+                'constraints': [models.CheckConstraint(condition=models.Q(models.Q(('dan_u_tjednu__isnull', False), ('dan_u_tjednu__lte', 6), ('datum__isnull', True)), models.Q(('dan_u_tjednu__isnull', True), ('datum__isnull', False)), _connector='OR'), name='radno_vrijeme_dan_ili_datum'), models.CheckConstraint(condition=models.Q(('vrijeme_od__lt', models.F('vrijeme_do')), models.Q(('datum__isnull', False), ('vrijeme_do__isnull', True), ('vrijeme_od__isnull', True)), _connector='OR'), name='radno_vrijeme_pocetak_prije_kraja')],
+            },
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import User
 
+from .pretraga import tekst_za_pretragu
+
 
 class Salon(models.Model):
     vlasnik = models.ForeignKey(User, on_delete=models.CASCADE, related_name='moji_saloni', null=True, blank=True)
@@ -11,10 +13,25 @@ class Salon(models.Model):
     radno_od = models.TimeField(default='08:00')
     radno_do = models.TimeField(default='16:00')
     trajanje_termina_min = models.PositiveSmallIntegerField(default=30)
+    # Naziv, adresa i opis bez dijakritika za pretragu (vidi pretraga.py), puni se kod spremanja
+    pretraga = models.TextField(blank=True, default='', editable=False)
+    # Geografska sirina i duzina (WGS84) za pretragu po udaljenosti (vidi lokacije.py)
+    geo_sirina = models.FloatField(null=True, blank=True)
+    geo_duzina = models.FloatField(null=True, blank=True)
 
     def __str__(self):
         return self.naziv
 
+    def osvjezi_pretragu(self):
+        self.pretraga = tekst_za_pretragu(self.naziv, self.adresa, self.opis)
+
+    def save(self, *args, **kwargs):
+        self.osvjezi_pretragu()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'naziv', 'adresa', 'opis'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'pretraga'}
+        super().save(*args, **kwargs)
+
 # frizer = zaposlenik
 class Frizer(models.Model):
     salon = models.ForeignKey(Salon, on_delete=models.CASCADE, related_name='frizeri')
@@ -25,6 +42,57 @@ class Frizer(models.Model):
         return self.ime_prezime
 
 
+# Tjedno radno vrijeme i iznimke (praznici, godisnji, bolovanja) salona ili pojedinog frizera, vidi raspored.py.
+# Red s danom u tjednu dio je tjednog rasporeda, a red s datumom iznimka koja za taj dan zamjenjuje tjedni raspored;
+# iznimka bez vremena znaci da salon ili frizer taj dan ne radi. Vise redova za isti dan opisuje stanke.
+# Red bez frizera vrijedi za salon, a frizer bez vlastitih redova radi kao salon.
+class RadnoVrijeme(models.Model):
+    DANI = [
+        (0, 'Ponedjeljak'),
+        (1, 'Utorak'),
+        (2, 'Srijeda'),
+        (3, 'Četvrtak'),
+        (4, 'Petak'),
+        (5, 'Subota'),
+        (6, 'Nedjelja'),
+    ]
+
+    salon = models.ForeignKey(Salon, on_delete=models.CASCADE, related_name='radno_vrijeme')
+    frizer = models.ForeignKey(Frizer, on_delete=models.CASCADE, related_name='radno_vrijeme', null=True, blank=True)
+    dan_u_tjednu = models.PositiveSmallIntegerField(choices=DANI, null=True, blank=True)
+    datum = models.DateField(null=True, blank=True)
+    vrijeme_od = models.TimeField(null=True, blank=True)
+    vrijeme_do = models.TimeField(null=True, blank=True)
+    napomena = models.CharField(max_length=120, blank=True)
+
+    class Meta:
+        ordering = ['datum', 'dan_u_tjednu', 'vrijeme_od']
+        constraints = [
+            models.CheckConstraint(
+                check=(
+                    models.Q(dan_u_tjednu__isnull=False, dan_u_tjednu__lte=6, datum__isnull=True)
+                    | models.Q(dan_u_tjednu__isnull=True, datum__isnull=False)
+                ),
+                name='radno_vrijeme_dan_ili_datum',
+            ),
+            models.CheckConstraint(
+                check=(
+                    models.Q(vrijeme_od__lt=models.F('vrijeme_do'))
+                    | models.Q(vrijeme_od__isnull=True, vrijeme_do__isnull=True, datum__isnull=False)
+                ),
+                name='radno_vrijeme_pocetak_prije_kraja',
+            ),
+        ]
+        indexes = [
+            # Raspored salona cita se zajedno s aktivnim frizerima, uz iznimke samo za trazene datume
+            models.Index(fields=['salon', 'datum'], name='radno_vrijeme_salon_datum_idx'),
+        ]
+
+    def __str__(self):
+        dan = self.datum or self.get_dan_u_tjednu_display()
+        return f'{self.salon.naziv} | {dan} {self.vrijeme_od or "ne radi"}'
+
+
 class Termin(models.Model):
     salon = models.ForeignKey(Salon, on_delete=models.CASCADE, related_name='termini')
     frizer = models.ForeignKey(Frizer, on_delete=models.CASCADE, related_name='termini')
@@ -45,6 +113,17 @@ class Termin(models.Model):
                 name='termin_pocetak_prije_kraja',
             ),
         ]
+        indexes = [
+            # Mreza slobodnih termina i odabir slobodnog frizera citaju samo zauzete termine salona za dan,
+            # pa djelomicni indeks nad zauzetim terminima pokriva oba upita bez citanja tablice
+            models.Index(
+                fields=['salon', 'datum', 'vrijeme_od', 'vrijeme_do', 'frizer'],
+                condition=models.Q(slobodan=False),
+                name='termin_zauzet_salon_datum_idx',
+            ),
+            # Popis termina salona po danu (filtriran po slobodan) sortiran po vremenu
+            models.Index(fields=['salon', 'datum', 'slobodan', 'vrijeme_od'], name='termin_salon_datum_idx'),
+        ]
 
     def __str__(self):
         return f'{self.salon.naziv} | {self.datum} {self.vrijeme_od}'
@@ -64,6 +143,38 @@ class Rezervacija(models.Model):
 
     class Meta:
         ordering = ['-kreirano']
+        indexes = [
+            # Provjera postojece potvrdene rezervacije korisnika i popis rezervacija korisnika
+            models.Index(fields=['korisnik', 'status'], name='rezervacija_korisnik_stat_idx'),
+            # Paginacija po kursoru na admin pregledu cita rezervacije redom od najnovije
+            models.Index(fields=['-kreirano', '-id'], name='rezervacija_kreirano_idx'),
+        ]
 
     def __str__(self):
         return f'{self.korisnik.username} | {self.termin}'
+
+
+# Dnevni zbroj rezervacija po frizeru i satu pocetka termina, koristi se za statistiku vlasnika
+# Puni se naredbom osvjezi_statistiku kako se statistika ne bi racunala iz svih rezervacija pri svakom zahtjevu
+class DnevnaStatistika(models.Model):
+    salon = models.ForeignKey(Salon, on_delete=models.CASCADE, related_name='dnevna_statistika')
+    frizer = models.ForeignKey(Frizer, on_delete=models.CASCADE, related_name='dnevna_statistika')
+    datum = models.DateField()
+    sat = models.PositiveSmallIntegerField()
+    potvrdene = models.PositiveIntegerField(default=0)
+    otkazane = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['datum', 'sat']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['frizer', 'datum', 'sat'],
+                name='jedinstvena_statistika_po_frizeru',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['salon', 'datum'], name='statistika_salon_datum_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.frizer.ime_prezime} | {self.datum} {self.sat}h'
@@ -0,0 +1,42 @@
+# Racunanje mreze slobodnih termina nad cijelim brojevima, bez baze i bez datetime objekata.
+# Termin je pocetak u minutama od ponoci, a radno vrijeme i zauzetost frizera su bitmape dana (maska),
+# pa je provjera frizera za termin jedna operacija nad cijelim brojevima. Vremena se u tekst pretvaraju
+# tek pri ispisu. Koriste ga dostupnost.py (mreza za API i cache), raspored.py i statistika.py.
+def minute(vrijeme):
+    return vrijeme.hour * 60 + vrijeme.minute
+
+
+def hhmm(minute):
+    return f'{minute // 60:02d}:{minute % 60:02d}'
+
+
+# Pocetci termina dana prema radnom vremenu i trajanju termina, isti za svaki dan
+def pocetci_termina(radno_od, radno_do, trajanje):
+    return range(radno_od, radno_do - trajanje + 1, trajanje)
+
+
+# Zauzetost frizera kroz dan kao bitmapa (Python int): bit i znaci da je frizer zauzet u JEDINICA_MIN minuta
+# koje pocinju u i * JEDINICA_MIN od ponoci. Dan ima 288 bitova, a termini razlicitih trajanja
+# (npr. nakon promjene trajanja termina salona) provjeravaju se istom operacijom: bitmapa & maska.
+JEDINICA_MIN = 5
+
+
+# Bitovi intervala [pocetak, kraj) u minutama; djelomicno pokrivena jedinica racuna se kao zauzeta
+def maska(pocetak, kraj):
+    od = pocetak // JEDINICA_MIN
+    do = -(-kraj // JEDINICA_MIN)
+    if do <= od:
+        return 0
+    return ((1 << (do - od)) - 1) << od
+
+
+# Broj slobodnih frizera za svaki pocetak: frizera koji rade cijeli termin i nemaju zauzece koje se s njim
+# preklapa. Frizeri su parovi (radno vrijeme, zauzetost) kao bitmape (vidi raspored.RadnoVrijemeSalona),
+# pa se zauzeca bilo kojeg trajanja (npr. nakon promjene trajanja termina salona) provjeravaju jednako kao
+# pri rezervaciji, a zauzeca frizera koji taj dan ne rade ne oduzimaju mjesto drugima.
+def mjesta_po_terminu(frizeri, pocetci, trajanje):
+    rezultat = []
+    for pocetak in pocetci:
+        termin = maska(pocetak, pocetak + trajanje)
+        rezultat.append(sum(1 for rad, zauzeto in frizeri if rad & termin == termin and not zauzeto & termin))
+    return rezultat
@@ -0,0 +1,148 @@
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from datetime import date
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .dostupnost import dohvati_slobodan_termin
+from .models import Salon
+
+
+# Obavijesti o promjeni slobodnih mjesta (SSE, vidi views.dogadaji_termina).
+# Klijent se pretplacuje na kanal (salon, datum), a nakon svake rezervacije, otkazivanja ili izmjene termina
+# na kanal se salje novo stanje samo promijenjenog termina, u istom obliku kao zapis mreze slobodnih termina.
+# Broker se bira postavkom OBAVIJESTI_BROKER:
+#   LokalniBroker - pretplate u memoriji procesa, dovoljno za jedan ASGI proces
+#   RedisBroker   - Redis pub/sub za vise procesa ili posluzitelja (potreban paket redis i OBAVIJESTI_REDIS_URL)
+def kanal_dana(salon_id, datum):
+    if not isinstance(datum, str):
+        datum = datum.isoformat()
+    return f'termini:{salon_id}:{datum}'
+
+
+class Pretplata:
+    def __init__(self, broker, kanali):
+        self.broker = broker
+        self.kanali = kanali
+        self.petlja = asyncio.get_running_loop()
+        self.red = asyncio.Queue()
+
+    def predaj(self, poruka):
+        self.petlja.call_soon_threadsafe(self.red.put_nowait, poruka)
+
+    # Sljedeca poruka ili None ako u zadanom vremenu nije stigla nijedna
+    async def primi(self, cekanje):
+        try:
+            return await asyncio.wait_for(self.red.get(), cekanje)
+        except asyncio.TimeoutError:
+            return None
+
+    async def zatvori(self):
+        self.broker.odjavi(self)
+
+
+# Objava dolazi iz sinkronog koda (view u niti), a pretplatnici cekaju u petlji ASGI posluzitelja,
+# pa se poruka predaje kroz call_soon_threadsafe
+class LokalniBroker:
+    def __init__(self):
+        self._pretplate = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def ima_pretplatnika(self, kanal):
+        return bool(self._pretplate.get(kanal))
+
+    def objavi(self, kanal, poruka):
+        with self._lock:
+            pretplate = list(self._pretplate.get(kanal, ()))
+        for pretplata in pretplate:
+            pretplata.predaj(poruka)
+
+    async def pretplati(self, kanali):
+        pretplata = Pretplata(self, kanali)
+        with self._lock:
+            for kanal in kanali:
+                self._pretplate[kanal].add(pretplata)
+        return pretplata
+
+    def odjavi(self, pretplata):
+        with self._lock:
+            for kanal in pretplata.kanali:
+                self._pretplate[kanal].discard(pretplata)
+                if not self._pretplate[kanal]:
+                    del self._pretplate[kanal]
+
+
+class RedisPretplata:
+    def __init__(self, pubsub, veza):
+        self.pubsub = pubsub
+        self.veza = veza
+
+    async def primi(self, cekanje):
+        poruka = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=cekanje)
+        if poruka is None:
+            return None
+        return json.loads(poruka['data'])
+
+    async def zatvori(self):
+        await self.pubsub.aclose()
+        await self.veza.aclose()
+
+
+# Drugi procesi ne znaju ima li pretplatnika, pa se stanje termina racuna i objavljuje kod svake promjene
+class RedisBroker:
+    def __init__(self):
+        import redis
+
+        self.url = settings.OBAVIJESTI_REDIS_URL
+        self.veza = redis.Redis.from_url(self.url)
+
+    def ima_pretplatnika(self, kanal):
+        return True
+
+    def objavi(self, kanal, poruka):
+        self.veza.publish(kanal, json.dumps(poruka))
+
+    async def pretplati(self, kanali):
+        import redis.asyncio
+
+        veza = redis.asyncio.Redis.from_url(self.url)
+        pubsub = veza.pubsub()
+        await pubsub.subscribe(*kanali)
+        return RedisPretplata(pubsub, veza)
+
+
+_broker = None
+
+
+def broker():
+    global _broker
+    if _broker is None:
+        _broker = import_string(getattr(settings, 'OBAVIJESTI_BROKER', 'rezervacije.obavijesti.LokalniBroker'))()
+    return _broker
+
+
+# Nakon commita salje novo stanje termina koji pocinje u vrijeme_od, ako kanal ima pretplatnika.
+# Mreza dana se pritom ponovno izracunava i sprema u cache, pa sljedeci dohvat mreze ne radi dodatne upite.
+# Termini izvan mreze salona (npr. nakon promjene trajanja) ne salju obavijest.
+# Promjena je tada vec spremljena, pa se greska brokera (npr. nedostupan Redis) samo zapisuje u log,
+# umjesto da zahtjev koji je promjenu napravio vrati 500.
+def javi_promjenu(salon_id, datum, vrijeme_od):
+    if isinstance(datum, str):
+        datum = date.fromisoformat(datum)
+    kanal = kanal_dana(salon_id, datum)
+
+    def objavi():
+        if not broker().ima_pretplatnika(kanal):
+            return
+        salon = Salon.objects.filter(pk=salon_id).first()
+        if salon is None:
+            return
+        termin = dohvati_slobodan_termin(salon, datum, vrijeme_od)
+        if termin is not None:
+            broker().objavi(kanal, termin)
+
+    transaction.on_commit(objavi, robust=True)
@@ -0,0 +1,23 @@
+from rest_framework.pagination import CursorPagination
+
+
+# Paginacija po kursoru (stabilna i za velike tablice jer ne koristi OFFSET)
+# Ukljucuje se tek kad klijent posalje cursor ili page_size, pa stari klijenti i dalje dobivaju cijelu listu.
+# Zadana je za sve viewsetove; poredak kursora view odreduje atributom kursor_poredak (zadano: rezervacije).
+class KursorPaginacija(CursorPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('-kreirano', '-id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_ordering(self, request, queryset, view):
+        poredak = getattr(view, 'kursor_poredak', None)
+        if poredak:
+            return tuple(poredak)
+        return super().get_ordering(request, queryset, view)
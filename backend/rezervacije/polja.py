@@ -0,0 +1,70 @@
+from django.core.exceptions import FieldDoesNotExist
+
+
+# Odabir polja u odgovoru (?fields=id,naziv) za GET zahtjeve: serijalizator ispisuje samo odabrana polja
+# (id se uvijek zadrzava), a queryset ucitava samo stupce i relacije koje ta polja koriste.
+# Nepoznata polja se zanemaruju.
+def odabrana_polja(request):
+    if request is None or request.method != 'GET':
+        return None
+    vrijednost = request.query_params.get('fields')
+    if not vrijednost:
+        return None
+    return {polje.strip() for polje in vrijednost.split(',') if polje.strip()} | {'id'}
+
+
+# Za odgovore koji nisu modeli (npr. mreza slobodnih termina iz cachea)
+def suzi_zapis(zapis, polja):
+    return {kljuc: vrijednost for kljuc, vrijednost in zapis.items() if kljuc in polja}
+
+
+class OdabranaPoljaSerializerMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        polja = odabrana_polja(self.context.get('request'))
+        if polja:
+            for naziv in set(self.fields) - polja:
+                self.fields.pop(naziv)
+
+
+# Pretvara izvor polja serijalizatora (npr. 'termin.salon.naziv') u putanju za .only() i relacije za select_related.
+# Vraca None ako izvor nije stupac modela (svojstvo, metoda, obrnuta relacija), pa se queryset ne smije suziti.
+def _putanja_izvora(model, izvor):
+    dijelovi = izvor.split('.')
+    relacije = []
+    for redni_broj, dio in enumerate(dijelovi):
+        try:
+            polje = model._meta.get_field(dio)
+        except FieldDoesNotExist:
+            return None
+        if polje.is_relation and not (polje.many_to_one or polje.one_to_one) or not polje.concrete:
+            return None
+        if polje.is_relation and redni_broj < len(dijelovi) - 1:
+            relacije.append(dio)
+            model = polje.related_model
+    relacija = '__'.join(relacije) or None
+    return '__'.join(dijelovi), relacija
+
+
+# Suzava se u filter_queryset, koji list i retrieve pozivaju nad rezultatom get_queryset,
+# pa radi i kad viewset sam gradi queryset
+class OdabranaPoljaMixin:
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if not odabrana_polja(self.request):
+            return queryset
+
+        stupci = {queryset.model._meta.pk.name} | {naziv.lstrip('-') for naziv in getattr(self, 'kursor_poredak', ())}
+        relacije = set()
+        for polje in self.get_serializer().fields.values():
+            if polje.write_only:
+                continue
+            putanja = _putanja_izvora(queryset.model, polje.source)
+            if putanja is None:
+                return queryset
+            stupac, relacija = putanja
+            stupci.add(stupac)
+            if relacija:
+                relacije.add(relacija)
+
+        return queryset.select_related(None).select_related(*relacije).only(*stupci)
@@ -0,0 +1,87 @@
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+
+
+# Pretraga salona po nazivu, adresi i opisu.
+# Salon u stupcu `pretraga` cuva naziv, adresu i opis malim slovima i bez dijakritika (š -> s, đ -> d),
+# pa upit "sisanje" pronalazi "Šišanje", a upit "dakovo" pronalazi "Đakovo".
+# Indeks nad stupcem ovisi o bazi (migracija 0009):
+#   SQLite     - FTS5 tablica rezervacije_salon_fts, rangiranje po bm25
+#   PostgreSQL - trigram (pg_trgm) GIN indeks, rangiranje po slicnosti rijeci
+# Na ostalim bazama (ili ako FTS5 nije dostupan) pretraga je LIKE po stupcu bez rangiranja.
+FTS_TABLICA = 'rezervacije_salon_fts'
+
+_fts_dostupan = None
+
+
+def ukloni_dijakritike(tekst):
+    return ''.join(
+        znak for znak in unicodedata.normalize('NFD', tekst) if unicodedata.category(znak) != 'Mn'
+    ).replace('đ', 'd').replace('Đ', 'D')
+
+
+def presavij(tekst):
+    return ukloni_dijakritike(tekst or '').lower()
+
+
+def tekst_za_pretragu(naziv, adresa, opis):
+    return presavij(' '.join(dio for dio in (naziv, adresa, opis) if dio))
+
+
+def rijeci_upita(upit):
+    return re.findall(r'\w+', presavij(upit))
+
+
+def _fts():
+    global _fts_dostupan
+    if _fts_dostupan is None:
+        _fts_dostupan = connection.vendor == 'sqlite' and FTS_TABLICA in connection.introspection.table_names()
+    return _fts_dostupan
+
+
+# Sve rijeci upita moraju se pojaviti; zadnja (ili svaka) moze biti nedovrsena jer se pretrazuje dok korisnik tipka
+def pretrazi_salone(queryset, upit):
+    rijeci = rijeci_upita(upit)
+    if not rijeci:
+        return queryset
+
+    # Salon ciji naziv pocinje upitom ide prije ostalih pogodaka
+    naziv_pocinje = Case(
+        When(pretraga__startswith=' '.join(rijeci), then=Value(1)),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        uvjet = Q()
+        for rijec in rijeci:
+            uvjet &= Q(pretraga__contains=rijec)
+        return (
+            queryset.filter(uvjet)
+            .annotate(naziv_pocinje=naziv_pocinje, rang=TrigramWordSimilarity(' '.join(rijeci), 'pretraga'))
+            .order_by('-naziv_pocinje', '-rang', 'naziv')
+        )
+
+    if _fts():
+        # Rijeci su samo slova i brojke (\w), pa se u FTS upitu mogu sigurno navesti kao prefiksi
+        fts_upit = ' '.join(f'"{rijec}"*' for rijec in rijeci)
+        return (
+            queryset.extra(
+                tables=[FTS_TABLICA],
+                where=[f'{FTS_TABLICA} MATCH %s', f'{FTS_TABLICA}.rowid = rezervacije_salon.id'],
+                params=[fts_upit],
+                select={'rang': f'bm25({FTS_TABLICA})'},
+            )
+            .annotate(naziv_pocinje=naziv_pocinje)
+            .order_by('-naziv_pocinje', 'rang', 'naziv')
+        )
+
+    uvjet = Q()
+    for rijec in rijeci:
+        uvjet &= Q(pretraga__contains=rijec)
+    return queryset.filter(uvjet).annotate(naziv_pocinje=naziv_pocinje).order_by('-naziv_pocinje', 'naziv')
@@ -0,0 +1,138 @@
+from datetime import time, timedelta
+from itertools import islice
+
+from django.db.models import F, FilteredRelation, Q
+
+from . import mreza
+from .models import Frizer, Termin
+
+
+# Radno vrijeme salona i aktivnih frizera po danima, iz tjednog rasporeda i iznimaka (model RadnoVrijeme),
+# kao bitmape istog oblika kao zauzetost frizera (mreza.maska). Dostupnost se racuna iz ovoga i zauzetih
+# termina, pa se termini spremaju tek pri rezervaciji, a ne unaprijed za svaki dan (vidi dostupnost.py).
+# Pravila za dan:
+#   salon:  iznimka salona za taj datum, inace tjedni raspored salona, a salon bez tjednog rasporeda
+#           radi svaki dan od radno_od do radno_do
+#   frizer: iznimka frizera za taj datum, inace njegov tjedni raspored, a bez njega radi kao salon
+# Radno vrijeme frizera uvijek je unutar radnog vremena salona tog dana, a oba unutar radno_od - radno_do.
+class RadnoVrijemeSalona:
+    # redovi: (frizer_id, dan_u_tjednu, datum, vrijeme_od, vrijeme_do), frizer_id None za salon
+    def __init__(self, salon, frizeri, redovi):
+        self.okvir = mreza.maska(mreza.minute(salon.radno_od), mreza.minute(salon.radno_do))
+        self.frizeri = sorted(frizeri)
+        self.tjedno = {}
+        self.iznimke = {}
+        for frizer_id, dan_u_tjednu, datum, vrijeme_od, vrijeme_do in redovi:
+            rad = 0
+            if vrijeme_od is not None:
+                rad = mreza.maska(mreza.minute(vrijeme_od), mreza.minute(vrijeme_do))
+            if datum is None:
+                dani = self.tjedno.setdefault(frizer_id, [0] * 7)
+                dani[dan_u_tjednu] |= rad
+            else:
+                self.iznimke[(frizer_id, datum)] = self.iznimke.get((frizer_id, datum), 0) | rad
+
+    def _rad(self, frizer_id, datum, zadano):
+        if (frizer_id, datum) in self.iznimke:
+            return self.iznimke[(frizer_id, datum)]
+        if frizer_id in self.tjedno:
+            return self.tjedno[frizer_id][datum.weekday()]
+        return zadano
+
+    # {frizer_id: bitmapa radnog vremena} za dan; frizer koji taj dan ne radi ima bitmapu 0
+    def maske(self, datum):
+        salon = self._rad(None, datum, self.okvir) & self.okvir
+        return {frizer_id: self._rad(frizer_id, datum, salon) & salon for frizer_id in self.frizeri}
+
+
+
+# Jedan upit: aktivni frizeri salona, svaki uz redove rasporeda salona i svoje redove (tjedne i iznimke
+# unutar raspona). Redovi salona ponavljaju se uz svakog frizera, pa se skupljaju u skup.
+# Vraca {salon_id: RadnoVrijemeSalona}; salon bez aktivnih frizera nije u rezultatu.
+def radna_vremena_salona(saloni, datum_od, datum_do):
+    redovi = (
+        Frizer.objects.filter(salon_id__in=[salon.id for salon in saloni], aktivan=True)
+        .annotate(raspored=FilteredRelation(
+            'salon__radno_vrijeme',
+            condition=(
+                (Q(salon__radno_vrijeme__frizer__isnull=True) | Q(salon__radno_vrijeme__frizer=F('id')))
+                & (Q(salon__radno_vrijeme__datum__isnull=True) | Q(salon__radno_vrijeme__datum__range=(datum_od, datum_do)))
+            ),
+        ))
+        .values_list(
+            'salon_id',
+            'id',
+            'raspored__id',
+            'raspored__frizer_id',
+            'raspored__dan_u_tjednu',
+            'raspored__datum',
+            'raspored__vrijeme_od',
+            'raspored__vrijeme_do',
+        )
+    )
+    frizeri = {}
+    rasporedi = {}
+    for salon_id, frizer_id, red_id, *red in redovi:
+        frizeri.setdefault(salon_id, set()).add(frizer_id)
+        if red_id is not None:
+            rasporedi.setdefault(salon_id, {})[red_id] = red
+    return {
+        salon.id: RadnoVrijemeSalona(salon, frizeri[salon.id], rasporedi.get(salon.id, {}).values())
+        for salon in saloni
+        if salon.id in frizeri
+    }
+
+
+# Velicina bloka za bulk_create pri otvaranju rasporeda
+VELICINA_BLOKA = 1000
+
+
+# Vraca listu (vrijeme_od, vrijeme_do) za sve termine jednog dana prema radnom vremenu i trajanju termina salona
+def termini_dana(salon):
+    trajanje = salon.trajanje_termina_min
+    pocetci = mreza.pocetci_termina(mreza.minute(salon.radno_od), mreza.minute(salon.radno_do), trajanje)
+    return [
+        (time(*divmod(pocetak, 60)), time(*divmod(pocetak + trajanje, 60)))
+        for pocetak in pocetci
+    ]
+
+
+# Generira (nespremljene) slobodne termine za svakog frizera i svaki dan u rasponu [datum_od, datum_do]
+def generiraj_termine(salon, frizeri, datum_od, datum_do):
+    termini = termini_dana(salon)
+    datum = datum_od
+    while datum <= datum_do:
+        for frizer in frizeri:
+            for vrijeme_od, vrijeme_do in termini:
+                yield Termin(
+                    salon_id=salon.id,
+                    frizer_id=frizer.id,
+                    datum=datum,
+                    vrijeme_od=vrijeme_od,
+                    vrijeme_do=vrijeme_do,
+                    slobodan=True,
+                )
+        datum += timedelta(days=1)
+
+
+# Otvara raspored salona: sprema sve termine u rasponu u blokovima, a vec postojeci termini
+# (jedinstveni po frizeru, datumu i vremenu) se preskacu. Vraca broj novih termina.
+# Novi termini su slobodni, pa se spremljena mreza slobodnih termina ne mijenja.
+# Za rezervaciju termine nije potrebno otvarati (dostupnost se racuna iz rasporeda), pa ovo sluzi samo za
+# termine koje vlasnik zeli imati kao zasebne redove, npr. za uvoz iz drugog sustava.
+def otvori_raspored(salon, frizeri, datum_od, datum_do, velicina_bloka=VELICINA_BLOKA):
+    postojeci = Termin.objects.filter(
+        salon_id=salon.id,
+        frizer__in=frizeri,
+        datum__range=(datum_od, datum_do),
+    )
+    broj_prije = postojeci.count()
+
+    termini = generiraj_termine(salon, frizeri, datum_od, datum_do)
+    while True:
+        blok = list(islice(termini, velicina_bloka))
+        if not blok:
+            break
+        Termin.objects.bulk_create(blok, ignore_conflicts=True)
+
+    return postojeci.count() - broj_prije
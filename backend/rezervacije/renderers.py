@@ -0,0 +1,24 @@
+from rest_framework.renderers import BaseRenderer
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+# MessagePack odgovor (Accept: application/msgpack ili ?format=msgpack) za mobilne klijente.
+# Paket msgpack nije obavezan: bez njega se renderer ne nudi i API vraca samo JSON.
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # Datumi, vremena i decimalni brojevi iz serijalizatora zapisuju se kao tekst, kao u JSON-u
+        return msgpack.packb(data, default=str, use_bin_type=True)
+
+
+MSGPACK_RENDERERI = [MessagePackRenderer] if msgpack else []
@@ -1,9 +1,22 @@
+import re
+
 from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Length, Lower
 from django.utils.text import slugify
 from django.utils import timezone
 from rest_framework import serializers
 
-from .models import Salon, Frizer, Termin, Rezervacija
+from .models import Salon, Frizer, RadnoVrijeme, Termin, Rezervacija
+from .mreza import JEDINICA_MIN
+from .polja import OdabranaPoljaSerializerMixin
+
+
+# Username moze imati najvise 150 znakova, pa se za broj ostavlja mjesta
+MAKS_DULJINA_BAZE = 140
+
+# Broj pokusaja ako istovremena registracija istog imena zauzme generirani username
+POKUSAJI_REGISTRACIJE = 5
 
 
 # Pretvara ime korisnika u sigurni format prikladan za username (bez dijakritika i posebnih znakova)
@@ -14,16 +27,21 @@ def normaliziraj_ime_u_username(ime):
     return baza
 
 
-# Generira jedinstveni username dodavanjem broja ako vec postoji korisnik s istim imenom
+# Generira jedinstveni username dodavanjem broja ako vec postoji korisnik s istim imenom.
+# Najveci postojeci broj za isto ime trazi se jednim upitom: medu imenima oblika baza, baza1, baza2...
+# najveci broj ima najdulje ime, a medu jednako dugima ono koje je zadnje po abecedi.
 def generiraj_korisnicko_ime(ime):
-    baza = normaliziraj_ime_u_username(ime)
+    baza = normaliziraj_ime_u_username(ime)[:MAKS_DULJINA_BAZE]
 
-    kandidat = baza
-    broj = 1
-    while User.objects.filter(username=kandidat).exists():
-        kandidat = f'{baza}{broj}'
-        broj += 1
-    return kandidat
+    zadnje = (
+        User.objects.filter(username__startswith=baza, username__regex=rf'^{re.escape(baza)}([1-9][0-9]*)?$')
+        .order_by(Length('username').desc(), '-username')
+        .values_list('username', flat=True)
+        .first()
+    )
+    if zadnje is None:
+        return baza
+    return f'{baza}{int(zadnje[len(baza):] or 0) + 1}'
 
 
 # Serijalizator za registraciju novog korisnika
@@ -40,28 +58,37 @@ class UserRegisterSerializer(serializers.ModelSerializer):
     # Provjera da isti email nije vec registriran u sustavu
     def validate_email(self, value):
         email = value.strip().lower()
-        if User.objects.filter(email__iexact=email).exists():
+        if User.objects.alias(email_lower=Lower('email')).filter(email_lower=email).exists():
             raise serializers.ValidationError('Korisnik s ovim emailom već postoji.')
         return email
 
-    # Kreiranje korisnika uz automatski generirani username na temelju unesenog imena
+    # Kreiranje korisnika uz automatski generirani username na temelju unesenog imena.
+    # Ako isti username u meduvremenu zauzme istovremena registracija, jedinstveno ogranicenje baci IntegrityError
+    # i username se generira ponovno.
     def create(self, validated_data):
         ime = validated_data.pop('ime')
         is_staff = validated_data.pop('is_vlasnik', False)
-        korisnicko_ime = generiraj_korisnicko_ime(ime)
-        return User.objects.create_user(
-            username=korisnicko_ime,
-            first_name=ime,
-            email=validated_data.get('email', ''),
-            password=validated_data['password'],
-            is_staff=is_staff,
-        )
+        for pokusaj in range(POKUSAJI_REGISTRACIJE):
+            try:
+                with transaction.atomic():
+                    return User.objects.create_user(
+                        username=generiraj_korisnicko_ime(ime),
+                        first_name=ime,
+                        email=validated_data.get('email', ''),
+                        password=validated_data['password'],
+                        is_staff=is_staff,
+                    )
+            except IntegrityError:
+                if pokusaj == POKUSAJI_REGISTRACIJE - 1:
+                    raise
 
 
 # Serijalizator za model Salon
 # Uz standardne podatke o salonu, izlozuje i ime vlasnika kao citljivo polje
-class SalonSerializer(serializers.ModelSerializer):
+class SalonSerializer(OdabranaPoljaSerializerMixin, serializers.ModelSerializer):
     vlasnik_ime = serializers.CharField(source='vlasnik.first_name', read_only=True)
+    # Samo u pretrazi po udaljenosti (?lokacija=), inace se polje izostavlja
+    udaljenost_km = serializers.FloatField(read_only=True)
 
     class Meta:
         model = Salon
@@ -76,6 +103,9 @@ class SalonSerializer(serializers.ModelSerializer):
             'radno_od',
             'radno_do',
             'trajanje_termina_min',
+            'geo_sirina',
+            'geo_duzina',
+            'udaljenost_km',
         ]
         read_only_fields = ['vlasnik', 'vlasnik_ime']
 
@@ -89,19 +119,34 @@ class SalonSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError('Radno vrijeme nije ispravno.')
         if trajanje and (trajanje < 5 or trajanje > 180):
             raise serializers.ValidationError('Trajanje termina mora biti između 5 i 180 minuta.')
+
+        geo_sirina = attrs.get('geo_sirina', getattr(self.instance, 'geo_sirina', None))
+        geo_duzina = attrs.get('geo_duzina', getattr(self.instance, 'geo_duzina', None))
+        if (geo_sirina is None) != (geo_duzina is None):
+            raise serializers.ValidationError('Lokacija mora imati i geografsku širinu i dužinu.')
+        if geo_sirina is not None and not (-90 <= geo_sirina <= 90 and -180 <= geo_duzina <= 180):
+            raise serializers.ValidationError('Lokacija nije ispravna.')
         return attrs
 
 
 # Serijalizator za model Frizer, izlaze sve stupce iz tablice
-class FrizerSerializer(serializers.ModelSerializer):
+class FrizerSerializer(OdabranaPoljaSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Frizer
         fields = '__all__'
 
 
+# Salon zajedno sa svojim frizerima, za pregled vlasnika bez zasebnog zahtjeva po salonu
+class SalonSFrizerimaSerializer(SalonSerializer):
+    frizeri = FrizerSerializer(many=True, read_only=True)
+
+    class Meta(SalonSerializer.Meta):
+        fields = SalonSerializer.Meta.fields + ['frizeri']
+
+
 # Serijalizator za model Termin
 # Uz ID-ove salona i frizera, dodaje i njihova citljiva imena radi lakseg prikaza na frontendu
-class TerminSerializer(serializers.ModelSerializer):
+class TerminSerializer(OdabranaPoljaSerializerMixin, serializers.ModelSerializer):
     salon_naziv = serializers.CharField(source='salon.naziv', read_only=True)
     frizer_ime = serializers.CharField(source='frizer.ime_prezime', read_only=True)
 
@@ -128,9 +173,51 @@ class TerminSerializer(serializers.ModelSerializer):
         return attrs
 
 
+# Serijalizator za tjedni raspored i iznimke salona ili frizera (model RadnoVrijeme)
+# Red ima ili dan u tjednu ili datum; iznimka bez vremena znaci da salon ili frizer taj dan ne radi
+class RadnoVrijemeSerializer(serializers.ModelSerializer):
+    frizer_ime = serializers.CharField(source='frizer.ime_prezime', read_only=True, default=None)
+
+    class Meta:
+        model = RadnoVrijeme
+        fields = [
+            'id',
+            'salon',
+            'frizer',
+            'frizer_ime',
+            'dan_u_tjednu',
+            'datum',
+            'vrijeme_od',
+            'vrijeme_do',
+            'napomena',
+        ]
+
+    def validate(self, attrs):
+        salon = attrs.get('salon', getattr(self.instance, 'salon', None))
+        frizer = attrs.get('frizer', getattr(self.instance, 'frizer', None))
+        dan_u_tjednu = attrs.get('dan_u_tjednu', getattr(self.instance, 'dan_u_tjednu', None))
+        datum = attrs.get('datum', getattr(self.instance, 'datum', None))
+        vrijeme_od = attrs.get('vrijeme_od', getattr(self.instance, 'vrijeme_od', None))
+        vrijeme_do = attrs.get('vrijeme_do', getattr(self.instance, 'vrijeme_do', None))
+
+        if frizer and frizer.salon_id != salon.id:
+            raise serializers.ValidationError('Odabrani frizer ne pripada ovom salonu.')
+        if (dan_u_tjednu is None) == (datum is None):
+            raise serializers.ValidationError('Zadajte ili dan u tjednu ili datum.')
+        if (vrijeme_od is None) != (vrijeme_do is None) or (vrijeme_od is None and datum is None):
+            raise serializers.ValidationError('Zadajte početak i kraj radnog vremena.')
+        if vrijeme_od is not None:
+            if vrijeme_od >= vrijeme_do:
+                raise serializers.ValidationError('Vrijeme početka mora biti prije kraja.')
+            # Raspored se racuna u jedinicama od JEDINICA_MIN minuta (vidi mreza.maska)
+            if any(vrijeme.minute % JEDINICA_MIN or vrijeme.second for vrijeme in (vrijeme_od, vrijeme_do)):
+                raise serializers.ValidationError(f'Radno vrijeme mora biti zadano u koracima od {JEDINICA_MIN} minuta.')
+        return attrs
+
+
 # Serijalizator za model Rezervacija
 # Kombinira podatke o korisniku, terminu i salonu u jedan odgovor pogodan za frontend
-class RezervacijaSerializer(serializers.ModelSerializer):
+class RezervacijaSerializer(OdabranaPoljaSerializerMixin, serializers.ModelSerializer):
     termin = serializers.PrimaryKeyRelatedField(
         queryset=Termin.objects.select_related('salon', 'frizer').all(),
         required=False,
@@ -182,3 +269,24 @@ class RezervacijaSerializer(serializers.ModelSerializer):
             if termin_dt < timezone.now():
                 raise serializers.ValidationError('Ne možete rezervirati termin u prošlosti.')
         return attrs
+
+
+# Serijalizator za otvaranje rasporeda salona (skupno kreiranje termina za raspon datuma)
+# Ako frizeri nisu navedeni, termini se otvaraju za sve aktivne frizere salona
+class OtvoriRasporedSerializer(serializers.Serializer):
+    MAKS_RASPON_DANA = 366
+
+    datum_od = serializers.DateField()
+    datum_do = serializers.DateField()
+    frizeri = serializers.PrimaryKeyRelatedField(queryset=Frizer.objects.all(), many=True, required=False)
+
+    def validate(self, attrs):
+        if attrs['datum_od'] > attrs['datum_do']:
+            raise serializers.ValidationError('Početni datum mora biti prije završnog.')
+        if (attrs['datum_do'] - attrs['datum_od']).days >= self.MAKS_RASPON_DANA:
+            raise serializers.ValidationError(f'Raspon datuma ne smije biti dulji od {self.MAKS_RASPON_DANA} dana.')
+
+        salon = self.context['salon']
+        if any(frizer.salon_id != salon.id for frizer in attrs.get('frizeri', [])):
+            raise serializers.ValidationError('Odabrani frizer ne pripada ovom salonu.')
+        return attrs
@@ -0,0 +1,64 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import opozovi_tokene_korisnika, ponisti_tokene
+from .dostupnost import ponisti_dan, ponisti_katalog, ponisti_salon
+from .models import Salon, Frizer, RadnoVrijeme, Termin
+from .obavijesti import javi_promjenu
+
+
+# Promjena termina mijenja zauzetost samo jednog dana salona (otkazivanje, brisanje rezervacije, izmjena termina),
+# a pretplatnici tog dana dobivaju novo stanje termina
+@receiver(post_save, sender=Termin)
+@receiver(post_delete, sender=Termin)
+def termin_promijenjen(sender, instance, **kwargs):
+    ponisti_dan(instance.salon_id, instance.datum)
+    javi_promjenu(instance.salon_id, instance.datum, instance.vrijeme_od)
+
+
+# Promjena salona (radno vrijeme, trajanje termina), frizera ili rasporeda utjece na sve dane salona
+@receiver(post_save, sender=Salon)
+@receiver(post_delete, sender=Salon)
+def salon_promijenjen(sender, instance, **kwargs):
+    ponisti_salon(instance.id)
+
+
+@receiver(post_save, sender=Frizer)
+@receiver(post_delete, sender=Frizer)
+@receiver(post_save, sender=RadnoVrijeme)
+@receiver(post_delete, sender=RadnoVrijeme)
+def frizer_promijenjen(sender, instance, **kwargs):
+    ponisti_salon(instance.salon_id)
+
+
+# Polja korisnika koja se prikazuju u katalogu salona (ime vlasnika)
+POLJA_KATALOGA = {'first_name'}
+
+
+# Promjena korisnika (lozinka, is_staff, is_active) mora se vidjeti u sljedecem zahtjevu,
+# pa se korisnikov token uklanja iz cachea autentikacije, a dosad izdani potpisani tokeni opozivaju.
+# Ime vlasnika prikazuje se uz salone, pa se tada mijenja i verzija kataloga.
+# Spremanje samo zadanih polja (update_fields) ponistava samo ono na sto ta polja utjecu, pa npr. prijava
+# kroz admin (last_login) ne odjavljuje korisnika i ne ponistava katalog.
+@receiver(post_save, sender=User)
+def korisnik_promijenjen(sender, instance, created, update_fields, **kwargs):
+    if created:
+        return
+    if update_fields is None or set(update_fields) - {'last_login'}:
+        ponisti_tokene(Token.objects.filter(user=instance).values_list('key', flat=True))
+        opozovi_tokene_korisnika(instance.pk)
+    if update_fields is None or POLJA_KATALOGA & set(update_fields):
+        ponisti_katalog()
+
+
+@receiver(post_delete, sender=User)
+def korisnik_obrisan(sender, instance, **kwargs):
+    opozovi_tokene_korisnika(instance.pk)
+
+
+# Odjava i brisanje korisnika brisu token
+@receiver(post_delete, sender=Token)
+def token_obrisan(sender, instance, **kwargs):
+    ponisti_tokene([instance.key])
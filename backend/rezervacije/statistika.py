@@ -0,0 +1,149 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import ExtractHour
+
+from . import mreza
+from .models import Salon, Frizer, Rezervacija, DnevnaStatistika
+from .raspored import radna_vremena_salona
+
+
+# Broj termina koje svaki aktivni frizer nudi u rasponu datuma prema rasporedu (raspored.py): termini mreze
+# salona koje frizer radi cijele, pa se ne broje neradni dani, praznici i skracena radna vremena.
+# Vraca {frizer_id: broj termina}; dani s istim radnim vremenom frizera racunaju se jednom.
+def ponudeni_termini(saloni, datum_od, datum_do):
+    radna_vremena = radna_vremena_salona(saloni, datum_od, datum_do)
+    rezultat = {}
+    for salon in saloni:
+        if salon.id not in radna_vremena:
+            continue
+        pocetci = mreza.pocetci_termina(
+            mreza.minute(salon.radno_od), mreza.minute(salon.radno_do), salon.trajanje_termina_min
+        )
+        termina_po_rasporedu = {}
+        datum = datum_od
+        while datum <= datum_do:
+            for frizer_id, rad in radna_vremena[salon.id].maske(datum).items():
+                if rad not in termina_po_rasporedu:
+                    termina_po_rasporedu[rad] = sum(
+                        mreza.mjesta_po_terminu([(rad, 0)], pocetci, salon.trajanje_termina_min)
+                    )
+                rezultat[frizer_id] = rezultat.get(frizer_id, 0) + termina_po_rasporedu[rad]
+            datum += timedelta(days=1)
+    return rezultat
+
+
+# Rezervacije grupirane po (salon, frizer, sat), a po potrebi i po danu, izravno iz tablice rezervacija
+def _grupirane_rezervacije(saloni_ids, datum_od, datum_do, po_danu=False):
+    grupiranje = {
+        'salon_id': F('termin__salon_id'),
+        'frizer_id': F('termin__frizer_id'),
+        'sat': ExtractHour('termin__vrijeme_od'),
+    }
+    if po_danu:
+        grupiranje['dan'] = F('termin__datum')
+    return (
+        Rezervacija.objects.filter(
+            termin__salon_id__in=saloni_ids,
+            termin__datum__range=(datum_od, datum_do),
+        )
+        .values(**grupiranje)
+        .annotate(
+            broj_potvrdenih=Count('id', filter=Q(status='potvrdena')),
+            broj_otkazanih=Count('id', filter=Q(status='otkazana')),
+        )
+        .order_by()
+    )
+
+
+# Preracunava dnevnu statistiku za raspon datuma (stari redovi u rasponu se zamjenjuju)
+def osvjezi_dnevnu_statistiku(datum_od, datum_do, saloni_ids=None):
+    saloni = Salon.objects.all()
+    if saloni_ids is not None:
+        saloni = saloni.filter(id__in=saloni_ids)
+    saloni_ids = list(saloni.values_list('id', flat=True))
+
+    with transaction.atomic():
+        DnevnaStatistika.objects.filter(salon_id__in=saloni_ids, datum__range=(datum_od, datum_do)).delete()
+        redovi = [
+            DnevnaStatistika(
+                salon_id=red['salon_id'],
+                frizer_id=red['frizer_id'],
+                datum=red['dan'],
+                sat=red['sat'],
+                potvrdene=red['broj_potvrdenih'],
+                otkazane=red['broj_otkazanih'],
+            )
+            for red in _grupirane_rezervacije(saloni_ids, datum_od, datum_do, po_danu=True).iterator()
+        ]
+        DnevnaStatistika.objects.bulk_create(redovi, batch_size=1000)
+    return len(redovi)
+
+
+# Statistika salona vlasnika za raspon datuma: broj potvrdenih i otkazanih rezervacija,
+# popunjenost (rezervirani termini / termini koje frizeri nude prema rasporedu) i najprometniji sati, po salonu i po frizeru.
+# Baza vraca vec grupirane redove po (salon, frizer, sat), pa se u Pythonu zbraja samo mali broj redova.
+def izracunaj_statistiku(vlasnik, datum_od, datum_do, iz_dnevne_statistike=False):
+    saloni = list(Salon.objects.filter(vlasnik=vlasnik).order_by('naziv'))
+    saloni_ids = [salon.id for salon in saloni]
+    frizeri = list(Frizer.objects.filter(salon_id__in=saloni_ids).order_by('ime_prezime'))
+    ponudeno = ponudeni_termini(saloni, datum_od, datum_do)
+
+    if iz_dnevne_statistike:
+        redovi = (
+            DnevnaStatistika.objects.filter(salon_id__in=saloni_ids, datum__range=(datum_od, datum_do))
+            .values('salon_id', 'frizer_id', 'sat')
+            .annotate(broj_potvrdenih=Sum('potvrdene'), broj_otkazanih=Sum('otkazane'))
+            .order_by()
+        )
+    else:
+        redovi = _grupirane_rezervacije(saloni_ids, datum_od, datum_do)
+
+    po_salonu = {salon.id: {'potvrdene': 0, 'otkazane': 0, 'po_satima': {}} for salon in saloni}
+    po_frizeru = {frizer.id: {'potvrdene': 0, 'otkazane': 0} for frizer in frizeri}
+    for red in redovi:
+        salon_zbroj = po_salonu[red['salon_id']]
+        salon_zbroj['potvrdene'] += red['broj_potvrdenih']
+        salon_zbroj['otkazane'] += red['broj_otkazanih']
+        salon_zbroj['po_satima'][red['sat']] = salon_zbroj['po_satima'].get(red['sat'], 0) + red['broj_potvrdenih']
+        frizer_zbroj = po_frizeru.setdefault(red['frizer_id'], {'potvrdene': 0, 'otkazane': 0})
+        frizer_zbroj['potvrdene'] += red['broj_potvrdenih']
+        frizer_zbroj['otkazane'] += red['broj_otkazanih']
+
+    rezultat = []
+    for salon in saloni:
+        frizeri_salona = [frizer for frizer in frizeri if frizer.salon_id == salon.id]
+        ukupno_mjesta = sum(ponudeno.get(frizer.id, 0) for frizer in frizeri_salona)
+        zbroj = po_salonu[salon.id]
+        vrsni_sati = sorted(
+            ({'sat': sat, 'potvrdene': broj} for sat, broj in zbroj['po_satima'].items() if broj),
+            key=lambda stavka: (-stavka['potvrdene'], stavka['sat']),
+        )[:3]
+
+        rezultat.append(
+            {
+                'salon': salon.id,
+                'naziv': salon.naziv,
+                'potvrdene': zbroj['potvrdene'],
+                'otkazane': zbroj['otkazane'],
+                'ukupno_mjesta': ukupno_mjesta,
+                'popunjenost': round(zbroj['potvrdene'] / ukupno_mjesta, 4) if ukupno_mjesta else 0,
+                'vrsni_sati': vrsni_sati,
+                'frizeri': [
+                    {
+                        'frizer': frizer.id,
+                        'ime_prezime': frizer.ime_prezime,
+                        'aktivan': frizer.aktivan,
+                        'potvrdene': po_frizeru[frizer.id]['potvrdene'],
+                        'otkazane': po_frizeru[frizer.id]['otkazane'],
+                        'popunjenost': (
+                            round(po_frizeru[frizer.id]['potvrdene'] / ponudeno[frizer.id], 4)
+                            if ponudeno.get(frizer.id) else 0
+                        ),
+                    }
+                    for frizer in frizeri_salona
+                ],
+            }
+        )
+    return rezultat
@@ -0,0 +1,194 @@
+import random
+from datetime import time, timedelta
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Salon, Frizer, Termin, Rezervacija
+from .pretraga import ukloni_dijakritike
+from .raspored import generiraj_termine
+
+
+LOZINKA = '12345678'
+
+DEMO_ADMINI = ['admin_marko', 'admin_ana']
+
+DEMO_SALONI = [
+    {'naziv': 'Frizerski salon IN', 'adresa': 'Ilica 10, Zagreb', 'opis': 'Moderno uređen salon za sve generacije.'},
+    {'naziv': 'Barber Shop Classic', 'adresa': 'Savska 50, Zagreb', 'opis': 'Tradicija i kvaliteta.'},
+    {'naziv': 'Hair Studio Beauty', 'adresa': 'Vukovarska 100, Zagreb', 'opis': 'Vaša ljepota na prvom mjestu.'},
+    {'naziv': 'Salon Elegance', 'adresa': 'Maksimirska 22, Zagreb', 'opis': 'Ekskluzivni salon za posebne prilike.'},
+]
+
+
+# Jednostavan izvor imena bez vanjskih ovisnosti (koristi se u testovima i benchmarku)
+# Naredba generate_test_data umjesto njega koristi Faker
+class JednostavnaImena:
+    IMENA = ['Ivan', 'Ana', 'Marko', 'Petra', 'Luka', 'Maja', 'Josip', 'Ivana', 'Tomislav', 'Lucija']
+    PREZIMENA = ['Horvat', 'Kovačević', 'Babić', 'Marić', 'Jurić', 'Novak', 'Kovačić', 'Knežević', 'Vuković', 'Perić']
+    ULICE = ['Ilica', 'Savska', 'Vukovarska', 'Maksimirska', 'Heinzelova', 'Radnička', 'Draškovićeva']
+
+    def __init__(self, rng):
+        self.rng = rng
+
+    def ime(self):
+        return self.rng.choice(self.IMENA)
+
+    def prezime(self):
+        return self.rng.choice(self.PREZIMENA)
+
+    def adresa(self):
+        return f'{self.rng.choice(self.ULICE)} {self.rng.randint(1, 200)}, Zagreb'
+
+
+def _u_blokovima(iterable, velicina_bloka):
+    iterator = iter(iterable)
+    while True:
+        blok = list(islice(iterator, velicina_bloka))
+        if not blok:
+            return
+        yield blok
+
+
+def obrisi_podatke():
+    Rezervacija.objects.all().delete()
+    Termin.objects.all().delete()
+    Frizer.objects.all().delete()
+    Salon.objects.all().delete()
+
+
+# Generira testne podatke zadane velicine koristeci bulk_create u blokovima,
+# tako da i milijuni termina i rezervacija stanu u memoriju i generiraju se u minutama.
+# Termini se generiraju po salonu prema radnom vremenu, a udio `popunjenost` njih se odmah rezervira.
+def generiraj_testne_podatke(
+    broj_salona=4,
+    frizera_po_salonu=2,
+    broj_dana=7,
+    broj_korisnika=5,
+    popunjenost=0.2,
+    udio_otkazanih=0.2,
+    seed=None,
+    imena=None,
+    datum_od=None,
+    velicina_bloka=5000,
+    ispis=None,
+):
+    rng = random.Random(seed)
+    imena = imena or JednostavnaImena(rng)
+    ispis = ispis or (lambda poruka: None)
+    datum_od = datum_od or timezone.localdate()
+    lozinka = make_password(LOZINKA)
+
+    ispis('Generiranje testnih korisnika...')
+    admini = []
+    for username in DEMO_ADMINI:
+        admin, _ = User.objects.get_or_create(username=username)
+        admin.email = f'{username}@gmail.com'
+        admin.password = lozinka
+        admin.is_staff = True
+        admin.is_superuser = True
+        admin.save()
+        admini.append(admin)
+
+    # Redni broj u korisnickom imenu osigurava jedinstvenost i kad se podaci generiraju vise puta
+    pocetak = (User.objects.order_by('-id').values_list('id', flat=True).first() or 0) + 1
+    korisnici = []
+    for redni_broj in range(pocetak, pocetak + broj_korisnika):
+        ime = imena.ime()
+        prezime = imena.prezime()
+        korisnicko_ime = ukloni_dijakritike(f'{ime}_{prezime}_{redni_broj}'.lower()).replace(' ', '')
+        korisnici.append(
+            User(
+                username=korisnicko_ime,
+                first_name=ime,
+                last_name=prezime,
+                email=f'{korisnicko_ime.replace("_", ".")}@gmail.com',
+                password=lozinka,
+            )
+        )
+    korisnici_ids = []
+    for blok in _u_blokovima(korisnici, velicina_bloka):
+        korisnici_ids.extend(korisnik.id for korisnik in User.objects.bulk_create(blok))
+
+    ispis('Generiranje salona i frizera...')
+    saloni = []
+    for redni_broj in range(broj_salona):
+        if redni_broj < len(DEMO_SALONI):
+            podaci = DEMO_SALONI[redni_broj]
+        else:
+            podaci = {
+                'naziv': f'Salon {imena.prezime()} {redni_broj + 1}',
+                'adresa': imena.adresa(),
+                'opis': 'Generirani salon za testiranje opterećenja.',
+            }
+        saloni.append(
+            Salon(
+                vlasnik=admini[redni_broj] if redni_broj < len(admini) else None,
+                aktivan=True,
+                radno_od=time(8, 0),
+                radno_do=time(16, 0),
+                trajanje_termina_min=30,
+                **podaci,
+            )
+        )
+    # bulk_create ne poziva save(), pa se tekst za pretragu puni ovdje
+    for salon in saloni:
+        salon.osvjezi_pretragu()
+    saloni = Salon.objects.bulk_create(saloni, batch_size=velicina_bloka)
+
+    frizeri = [
+        Frizer(salon=salon, ime_prezime=f'{imena.ime()} {imena.prezime()}', aktivan=True)
+        for salon in saloni
+        for _ in range(frizera_po_salonu)
+    ]
+    frizeri = Frizer.objects.bulk_create(frizeri, batch_size=velicina_bloka)
+    frizeri_po_salonu = {}
+    for frizer in frizeri:
+        frizeri_po_salonu.setdefault(frizer.salon_id, []).append(frizer)
+
+    ispis('Generiranje termina i rezervacija...')
+    datum_do = datum_od + timedelta(days=broj_dana - 1)
+    broj_termina = 0
+    broj_rezervacija = 0
+    for salon in saloni:
+        termini = generiraj_termine(salon, frizeri_po_salonu.get(salon.id, []), datum_od, datum_do)
+        for blok in _u_blokovima(termini, velicina_bloka):
+            # Rezervacija se odlucuje prije spremanja termina, a otkazani termin ostaje slobodan,
+            # kao nakon otkazivanja kroz API
+            statusi = []
+            for termin in blok:
+                rezerviran = korisnici_ids and rng.random() < popunjenost
+                status = None
+                if rezerviran:
+                    status = 'otkazana' if rng.random() < udio_otkazanih else 'potvrdena'
+                termin.slobodan = status != 'potvrdena'
+                statusi.append(status)
+
+            with transaction.atomic():
+                blok = Termin.objects.bulk_create(blok)
+                rezervacije = [
+                    Rezervacija(
+                        korisnik_id=rng.choice(korisnici_ids),
+                        termin=termin,
+                        status=status,
+                        napomena='Trebao bih pranje i šišanje.',
+                    )
+                    for termin, status in zip(blok, statusi)
+                    if status
+                ]
+                Rezervacija.objects.bulk_create(rezervacije)
+
+            broj_termina += len(blok)
+            broj_rezervacija += len(rezervacije)
+
+    return {
+        'admini': admini,
+        'korisnici': korisnici,
+        'saloni': len(saloni),
+        'frizeri': len(frizeri),
+        'termini': broj_termina,
+        'rezervacije': broj_rezervacija,
+    }
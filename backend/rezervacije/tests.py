@@ -1,10 +1,35 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock, skipUnless
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Count
+from django.db.models.functions import Lower
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 from rest_framework import status
-from datetime import date, time
+from datetime import date, datetime, time, timedelta
 
-from .models import Salon, Frizer, Termin, Rezervacija
+from .alokacija import _kandidati, rezerviraj
+from .authentication import resetiraj_statistiku_autentikacije, statistika_autentikacije
+from .dostupnost import dohvati_slobodna_mjesta, verzija_kataloga, verzija_mreze
+from .models import Salon, Frizer, RadnoVrijeme, Termin, Rezervacija, DnevnaStatistika
+from .mreza import hhmm, maska, mjesta_po_terminu, pocetci_termina
+from .obavijesti import LokalniBroker, kanal_dana
+from .raspored import termini_dana
+from .renderers import msgpack
+from .serializers import UserRegisterSerializer, generiraj_korisnicko_ime
+from .testni_podaci import generiraj_testne_podatke
+from .throttling import KlizniProzor, spremnik_racuna
 
 
 # Testovi koji provjeravaju ispravnost modela Salon
@@ -120,6 +145,46 @@ class RegistracijaAPITest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
 
+# Testovi generiranja korisnickog imena kod registracije
+class KorisnickoImeTest(TestCase):
+    # Provjera da se sljedece slobodno ime za vrlo cesto ime nalazi jednim upitom
+    def test_tisuce_istih_imena_jedan_upit(self):
+        User.objects.bulk_create(
+            [User(username='ivan')] + [User(username=f'ivan{broj}') for broj in range(1, 3000)]
+            + [User(username='ivana'), User(username='ivan0'), User(username='ivan_horvat')]
+        )
+        with self.assertNumQueries(1):
+            self.assertEqual(generiraj_korisnicko_ime('Ivan'), 'ivan3000')
+        with self.assertNumQueries(1):
+            self.assertEqual(generiraj_korisnicko_ime('Ivana'), 'ivana1')
+
+    # Provjera da broj upita registracije ne raste s brojem korisnika istog imena
+    # (provjera emaila, username, korisnik i token, uz savepointe)
+    def test_registracija_ogranicen_broj_upita(self):
+        User.objects.bulk_create([User(username='ivan')] + [User(username=f'ivan{broj}') for broj in range(1, 1000)])
+        client = APIClient()
+        for broj in range(3):
+            with self.assertNumQueries(9):
+                response = client.post('/api/auth/registracija/', {
+                    'ime': 'Ivan',
+                    'email': f'ivan{broj}@test.com',
+                    'password': 'lozinka123',
+                }, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            list(User.objects.filter(email__endswith='@test.com').order_by('id').values_list('username', flat=True)),
+            ['ivan1000', 'ivan1001', 'ivan1002'],
+        )
+
+    # Provjera da se ime koje je istovremena registracija zauzela izmedu odabira i spremanja generira ponovno
+    def test_istovremena_registracija_istog_imena(self):
+        User.objects.create_user(username='marija')
+        with mock.patch('rezervacije.serializers.generiraj_korisnicko_ime', side_effect=['marija', 'marija1']):
+            serializer = UserRegisterSerializer(data={'ime': 'Marija', 'email': 'marija@test.com', 'password': 'x'})
+            serializer.is_valid(raise_exception=True)
+            self.assertEqual(serializer.save().username, 'marija1')
+
+
 # Testovi koji provjeravaju API endpoint za prijavu korisnika
 class PrijavaAPITest(TestCase):
     def setUp(self):
@@ -144,6 +209,184 @@ class PrijavaAPITest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
 
+# Testovi cachea token autentikacije i odjave
+class AutentikacijaCacheTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='kesirani', email='kesirani@test.com', password='lozinka123')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        resetiraj_statistiku_autentikacije()
+
+    # Provjera da drugi zahtjev s istim tokenom ne radi upit za autentikaciju
+    def test_drugi_zahtjev_bez_upita_za_token(self):
+        with self.assertNumQueries(2):
+            self.client.get('/api/rezervacije/')
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/rezervacije/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(statistika_autentikacije(), {'pogoci': 1, 'promasaji': 1, 'udio_pogodaka': 0.5})
+
+    # Provjera da se promjena korisnika (npr. is_staff) vidi u sljedecem zahtjevu
+    def test_promjena_korisnika_ponistava_cache(self):
+        self.client.get('/api/rezervacije/')
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get('/api/saloni/', {'q': 'nepostojeci'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(statistika_autentikacije()['promasaji'], 2)
+
+    # Provjera da nakon odjave token vise ne vrijedi, iako je bio u cacheu
+    def test_odjava(self):
+        self.assertEqual(self.client.get('/api/rezervacije/').status_code, status.HTTP_200_OK)
+        response = self.client.post('/api/auth/odjava/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(Token.objects.filter(user=self.user).exists())
+        self.assertEqual(self.client.get('/api/rezervacije/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+# Testovi potpisanih tokena s istekom i opozivom
+@override_settings(AUTH_POTPISANI_TOKENI=True)
+class PotpisaniTokenTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='potpisani', email='potpisani@test.com', password='lozinka123')
+
+    def prijava(self):
+        response = self.client.post('/api/auth/prijava/', {
+            'email': 'potpisani@test.com',
+            'password': 'lozinka123',
+        }, format='json')
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {response.data['token']}")
+        return response
+
+    # Provjera da se potpisani token provjerava bez upita i da se ne sprema u bazu
+    def test_zahtjev_bez_upita_za_autentikaciju(self):
+        self.prijava()
+        self.assertFalse(Token.objects.exists())
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/rezervacije/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    # Provjera da izmijenjen ili istekao token ne vrijedi
+    def test_neispravan_i_istekao_token(self):
+        token = self.prijava().data['token']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token[:-1]}x')
+        self.assertEqual(self.client.get('/api/rezervacije/').status_code, status.HTTP_401_UNAUTHORIZED)
+        with self.settings(AUTH_TOKEN_TRAJANJE=-1):
+            self.prijava()
+        self.assertEqual(self.client.get('/api/rezervacije/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    # Provjera da odjava opoziva samo taj token
+    def test_odjava_opoziva_token(self):
+        self.prijava()
+        self.assertEqual(self.client.post('/api/auth/odjava/').status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get('/api/rezervacije/').status_code, status.HTTP_401_UNAUTHORIZED)
+        self.prijava()
+        self.assertEqual(self.client.get('/api/rezervacije/').status_code, status.HTTP_200_OK)
+
+    # Provjera da promjena lozinke opoziva sve ranije izdane tokene korisnika
+    def test_promjena_lozinke_opoziva_tokene(self):
+        self.prijava()
+        self.user.set_password('novalozinka123')
+        self.user.save()
+        self.assertEqual(self.client.get('/api/rezervacije/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    # Provjera da spremanje samo vremena prijave ne opoziva tokene i ne mijenja katalog, a promjena imena mijenja
+    def test_spremanje_zadnje_prijave(self):
+        self.prijava()
+        verzija = verzija_kataloga()
+        self.user.last_login = timezone.now()
+        self.user.save(update_fields=['last_login'])
+        self.assertEqual(self.client.get('/api/rezervacije/').status_code, status.HTTP_200_OK)
+        self.assertEqual(verzija_kataloga(), verzija)
+        self.user.first_name = 'Novo Ime'
+        self.user.save(update_fields=['first_name'])
+        self.assertNotEqual(verzija_kataloga(), verzija)
+
+    # Provjera da puno spremljenih tokena u cacheu autentikacije ne izbacuje opoziv
+    def test_opoziv_prezivljava_pun_cache_autentikacije(self):
+        self.prijava()
+        self.client.post('/api/auth/odjava/')
+        kes = caches[settings.AUTH_CACHE]
+        for broj in range(1000):
+            kes.set(f'auth:token:{broj}', None)
+        self.assertEqual(self.client.get('/api/rezervacije/').status_code, status.HTTP_401_UNAUTHORIZED)
+        kes.clear()
+
+
+# Testovi ogranicenja prijava po IP adresi i racunu
+@override_settings(PRIJAVA_LIMITI={'ip': (4, 1), 'racun': (2, 1)})
+class PrijavaLimitTest(TestCase):
+    def setUp(self):
+        caches[settings.PRIJAVA_LIMITI_CACHE].clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='limit', email='Limit@Test.com', password='lozinka123')
+
+    # Brojaci su u cacheu, pa se potroseni pokusaji ne smiju prenijeti u ostale testove prijave
+    def tearDown(self):
+        caches[settings.PRIJAVA_LIMITI_CACHE].clear()
+
+    def prijava(self, password, email='limit@test.com'):
+        return self.client.post('/api/auth/prijava/', {'email': email, 'password': password}, format='json')
+
+    # Provjera da se email trazi bez obzira na velika i mala slova
+    def test_email_bez_obzira_na_velicinu_slova(self):
+        self.assertEqual(self.prijava('lozinka123', email=' LIMIT@test.COM ').status_code, status.HTTP_200_OK)
+
+    # Provjera da se nakon previse neuspjelih prijava racun odbija bez upita i racunanja hasha lozinke.
+    # Vrijeme je na pocetku prozora od dvije minute, pa se treci pokusaj dopusta tek kad udio dva
+    # potrosena pokusaja u kliznom prozoru padne na jedan (minutu nakon kraja prozora)
+    @mock.patch('rezervacije.throttling.time.time', return_value=1200.0)
+    def test_ogranicenje_racuna(self, _time):
+        self.assertEqual(self.prijava('kriva').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.prijava('kriva').status_code, status.HTTP_400_BAD_REQUEST)
+        with self.assertNumQueries(0), mock.patch.object(User, 'check_password') as check_password:
+            response = self.prijava('lozinka123')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('error', response.data)
+        self.assertEqual(response['Retry-After'], '180')
+        check_password.assert_not_called()
+
+    # Provjera da se pokusaj trosi prije provjere lozinke (istovremena prijava bila bi odbijena),
+    # a uspjesna prijava ga vraca
+    @mock.patch('rezervacije.throttling.time.time', return_value=1200.0)
+    def test_pokusaj_potrosen_tijekom_provjere_lozinke(self, _time):
+        self.assertEqual(self.prijava('kriva').status_code, status.HTTP_400_BAD_REQUEST)
+        tijekom_provjere = []
+
+        def provjera(lozinka):
+            tijekom_provjere.append(spremnik_racuna().cekanje('limit@test.com'))
+            return True
+
+        with mock.patch.object(User, 'check_password', side_effect=provjera):
+            self.assertEqual(self.prijava('lozinka123').status_code, status.HTTP_200_OK)
+        self.assertGreater(tijekom_provjere[0], 0)
+        self.assertEqual(spremnik_racuna().cekanje('limit@test.com'), 0)
+        self.assertEqual(self.prijava('kriva').status_code, status.HTTP_400_BAD_REQUEST)
+
+    # Provjera da uspjesne prijave ne trose tokene racuna, a svi pokusaji trose tokene IP adrese
+    def test_ogranicenje_ip_adrese(self):
+        for _ in range(4):
+            self.assertEqual(self.prijava('lozinka123').status_code, status.HTTP_200_OK)
+        response = self.prijava('lozinka123')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertTrue(response.has_header('Retry-After'))
+
+    # Provjera da odbijeni pokusaj ne trosi i da se pokusaji prethodnog prozora ne zaboravljaju na granici prozora
+    def test_klizni_prozor(self):
+        spremnik = KlizniProzor('test', 2, 1)
+        with mock.patch('rezervacije.throttling.time.time', return_value=1200.0):
+            self.assertEqual([spremnik.potrosi('k') for _ in range(3)], [True, True, False])
+        with mock.patch('rezervacije.throttling.time.time', return_value=1320.0):
+            self.assertFalse(spremnik.potrosi('k'))
+            self.assertEqual(spremnik.cekanje('k'), 60)
+        with mock.patch('rezervacije.throttling.time.time', return_value=1380.0):
+            self.assertEqual(spremnik.cekanje('k'), 0)
+            self.assertTrue(spremnik.potrosi('k'))
+            self.assertFalse(spremnik.potrosi('k'))
+
+
 # Testovi koji provjeravaju API endpointe za upravljanje salonima
 class SalonAPITest(TestCase):
     def setUp(self):
@@ -173,3 +416,1392 @@ class SalonAPITest(TestCase):
             'adresa': 'Nova Adresa',
         }, format='json')
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+# Testovi pretrage salona po nazivu, adresi i opisu
+class PretragaSalonaTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        Salon.objects.create(naziv='Šišanje kod Đure', adresa='Ilica 10, Zagreb', opis='Muško šišanje i brijanje.')
+        Salon.objects.create(naziv='Studio Ljepote', adresa='Kneza Domagoja 3, Đakovo', opis='Šišanje i bojanje.')
+        Salon.objects.create(naziv='Barber Čakovec', adresa='Ulica 1, Čakovec', opis='Brijanje.')
+        Salon.objects.create(naziv='Neaktivni sisanje', adresa='Zagreb', aktivan=False)
+
+    def pretrazi(self, q):
+        response = self.client.get('/api/saloni/', {'q': q})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [salon['naziv'] for salon in response.data]
+
+    # Provjera da pretraga ne ovisi o dijakritikama i velikim slovima, i da trazi i po adresi i opisu
+    def test_pretraga_bez_dijakritika(self):
+        self.assertEqual(self.pretrazi('dakovo'), ['Studio Ljepote'])
+        self.assertEqual(self.pretrazi('ČAKOVEC'), ['Barber Čakovec'])
+        self.assertEqual(self.pretrazi('djure'), [])
+        self.assertEqual(self.pretrazi('dure'), ['Šišanje kod Đure'])
+
+    # Provjera da se nedovrsena rijec pretrazuje kao prefiks i da salon ciji naziv pocinje upitom ide prvi
+    def test_prefiks_i_rangiranje(self):
+        self.assertEqual(self.pretrazi('sis'), ['Šišanje kod Đure', 'Studio Ljepote'])
+        self.assertEqual(self.pretrazi('sisanje zag'), ['Šišanje kod Đure'])
+
+    # Provjera da izmjena salona osvjezava indeks pretrage, a brisanje ga uklanja iz rezultata
+    def test_izmjena_i_brisanje(self):
+        salon = Salon.objects.get(naziv='Barber Čakovec')
+        salon.opis = 'Frizure za vjenčanja.'
+        salon.save(update_fields=['opis'])
+        self.assertEqual(self.pretrazi('vjencanja'), ['Barber Čakovec'])
+        salon.delete()
+        self.assertEqual(self.pretrazi('vjencanja'), [])
+
+
+# Testovi paginacije i odabira polja (?fields=) na popisima
+class OdabranaPoljaTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(username='adminpolja', first_name='Vlasnik', password='x', is_staff=True)
+        self.korisnik = User.objects.create_user(username='korisnikpolja', password='x')
+        for broj in range(5):
+            salon = Salon.objects.create(naziv=f'Salon {broj}', adresa='Adresa', vlasnik=self.admin)
+            frizer = Frizer.objects.create(salon=salon, ime_prezime=f'Frizer {broj}')
+            termin = Termin.objects.create(
+                salon=salon, frizer=frizer, datum=date(2026, 3, 2), vrijeme_od=time(9, 0), vrijeme_do=time(9, 30),
+                slobodan=False,
+            )
+            Rezervacija.objects.create(korisnik=self.korisnik, termin=termin)
+
+    # Provjera da odgovor sadrzi samo odabrana polja i da se ucitavaju samo potrebni stupci
+    def test_samo_odabrana_polja(self):
+        with CaptureQueriesContext(connection) as upiti:
+            response = self.client.get('/api/saloni/', {'fields': 'naziv,nepostojece'})
+        self.assertEqual(response.data[0], {'id': response.data[0]['id'], 'naziv': 'Salon 0'})
+        self.assertEqual(len(upiti), 1)
+        self.assertNotIn('opis', upiti[0]['sql'])
+        self.assertNotIn('auth_user', upiti[0]['sql'])
+
+    # Provjera da polje iz povezanog modela ucitava samo tu relaciju, bez dodatnih upita
+    def test_polje_povezanog_modela(self):
+        self.client.force_authenticate(user=self.korisnik)
+        with CaptureQueriesContext(connection) as upiti:
+            response = self.client.get('/api/rezervacije/', {'fields': 'salon_naziv,termin_datum'})
+        self.assertEqual(len(upiti), 1)
+        self.assertEqual(set(response.data[0]), {'id', 'salon_naziv', 'termin_datum'})
+        self.assertNotIn('auth_user', upiti[0]['sql'])
+        self.assertNotIn('napomena', upiti[0]['sql'])
+
+    # Provjera da su svi popisi paginirani kursorom kad klijent posalje page_size, u poretku viewseta
+    def test_paginacija_svih_popisa(self):
+        self.client.force_authenticate(user=self.korisnik)
+        for putanja in ['/api/saloni/', '/api/frizeri/', '/api/termini/', '/api/rezervacije/']:
+            response = self.client.get(putanja, {'page_size': 2, 'fields': 'id'})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.data['results']), 2)
+            sljedeca = self.client.get(response.data['next'])
+            self.assertEqual(len(sljedeca.data['results']), 2)
+            self.assertFalse({r['id'] for r in response.data['results']} & {r['id'] for r in sljedeca.data['results']})
+        response = self.client.get('/api/saloni/', {'page_size': 3})
+        self.assertEqual([salon['naziv'] for salon in response.data['results']], ['Salon 0', 'Salon 1', 'Salon 2'])
+
+
+# Testovi dohvata frizera vise salona odjednom (pregled vlasnika)
+class FrizeriViseSalonaTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(username='adminlanac', password='x', is_staff=True)
+        self.saloni = [Salon.objects.create(naziv=f'Lanac {broj}', adresa='Adresa', vlasnik=self.admin) for broj in range(40)]
+        for salon in self.saloni:
+            Frizer.objects.create(salon=salon, ime_prezime=f'Frizer {salon.naziv} B')
+            Frizer.objects.create(salon=salon, ime_prezime=f'Frizer {salon.naziv} A')
+        self.client.force_authenticate(user=self.admin)
+
+    # Provjera filtra salon__in
+    def test_frizeri_vise_salona(self):
+        ids = f'{self.saloni[0].id},{self.saloni[1].id}'
+        response = self.client.get('/api/frizeri/', {'salon__in': ids})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual({frizer['salon'] for frizer in response.data}, {self.saloni[0].id, self.saloni[1].id})
+        self.assertEqual(len(response.data), 4)
+        response = self.client.get('/api/frizeri/', {'salon__in': '1,x'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    # Provjera da se saloni s frizerima dohvacaju s dva upita bez obzira na broj salona
+    def test_saloni_s_frizerima(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/saloni/', {'frizeri': 'true'})
+        self.assertEqual(len(response.data), 40)
+        self.assertEqual(
+            [frizer['ime_prezime'] for frizer in response.data[0]['frizeri']],
+            ['Frizer Lanac 0 A', 'Frizer Lanac 0 B'],
+        )
+        self.assertNotIn('frizeri', self.client.get('/api/saloni/').data[0])
+
+
+# Testovi koji provjeravaju dohvat mreze slobodnih termina za vise dana odjednom
+class TerminRasponAPITest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(username='adminraspon', password='test1234', is_staff=True)
+        self.salon = Salon.objects.create(
+            naziv='Salon Raspon',
+            adresa='Adresa Raspon',
+            vlasnik=self.admin,
+            radno_od=time(8, 0),
+            radno_do=time(10, 0),
+            trajanje_termina_min=30,
+        )
+        self.frizer1 = Frizer.objects.create(salon=self.salon, ime_prezime='Frizer Jedan')
+        self.frizer2 = Frizer.objects.create(salon=self.salon, ime_prezime='Frizer Dva')
+        Termin.objects.create(
+            salon=self.salon,
+            frizer=self.frizer1,
+            datum=date(2026, 3, 3),
+            vrijeme_od=time(9, 0),
+            vrijeme_do=time(9, 30),
+            slobodan=False,
+        )
+
+    # Provjera da raspon vraca termine za svaki dan i ispravno broji zauzeta mjesta
+    def test_raspon_datuma(self):
+        response = self.client.get('/api/termini/', {
+            'salon': self.salon.id,
+            'datum_od': '2026-03-02',
+            'datum_do': '2026-03-08',
+            'samo_slobodni': 'true',
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 7 * 4)
+        self.assertEqual(len({termin['datum'] for termin in response.data}), 7)
+        zauzet = next(
+            termin for termin in response.data
+            if termin['datum'] == '2026-03-03' and termin['vrijeme_od'] == '09:00'
+        )
+        self.assertEqual(zauzet['slobodnih_mjesta'], 1)
+        self.assertEqual(zauzet['ukupno_mjesta'], 2)
+
+    # Provjera da se cijeli raspon dohvaca fiksnim brojem upita, neovisno o broju dana
+    def test_raspon_broj_upita(self):
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/termini/', {
+                'salon': self.salon.id,
+                'datum_od': '2026-03-01',
+                'datum_do': '2026-03-31',
+                'samo_slobodni': 'true',
+            })
+        self.assertEqual(len(response.data), 31 * 4)
+
+    # Provjera da sustav odbija preveliki ili obrnuti raspon datuma
+    def test_neispravan_raspon(self):
+        response = self.client.get('/api/termini/', {
+            'salon': self.salon.id,
+            'datum_od': '2026-03-01',
+            'datum_do': '2026-05-01',
+            'samo_slobodni': 'true',
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get('/api/termini/', {
+            'salon': self.salon.id,
+            'datum_od': '2026-03-08',
+            'datum_do': '2026-03-02',
+            'samo_slobodni': 'true',
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    # Provjera da popis termina odbija neispravan datum umjesto greske posluzitelja
+    def test_neispravan_datum_popisa(self):
+        for parametri in ({'datum_od': 'xx'}, {'datum_do': '2026-13-01'}, {'datum': '3.3.2026'}):
+            response = self.client.get('/api/termini/', {'salon': self.salon.id, **parametri})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, parametri)
+            self.assertEqual(response.data, ['Datum nije ispravan.'])
+
+    # Provjera da sazeti oblik u stupcima nosi iste brojeve kao popis termina, uz manji odgovor
+    def test_oblik_stupci(self):
+        parametri = {
+            'salon': self.salon.id,
+            'datum_od': '2026-03-02',
+            'datum_do': '2026-03-08',
+            'samo_slobodni': 'true',
+        }
+        popis = self.client.get('/api/termini/', parametri)
+        stupci = self.client.get('/api/termini/', {**parametri, 'oblik': 'stupci'})
+        self.assertEqual(stupci.status_code, status.HTTP_200_OK)
+        self.assertEqual(stupci.data['trajanje_min'], 30)
+        self.assertEqual(stupci.data['pocetak_min'], [480, 510, 540, 570])
+        self.assertEqual(len(stupci.data['dani']), 7)
+        utorak = next(dan for dan in stupci.data['dani'] if str(dan['datum']) == '2026-03-03')
+        self.assertEqual(utorak['ukupno_mjesta'], 2)
+        self.assertEqual(utorak['slobodnih_mjesta'], [2, 2, 1, 2])
+        self.assertLess(len(stupci.content), len(popis.content) / 5)
+
+    # Provjera da klijent moze zatraziti MessagePack umjesto JSON-a
+    @skipUnless(msgpack, 'msgpack nije instaliran')
+    def test_msgpack(self):
+        response = self.client.get('/api/termini/', {
+            'salon': self.salon.id,
+            'datum_od': '2026-03-02',
+            'datum_do': '2026-03-08',
+            'samo_slobodni': 'true',
+            'oblik': 'stupci',
+        }, HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        podaci = msgpack.unpackb(response.content)
+        self.assertEqual(podaci['pocetak_min'], [480, 510, 540, 570])
+        self.assertEqual(podaci['dani'][0]['datum'], '2026-03-02')
+
+
+# Testovi koji provjeravaju racunanje mreze slobodnih termina nad minutama i bitmapama
+class MrezaTerminaTest(TestCase):
+    # Provjera da termin broji frizere koji ga rade cijelog i nemaju preklapajuce zauzece bilo kojeg trajanja
+    def test_mjesta_po_terminu(self):
+        pocetci = pocetci_termina(8 * 60, 10 * 60, 30)
+        self.assertEqual(list(pocetci), [480, 510, 540, 570])
+        frizeri = [
+            (maska(8 * 60, 10 * 60), maska(9 * 60, 9 * 60 + 30)),
+            (maska(8 * 60, 10 * 60), maska(8 * 60 + 15, 9 * 60)),
+            (maska(8 * 60 + 30, 9 * 60 + 30), 0),
+        ]
+        self.assertEqual(mjesta_po_terminu(frizeri, pocetci, 30), [1, 2, 2, 2])
+
+    # Provjera da zauzece frizera koji taj dan ne radi ne oduzima mjesto drugima
+    def test_zauzece_frizera_koji_ne_radi(self):
+        frizeri = [(0, maska(8 * 60, 8 * 60 + 30)), (maska(8 * 60, 10 * 60), 0)]
+        self.assertEqual(mjesta_po_terminu(frizeri, pocetci_termina(8 * 60, 10 * 60, 60), 60), [1, 1])
+
+    # Provjera da termini koji se spremaju pri otvaranju rasporeda slijede iste pocetke kao mreza
+    def test_termini_dana(self):
+        salon = Salon(radno_od=time(8, 0), radno_do=time(10, 0), trajanje_termina_min=45)
+        self.assertEqual(termini_dana(salon), [(time(8, 0), time(8, 45)), (time(8, 45), time(9, 30))])
+
+
+# Testovi koji provjeravaju bitmape zauzetosti frizera i pretragu slobodnih frizera
+class ZauzetostFrizeraTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(username='adminbitmapa', password='test1234', is_staff=True)
+        self.korisnik = User.objects.create_user(username='korisnikbitmapa', password='test1234')
+        self.salon = Salon.objects.create(
+            naziv='Salon Bitmapa',
+            adresa='Adresa Bitmapa',
+            vlasnik=self.admin,
+            radno_od=time(8, 0),
+            radno_do=time(16, 0),
+            trajanje_termina_min=30,
+        )
+        self.ana = Frizer.objects.create(salon=self.salon, ime_prezime='Ana')
+        self.bruno = Frizer.objects.create(salon=self.salon, ime_prezime='Bruno')
+        self.cvita = Frizer.objects.create(salon=self.salon, ime_prezime='Cvita')
+        self.datum = date.today() + timedelta(days=1)
+        # Bruno ima termin od 45 minuta iz vremena kad je salon imao drugacije trajanje termina
+        for frizer, vrijeme_od, vrijeme_do in [
+            (self.ana, time(10, 0), time(10, 30)),
+            (self.bruno, time(10, 30), time(11, 15)),
+        ]:
+            Termin.objects.create(
+                salon=self.salon,
+                frizer=frizer,
+                datum=self.datum,
+                vrijeme_od=vrijeme_od,
+                vrijeme_do=vrijeme_do,
+                slobodan=False,
+            )
+
+    def slobodni(self, vrijeme, trajanje=None):
+        parametri = {'salon': self.salon.id, 'datum': self.datum.isoformat(), 'vrijeme': vrijeme}
+        if trajanje:
+            parametri['trajanje'] = trajanje
+        response = self.client.get('/api/frizeri/slobodni/', parametri)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [frizer['ime_prezime'] for frizer in response.data]
+
+    # Provjera da maska pokriva pocetne i djelomicno pokrivene jedinice od 5 minuta
+    def test_maska(self):
+        self.assertEqual(maska(10, 20), 0b11 << 2)
+        self.assertEqual(maska(12, 18), 0b11 << 2)
+        self.assertFalse(maska(600, 630) & maska(630, 675))
+        self.assertTrue(maska(600, 630) & maska(615, 660))
+
+    # Provjera da se preklapanje prepoznaje i s terminima drugog trajanja
+    def test_slobodni_frizeri(self):
+        self.assertEqual(self.slobodni('10:15', 45), ['Cvita'])
+        self.assertEqual(self.slobodni('11:15', 30), ['Ana', 'Bruno', 'Cvita'])
+        self.assertEqual(self.slobodni('10:00'), ['Bruno', 'Cvita'])
+
+    # Provjera da se zauzetost dana sprema u cache i ponistava rezervacijom
+    def test_cache_zauzetosti(self):
+        self.slobodni('11:00')
+        with self.assertNumQueries(2):
+            self.assertEqual(self.slobodni('11:00'), ['Ana', 'Cvita'])
+        rezerviraj(self.korisnik, salon=self.salon, datum=self.datum, vrijeme_od=time(11, 0), vrijeme_do=time(11, 30))
+        self.assertEqual(self.slobodni('11:00'), ['Cvita'])
+
+    # Provjera da mreza broji zauzeca drugog trajanja po preklapanju, jednako kao pretraga slobodnih frizera,
+    # pa se svaki termin koji mreza prikazuje slobodnim moze i rezervirati
+    def test_mreza_kao_slobodni_frizeri(self):
+        for trajanje in (30, 45):
+            self.salon.trajanje_termina_min = trajanje
+            self.salon.save(update_fields=['trajanje_termina_min'])
+            pocetci, [(_datum, _ukupno, mjesta)] = dohvati_slobodna_mjesta(self.salon, self.datum, self.datum)
+            for pocetak, slobodnih_mjesta in zip(pocetci, mjesta):
+                with self.subTest(trajanje=trajanje, pocetak=hhmm(pocetak)):
+                    self.assertEqual(slobodnih_mjesta, len(self.slobodni(hhmm(pocetak), trajanje)))
+        # Termin 10:15-11:00 preklapa se s Aninim i Brunovim terminom
+        self.assertEqual(mjesta[pocetci.index(10 * 60 + 15)], 1)
+        rezervacija = rezerviraj(
+            self.korisnik, salon=self.salon, datum=self.datum, vrijeme_od=time(10, 15), vrijeme_do=time(11, 0),
+        )
+        self.assertEqual(rezervacija.termin.frizer_id, self.cvita.id)
+        pocetci, [(_datum, _ukupno, mjesta)] = dohvati_slobodna_mjesta(self.salon, self.datum, self.datum)
+        self.assertEqual(mjesta[pocetci.index(10 * 60 + 15)], 0)
+
+    # Provjera da dodjela frizera preskace frizera s preklapajucim terminom drugog trajanja
+    def test_dodjela_bez_preklapanja(self):
+        drugi = User.objects.create_user(username='drugibitmapa', password='test1234')
+        frizeri = [
+            rezerviraj(
+                korisnik,
+                salon=self.salon,
+                datum=self.datum,
+                vrijeme_od=time(11, 0),
+                vrijeme_do=time(11, 30),
+            ).termin.frizer_id
+            for korisnik in (self.korisnik, drugi)
+        ]
+        self.assertEqual(frizeri, [self.ana.id, self.cvita.id])
+
+    # Provjera da neispravni parametri vracaju 400
+    def test_neispravni_parametri(self):
+        response = self.client.get('/api/frizeri/slobodni/', {'salon': self.salon.id, 'datum': 'x', 'vrijeme': '10:00'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+# Testovi koji provjeravaju pretragu najranijih slobodnih termina u vise salona
+class PrviSlobodniTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(username='adminprvi', password='test1234', is_staff=True)
+        self.salon_a = Salon.objects.create(
+            naziv='Salon Prvi Centar',
+            adresa='Adresa',
+            vlasnik=self.admin,
+            radno_od=time(8, 0),
+            radno_do=time(12, 0),
+            trajanje_termina_min=60,
+        )
+        self.salon_b = Salon.objects.create(
+            naziv='Salon Drugi Centar',
+            adresa='Adresa',
+            vlasnik=self.admin,
+            radno_od=time(8, 0),
+            radno_do=time(12, 0),
+            trajanje_termina_min=30,
+        )
+        Frizer.objects.create(salon=self.salon_a, ime_prezime='Frizer A')
+        frizer_b = Frizer.objects.create(salon=self.salon_b, ime_prezime='Frizer B')
+        self.danas = date(2026, 3, 2)
+        Termin.objects.create(
+            salon=self.salon_b,
+            frizer=frizer_b,
+            datum=self.danas,
+            vrijeme_od=time(9, 30),
+            vrijeme_do=time(10, 0),
+            slobodan=False,
+        )
+        sada = mock.patch('rezervacije.views.timezone.localtime', return_value=datetime(2026, 3, 2, 9, 10))
+        sada.start()
+        self.addCleanup(sada.stop)
+
+    def prvi(self, **parametri):
+        response = self.client.get('/api/termini/prvi-slobodni/', parametri)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(termin['salon'], termin['datum'], termin['vrijeme_od']) for termin in response.data]
+
+    # Provjera da se termini salona spajaju po vremenu, od sadasnjeg trenutka i bez zauzetih termina
+    def test_najraniji_termini(self):
+        saloni = f'{self.salon_a.id},{self.salon_b.id}'
+        with self.assertNumQueries(3):
+            rezultat = self.prvi(saloni=saloni, broj=4)
+        self.assertEqual(rezultat, [
+            (self.salon_a.id, '2026-03-02', '10:00'),
+            (self.salon_b.id, '2026-03-02', '10:00'),
+            (self.salon_b.id, '2026-03-02', '10:30'),
+            (self.salon_a.id, '2026-03-02', '11:00'),
+        ])
+
+    # Provjera da pretraga prelazi u sljedece dane i postuje raspon dana
+    def test_sljedeci_dani(self):
+        rezultat = self.prvi(saloni=str(self.salon_a.id), broj=5)
+        self.assertEqual([datum for _salon, datum, _vrijeme in rezultat], ['2026-03-02'] * 2 + ['2026-03-03'] * 3)
+        self.assertEqual(len(self.prvi(saloni=str(self.salon_a.id), broj=50, dana=2)), 6)
+
+    # Provjera da ograniceni broj salona uvijek uzima iste salone (najmanji ID), a ne proizvoljan redoslijed baze
+    def test_ograniceni_broj_salona(self):
+        saloni = f'{self.salon_b.id},{self.salon_a.id}'
+        with mock.patch('rezervacije.views.MAKS_PRVI_SLOBODNI_SALONA', 1), CaptureQueriesContext(connection) as upiti:
+            rezultat = self.prvi(saloni=saloni, broj=3)
+        self.assertEqual({salon for salon, _datum, _vrijeme in rezultat}, {self.salon_a.id})
+        self.assertIn('ORDER BY', upiti[0]['sql'])
+
+    # Provjera da se saloni mogu odabrati pretragom i da je potreban barem jedan kriterij
+    def test_pretraga_i_greske(self):
+        rezultat = self.prvi(q='drugi', broj=1)
+        self.assertEqual(rezultat, [(self.salon_b.id, '2026-03-02', '10:00')])
+        response = self.client.get('/api/termini/prvi-slobodni/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get('/api/termini/prvi-slobodni/', {'saloni': 'x'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+# Testovi koji provjeravaju pretragu salona po udaljenosti i uvoz koordinata
+class LokacijeTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(username='adminlokacija', password='test1234', is_staff=True)
+        # Trg bana Jelacica, Maksimir (oko 3 km), Velika Gorica (oko 15 km), Split (oko 260 km)
+        self.centar = self.salon('Salon Centar', 'Trg bana Jelačića 1', 45.8131, 15.9772)
+        self.maksimir = self.salon('Salon Maksimir', 'Maksimirska 100', 45.8260, 16.0170)
+        self.gorica = self.salon('Salon Gorica', 'Zagrebačka 5, Velika Gorica', 45.7125, 16.0757)
+        self.split = self.salon('Salon Split', 'Riva 1, Split', 43.5081, 16.4402)
+        self.bez_lokacije = Salon.objects.create(naziv='Salon Bez Lokacije', adresa='Nepoznata 1', vlasnik=self.admin)
+
+    def salon(self, naziv, adresa, sirina, duzina):
+        return Salon.objects.create(naziv=naziv, adresa=adresa, vlasnik=self.admin, geo_sirina=sirina, geo_duzina=duzina)
+
+    def nazivi(self, response):
+        return [salon['naziv'] for salon in response.data]
+
+    # Provjera da se saloni vracaju od najblizeg, s udaljenoscu, bez paginacije
+    def test_najblizi_saloni(self):
+        response = self.client.get('/api/saloni/', {'lokacija': '45.8150,15.9819', 'broj': 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.nazivi(response), ['Salon Centar', 'Salon Maksimir', 'Salon Gorica'])
+        self.assertLess(response.data[0]['udaljenost_km'], 1)
+        self.assertAlmostEqual(response.data[2]['udaljenost_km'], 13.5, delta=0.5)
+
+    # Provjera da radijus ogranicava rezultate, a neaktivni saloni se ne vracaju
+    def test_radijus(self):
+        response = self.client.get('/api/saloni/', {'lokacija': '45.8150,15.9819', 'radijus': 5})
+        self.assertEqual(self.nazivi(response), ['Salon Centar', 'Salon Maksimir'])
+
+        self.maksimir.aktivan = False
+        self.maksimir.save()
+        response = self.client.get('/api/saloni/', {'lokacija': '45.8150,15.9819', 'radijus': 5})
+        self.assertEqual(self.nazivi(response), ['Salon Centar'])
+
+    # Provjera da admin dobiva najblize od svojih salona (i neaktivne), a blizi saloni drugih vlasnika
+    # ne smanjuju broj rezultata
+    def test_najblizi_saloni_admina(self):
+        drugi_admin = User.objects.create_user(username='drugiadmin', password='test1234', is_staff=True)
+        for broj in range(3):
+            Salon.objects.create(naziv=f'Tudi {broj}', adresa='Ilica 1', vlasnik=drugi_admin,
+                                 geo_sirina=45.8150, geo_duzina=15.9819)
+        self.maksimir.aktivan = False
+        self.maksimir.save()
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get('/api/saloni/', {'lokacija': '45.8150,15.9819', 'broj': 2})
+        self.assertEqual(self.nazivi(response), ['Salon Centar', 'Salon Maksimir'])
+
+    # Provjera da se lokacija kombinira s pretragom po nazivu
+    def test_lokacija_i_pretraga(self):
+        response = self.client.get('/api/saloni/', {'lokacija': '45.5,16.3', 'q': 'gorica'})
+        self.assertEqual(self.nazivi(response), ['Salon Gorica'])
+
+    # Provjera da se pogresni parametri odbijaju
+    def test_neispravni_parametri(self):
+        for parametri in ({'lokacija': 'zagreb'}, {'lokacija': '95,15'}, {'lokacija': '45,15', 'broj': 0},
+                          {'lokacija': '45,15', 'radijus': -1}):
+            response = self.client.get('/api/saloni/', parametri)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, parametri)
+
+    # Provjera da lokacija salona mora imati obje koordinate u dozvoljenom rasponu
+    def test_validacija_lokacije(self):
+        self.client.force_authenticate(user=self.admin)
+        podaci = {'naziv': 'Salon Novi', 'adresa': 'Ilica 1', 'geo_sirina': 45.81}
+        response = self.client.post('/api/saloni/', podaci, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post('/api/saloni/', {**podaci, 'geo_duzina': 200}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post('/api/saloni/', {**podaci, 'geo_duzina': 15.97}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.get('/api/saloni/', {'lokacija': '45.81,15.97', 'broj': 1})
+        self.assertEqual(self.nazivi(response), ['Salon Novi'])
+
+    # Provjera uvoza koordinata po adresi (bez obzira na dijakritike) i po ID-u salona
+    def test_uvoz_lokacija(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', encoding='utf-8', delete=False) as datoteka:
+            datoteka.write('adresa,sirina,duzina,salon\n')
+            datoteka.write('nepoznata 1,45.80,15.95,\n')
+            datoteka.write(f',45.81,15.96,{self.split.id}\n')
+            datoteka.write('Ne postoji 7,45.00,15.00,\n')
+        self.addCleanup(os.remove, datoteka.name)
+
+        izlaz = StringIO()
+        call_command('uvezi_lokacije', datoteka.name, stdout=izlaz)
+        self.assertIn('Ažurirano 2 salona.', izlaz.getvalue())
+        self.assertIn('Salon nije pronađen: Ne postoji 7', izlaz.getvalue())
+        self.bez_lokacije.refresh_from_db()
+        self.assertEqual((self.bez_lokacije.geo_sirina, self.bez_lokacije.geo_duzina), (45.80, 15.95))
+
+        # Uvoz ponistava prostorni indeks, pa premjesteni salon odmah dolazi u obzir
+        response = self.client.get('/api/saloni/', {'lokacija': '45.81,15.96', 'broj': 1})
+        self.assertEqual(self.nazivi(response), ['Salon Split'])
+
+    # Provjera da neispravan ID salona prekida uvoz s brojem reda, bez ikakve izmjene
+    def test_uvoz_neispravnog_id_salona(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', encoding='utf-8', delete=False) as datoteka:
+            datoteka.write('adresa,sirina,duzina,salon\n')
+            datoteka.write(f',45.81,15.96,{self.split.id}\n')
+            datoteka.write(',45.80,15.95,split\n')
+        self.addCleanup(os.remove, datoteka.name)
+
+        with self.assertRaisesMessage(CommandError, 'Red 3: neispravan ID salona.'):
+            call_command('uvezi_lokacije', datoteka.name, stdout=StringIO())
+        self.split.refresh_from_db()
+        self.assertNotEqual((self.split.geo_sirina, self.split.geo_duzina), (45.81, 15.96))
+
+
+# Testovi koji provjeravaju tjedni raspored i iznimke te dostupnost izracunatu iz njih
+class RadnoVrijemeTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(username='adminraspored2', password='test1234', is_staff=True)
+        self.drugi_admin = User.objects.create_user(username='drugiraspored2', password='test1234', is_staff=True)
+        self.korisnik = User.objects.create_user(username='korisnikraspored', password='test1234')
+        # 09:00 - 13:00 po 60 minuta = termini u 9, 10, 11 i 12
+        self.salon = Salon.objects.create(
+            naziv='Salon Tjedni',
+            adresa='Adresa Tjedni',
+            vlasnik=self.admin,
+            radno_od=time(9, 0),
+            radno_do=time(13, 0),
+            trajanje_termina_min=60,
+        )
+        self.ana = Frizer.objects.create(salon=self.salon, ime_prezime='Ana')
+        self.bruno = Frizer.objects.create(salon=self.salon, ime_prezime='Bruno')
+        danas = date.today()
+        self.ponedjeljak = danas + timedelta(days=7 - danas.weekday())
+
+        # Salon: ponedjeljkom 9 - 11 i 12 - 13 (stanka), od utorka do subote 9 - 13, nedjeljom ne radi
+        RadnoVrijeme.objects.create(salon=self.salon, dan_u_tjednu=0, vrijeme_od=time(9, 0), vrijeme_do=time(11, 0))
+        RadnoVrijeme.objects.create(salon=self.salon, dan_u_tjednu=0, vrijeme_od=time(12, 0), vrijeme_do=time(13, 0))
+        for dan in range(1, 6):
+            RadnoVrijeme.objects.create(salon=self.salon, dan_u_tjednu=dan, vrijeme_od=time(9, 0), vrijeme_do=time(13, 0))
+        # Bruno radi samo ponedjeljkom od 9 do 10
+        RadnoVrijeme.objects.create(
+            salon=self.salon, frizer=self.bruno, dan_u_tjednu=0, vrijeme_od=time(9, 0), vrijeme_do=time(10, 0)
+        )
+
+    def dan(self, pomak):
+        return self.ponedjeljak + timedelta(days=pomak)
+
+    def mreza(self, datum_od, datum_do=None):
+        response = self.client.get('/api/termini/', {
+            'salon': self.salon.id,
+            'datum_od': datum_od.isoformat(),
+            'datum_do': (datum_do or datum_od).isoformat(),
+            'samo_slobodni': 'true',
+            'oblik': 'stupci',
+        })
+        return [(dan['ukupno_mjesta'], dan['slobodnih_mjesta']) for dan in response.data['dani']]
+
+    # Provjera da mjesta ovise o tjednom rasporedu salona i frizera, sa stankom i neradnim danom
+    def test_tjedni_raspored(self):
+        self.assertEqual(self.mreza(self.dan(0), self.dan(1)), [(2, [2, 1, 0, 1]), (1, [1, 1, 1, 1])])
+        self.assertEqual(self.mreza(self.dan(6)), [(0, [0, 0, 0, 0])])
+
+    # Provjera da iznimka zamjenjuje tjedni raspored za taj datum: praznik salona i promijenjeno radno vrijeme frizera
+    def test_iznimke(self):
+        RadnoVrijeme.objects.create(salon=self.salon, datum=self.dan(1), napomena='Praznik')
+        RadnoVrijeme.objects.create(
+            salon=self.salon, frizer=self.ana, datum=self.dan(2), vrijeme_od=time(10, 0), vrijeme_do=time(12, 0)
+        )
+        RadnoVrijeme.objects.create(
+            salon=self.salon, frizer=self.bruno, datum=self.dan(3), vrijeme_od=time(9, 0), vrijeme_do=time(13, 0)
+        )
+        self.assertEqual(self.mreza(self.dan(1), self.dan(3)), [
+            (0, [0, 0, 0, 0]),
+            (1, [0, 1, 1, 0]),
+            (2, [2, 2, 2, 2]),
+        ])
+
+    # Provjera da rezervacija dodjeljuje samo frizera koji radi i da se termin sprema tek pri rezervaciji
+    def test_rezervacija_prema_rasporedu(self):
+        self.assertFalse(Termin.objects.exists())
+        self.client.force_authenticate(user=self.korisnik)
+        podaci = {'salon': self.salon.id, 'datum': self.dan(0).isoformat(), 'vrijeme_od': '10:00', 'vrijeme_do': '11:00'}
+        response = self.client.post('/api/rezervacije/', podaci, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Termin.objects.get().frizer, self.ana)
+
+        response = self.client.post('/api/rezervacije/', {**podaci, 'vrijeme_od': '11:00', 'vrijeme_do': '12:00'}, format='json')
+        self.assertEqual(response.data['error'], 'Salon u odabrano vrijeme ne radi.')
+        response = self.client.post('/api/rezervacije/', {**podaci, 'datum': self.dan(6).isoformat()}, format='json')
+        self.assertEqual(response.data['error'], 'Salon u odabrano vrijeme ne radi.')
+        self.assertEqual(Termin.objects.count(), 1)
+
+    # Provjera da se unaprijed otvoreni termin ne moze rezervirati kad frizer taj dan ne radi
+    def test_otvoreni_termin_izvan_rasporeda(self):
+        termin = Termin.objects.create(
+            salon=self.salon, frizer=self.bruno, datum=self.dan(1), vrijeme_od=time(9, 0), vrijeme_do=time(10, 0)
+        )
+        self.client.force_authenticate(user=self.korisnik)
+        response = self.client.post('/api/rezervacije/', {'termin': termin.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error'], 'Frizer u odabrano vrijeme ne radi.')
+
+    # Provjera da rezervacija frizera koji je naknadno dobio slobodan dan ne zauzima mjesto frizera koji radi
+    def test_rezervacija_frizera_koji_ne_radi(self):
+        rezerviraj(self.korisnik, salon=self.salon, datum=self.dan(0), vrijeme_od=time(9, 0), vrijeme_do=time(10, 0))
+        self.assertEqual(self.mreza(self.dan(0)), [(2, [1, 1, 0, 1])])
+        RadnoVrijeme.objects.create(salon=self.salon, frizer=self.ana, datum=self.dan(0), napomena='Slobodan dan')
+        self.assertEqual(self.mreza(self.dan(0)), [(1, [1, 0, 0, 0])])
+
+    # Provjera da slobodni frizeri uzimaju u obzir raspored
+    def test_slobodni_frizeri(self):
+        parametri = {'salon': self.salon.id, 'datum': self.dan(0).isoformat(), 'vrijeme': '09:00'}
+        response = self.client.get('/api/frizeri/slobodni/', parametri)
+        self.assertEqual([frizer['ime_prezime'] for frizer in response.data], ['Ana', 'Bruno'])
+        response = self.client.get('/api/frizeri/slobodni/', {**parametri, 'vrijeme': '10:00'})
+        self.assertEqual([frizer['ime_prezime'] for frizer in response.data], ['Ana'])
+
+    # Provjera da promjena rasporeda kroz API odmah mijenja spremljenu mrezu, a tudji raspored se ne moze mijenjati
+    def test_izmjena_rasporeda(self):
+        self.assertEqual(self.mreza(self.dan(6)), [(0, [0, 0, 0, 0])])
+        nedjelja = {'salon': self.salon.id, 'dan_u_tjednu': 6, 'vrijeme_od': '10:00', 'vrijeme_do': '12:00'}
+
+        self.client.force_authenticate(user=self.drugi_admin)
+        response = self.client.post('/api/radno-vrijeme/', nedjelja, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post('/api/radno-vrijeme/', nedjelja, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # Bruno ima vlastiti tjedni raspored, pa nedjeljom i dalje ne radi
+        self.assertEqual(self.mreza(self.dan(6)), [(1, [0, 1, 1, 0])])
+
+        response = self.client.get('/api/radno-vrijeme/', {'salon': self.salon.id, 'frizer': self.bruno.id})
+        self.assertEqual([(red['dan_u_tjednu'], red['frizer_ime']) for red in response.data], [(0, 'Bruno')])
+
+    # Provjera da popis rasporeda filtrira iznimke po rasponu datuma, a neispravan datum vraca 400
+    def test_popis_po_datumu(self):
+        RadnoVrijeme.objects.create(salon=self.salon, datum=self.dan(1), napomena='Praznik')
+        RadnoVrijeme.objects.create(salon=self.salon, datum=self.dan(8), napomena='Praznik')
+        response = self.client.get('/api/radno-vrijeme/', {
+            'salon': self.salon.id, 'datum_od': self.dan(0).isoformat(), 'datum_do': self.dan(6).isoformat(),
+        })
+        self.assertEqual([red['datum'] for red in response.data if red['datum']], [self.dan(1).isoformat()])
+        for parametar in ('datum_od', 'datum_do'):
+            response = self.client.get('/api/radno-vrijeme/', {parametar: '2026-13-01'})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(response.data, ['Datum nije ispravan.'])
+
+    # Provjera da red rasporeda ima dan ili datum, oba vremena i korake od 5 minuta
+    def test_validacija(self):
+        self.client.force_authenticate(user=self.admin)
+        neispravni = [
+            {'dan_u_tjednu': 1, 'datum': self.dan(1).isoformat(), 'vrijeme_od': '09:00', 'vrijeme_do': '10:00'},
+            {'dan_u_tjednu': 1},
+            {'dan_u_tjednu': 1, 'vrijeme_od': '10:00', 'vrijeme_do': '09:00'},
+            {'dan_u_tjednu': 1, 'vrijeme_od': '09:07', 'vrijeme_do': '10:00'},
+        ]
+        for podaci in neispravni:
+            response = self.client.post('/api/radno-vrijeme/', {'salon': self.salon.id, **podaci}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, podaci)
+
+        drugi_salon = Salon.objects.create(naziv='Drugi', adresa='Adresa', vlasnik=self.admin)
+        response = self.client.post('/api/radno-vrijeme/', {
+            'salon': drugi_salon.id, 'frizer': self.ana.id, 'datum': self.dan(1).isoformat(),
+        }, format='json')
+        self.assertEqual(response.data['non_field_errors'], ['Odabrani frizer ne pripada ovom salonu.'])
+
+
+# Testovi koji provjeravaju spremanje mreze slobodnih termina u cache i njeno ponistavanje
+class DostupnostCacheTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(username='admincache', password='test1234', is_staff=True)
+        self.korisnik = User.objects.create_user(username='korisnikcache', password='test1234')
+        self.salon = Salon.objects.create(
+            naziv='Salon Cache',
+            adresa='Adresa Cache',
+            vlasnik=self.admin,
+            radno_od=time(8, 0),
+            radno_do=time(10, 0),
+            trajanje_termina_min=30,
+        )
+        self.frizer = Frizer.objects.create(salon=self.salon, ime_prezime='Frizer Cache')
+        self.datum = date.today() + timedelta(days=1)
+        self.parametri = {'salon': self.salon.id, 'datum': self.datum.isoformat(), 'samo_slobodni': 'true'}
+
+    def slot(self, response, vrijeme_od):
+        return next(termin for termin in response.data if termin['vrijeme_od'] == vrijeme_od)
+
+    # Provjera da ponovljeni dohvat iste mreze treba samo upit za salon
+    def test_ponovljeni_dohvat_iz_cachea(self):
+        self.client.get('/api/termini/', self.parametri)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/termini/', self.parametri)
+        self.assertEqual(len(response.data), 4)
+
+    # Provjera da praznjenje cachea mreza (npr. izbacivanje zapisa kad je pun) ne mijenja brojace verzija
+    def test_verzije_odvojene_od_mreza(self):
+        verzija = verzija_mreze(self.salon.id)
+        caches[settings.DOSTUPNOST_CACHE].clear()
+        self.assertEqual(verzija_mreze(self.salon.id), verzija)
+
+    # Provjera da rezervacija i otkazivanje odmah mijenjaju spremljenu mrezu
+    def test_rezervacija_i_otkazivanje_ponistavaju_cache(self):
+        self.assertTrue(self.slot(self.client.get('/api/termini/', self.parametri), '09:00')['slobodan'])
+
+        self.client.force_authenticate(user=self.korisnik)
+        response = self.client.post('/api/rezervacije/', {
+            'salon': self.salon.id,
+            'datum': self.datum.isoformat(),
+            'vrijeme_od': '09:00',
+            'vrijeme_do': '09:30',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(self.slot(self.client.get('/api/termini/', self.parametri), '09:00')['slobodan'])
+
+        self.client.post(f"/api/rezervacije/{response.data['id']}/otkazi/")
+        self.assertTrue(self.slot(self.client.get('/api/termini/', self.parametri), '09:00')['slobodan'])
+
+    # Provjera da dodavanje frizera ponistava sve spremljene dane salona
+    def test_novi_frizer_ponistava_cache(self):
+        self.assertEqual(self.slot(self.client.get('/api/termini/', self.parametri), '08:00')['ukupno_mjesta'], 1)
+        Frizer.objects.create(salon=self.salon, ime_prezime='Frizer Novi')
+        self.assertEqual(self.slot(self.client.get('/api/termini/', self.parametri), '08:00')['ukupno_mjesta'], 2)
+
+
+
+# Testovi koji provjeravaju ETag i odgovor 304 za ponovljene dohvate
+class UvjetniZahtjeviTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(username='adminetag', password='test1234', is_staff=True)
+        self.korisnik = User.objects.create_user(username='korisniketag', password='test1234')
+        self.salon = Salon.objects.create(
+            naziv='Salon Etag',
+            adresa='Adresa Etag',
+            vlasnik=self.admin,
+            radno_od=time(8, 0),
+            radno_do=time(10, 0),
+            trajanje_termina_min=30,
+        )
+        self.drugi_salon = Salon.objects.create(naziv='Salon Drugi Etag', adresa='Adresa', vlasnik=self.admin)
+        self.frizer = Frizer.objects.create(salon=self.salon, ime_prezime='Frizer Etag')
+        self.datum = date.today() + timedelta(days=1)
+        self.mreza = {'salon': self.salon.id, 'datum': self.datum.isoformat(), 'samo_slobodni': 'true'}
+
+    def uvjetno(self, adresa, parametri, etag):
+        return self.client.get(adresa, parametri, HTTP_IF_NONE_MATCH=etag)
+
+    # Provjera da nepromijenjena mreza vraca 304 bez ijednog upita, a rezervacija mijenja ETag
+    def test_mreza_termina(self):
+        response = self.client.get('/api/termini/', self.mreza)
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            response = self.uvjetno('/api/termini/', self.mreza, etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+        rezerviraj(
+            self.korisnik,
+            salon=self.salon,
+            datum=self.datum,
+            vrijeme_od=time(9, 0),
+            vrijeme_do=time(9, 30),
+        )
+        response = self.uvjetno('/api/termini/', self.mreza, etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    # Provjera da drugi oblik ili format odgovora ima drugi ETag
+    def test_etag_ovisi_o_obliku(self):
+        etag = self.client.get('/api/termini/', self.mreza)['ETag']
+        response = self.uvjetno('/api/termini/', {**self.mreza, 'oblik': 'stupci'}, etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    # Provjera da izmjena salona mijenja ETag popisa salona
+    def test_popis_salona(self):
+        response = self.client.get('/api/saloni/')
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.uvjetno('/api/saloni/', {}, etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.drugi_salon.opis = 'Novi opis'
+        self.drugi_salon.save()
+        self.assertEqual(self.uvjetno('/api/saloni/', {}, etag).status_code, status.HTTP_200_OK)
+
+    # Provjera da ETag frizera jednog salona ne ovisi o promjenama drugih salona
+    def test_frizeri_salona(self):
+        parametri = {'salon': self.salon.id}
+        etag = self.client.get('/api/frizeri/', parametri)['ETag']
+
+        Frizer.objects.create(salon=self.drugi_salon, ime_prezime='Frizer Drugi')
+        self.assertEqual(self.uvjetno('/api/frizeri/', parametri, etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Frizer.objects.create(salon=self.salon, ime_prezime='Frizer Novi')
+        response = self.uvjetno('/api/frizeri/', parametri, etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 2)
+
+    # Provjera da admin i drugi korisnik ne dijele ETag
+    def test_etag_ovisi_o_korisniku(self):
+        etag = self.client.get('/api/saloni/')['ETag']
+        self.client.force_authenticate(user=self.admin)
+        self.assertEqual(self.uvjetno('/api/saloni/', {}, etag).status_code, status.HTTP_200_OK)
+
+
+
+# Testovi koji provjeravaju obavijesti o promjeni slobodnih mjesta (SSE)
+class ObavijestiTerminaTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='adminsse', password='test1234', is_staff=True)
+        self.korisnik = User.objects.create_user(username='korisniksse', password='test1234')
+        self.salon = Salon.objects.create(
+            naziv='Salon SSE',
+            adresa='Adresa SSE',
+            vlasnik=self.admin,
+            radno_od=time(8, 0),
+            radno_do=time(10, 0),
+            trajanje_termina_min=30,
+        )
+        Frizer.objects.create(salon=self.salon, ime_prezime='Frizer SSE 1')
+        Frizer.objects.create(salon=self.salon, ime_prezime='Frizer SSE 2')
+        self.datum = date.today() + timedelta(days=1)
+        self.broker = LokalniBroker()
+        self.petlja = asyncio.new_event_loop()
+        self.addCleanup(self.petlja.close)
+
+    def pretplati(self, datum):
+        return self.petlja.run_until_complete(self.broker.pretplati([kanal_dana(self.salon.id, datum)]))
+
+    def primi(self, pretplata):
+        return self.petlja.run_until_complete(pretplata.primi(0.1))
+
+    # Provjera da pretplatnik dana dobiva novo stanje termina nakon rezervacije i otkazivanja
+    def test_rezervacija_i_otkazivanje(self):
+        pretplata = self.pretplati(self.datum)
+        with mock.patch('rezervacije.obavijesti.broker', return_value=self.broker):
+            with self.captureOnCommitCallbacks(execute=True):
+                rezervacija = rezerviraj(
+                    self.korisnik,
+                    salon=self.salon,
+                    datum=self.datum,
+                    vrijeme_od=time(9, 0),
+                    vrijeme_do=time(9, 30),
+                )
+            poruka = self.primi(pretplata)
+            self.assertEqual(poruka['vrijeme_od'], '09:00')
+            self.assertEqual(poruka['slobodnih_mjesta'], 1)
+            self.assertEqual(poruka['ukupno_mjesta'], 2)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                termin = rezervacija.termin
+                termin.slobodan = True
+                termin.save(update_fields=['slobodan'])
+        self.assertEqual(self.primi(pretplata)['slobodnih_mjesta'], 2)
+
+    # Provjera da promjena drugog dana ne stize pretplatniku, a bez pretplatnika se stanje ne racuna
+    def test_samo_pretplaceni_dan(self):
+        pretplata = self.pretplati(self.datum)
+        with mock.patch('rezervacije.obavijesti.broker', return_value=self.broker):
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                rezerviraj(
+                    self.korisnik,
+                    salon=self.salon,
+                    datum=self.datum + timedelta(days=1),
+                    vrijeme_od=time(9, 0),
+                    vrijeme_do=time(9, 30),
+                )
+            self.assertTrue(callbacks)
+        self.assertIsNone(self.primi(pretplata))
+
+        self.petlja.run_until_complete(pretplata.zatvori())
+        self.assertFalse(self.broker.ima_pretplatnika(kanal_dana(self.salon.id, self.datum)))
+
+    # Provjera da nedostupan broker nakon commita ne rusi rezervaciju, nego se greska zapisuje u log
+    def test_greska_brokera_ne_rusi_rezervaciju(self):
+        client = APIClient()
+        client.force_authenticate(user=self.korisnik)
+        neispravan_broker = mock.Mock()
+        neispravan_broker.ima_pretplatnika.side_effect = ConnectionError('Redis nije dostupan')
+        with mock.patch('rezervacije.obavijesti.broker', return_value=neispravan_broker):
+            with self.assertLogs('django', 'ERROR'), self.captureOnCommitCallbacks(execute=True):
+                response = client.post('/api/rezervacije/', {
+                    'salon': self.salon.id,
+                    'datum': self.datum.isoformat(),
+                    'vrijeme_od': '09:00',
+                    'vrijeme_do': '09:30',
+                }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Rezervacija.objects.filter(pk=response.data['id']).exists())
+
+    # Provjera da SSE endpoint otvara tok dogadaja i odbija neispravan zahtjev
+    async def test_sse_endpoint(self):
+        response = await self.async_client.get('/api/termini/dogadaji/', {
+            'salon': self.salon.id,
+            'datum': self.datum.isoformat(),
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(await anext(response.streaming_content), b'retry: 3000\n\n')
+        await response.streaming_content.aclose()
+
+        response = await self.async_client.get('/api/termini/dogadaji/', {'salon': self.salon.id, 'datum': 'x'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = await self.async_client.get('/api/termini/dogadaji/', {
+            'salon': self.salon.id + 1000,
+            'datum': self.datum.isoformat(),
+        })
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+# Testovi koji kroz EXPLAIN provjeravaju da planer koristi indekse za najcesce upite
+class IndeksiTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='adminindeksi', password='test1234', is_staff=True)
+        self.korisnik = User.objects.create_user(username='korisnikindeksi', password='test1234')
+        self.salon = Salon.objects.create(naziv='Salon Indeksi', adresa='Adresa', vlasnik=self.admin)
+        self.frizer = Frizer.objects.create(salon=self.salon, ime_prezime='Frizer Indeksi')
+
+    def plan(self, queryset):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            self.skipTest('EXPLAIN provjera podrzana je samo za SQLite i PostgreSQL.')
+        if connection.vendor == 'postgresql':
+            # Na maloj testnoj tablici PostgreSQL bi ionako odabrao sekvencijalno citanje
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    # Provjera da agregacija zauzeca za mrezu slobodnih termina koristi djelomicni indeks
+    def test_indeks_mreze_termina(self):
+        queryset = (
+            Termin.objects.filter(
+                salon_id=self.salon.id,
+                datum__range=(date(2026, 3, 1), date(2026, 3, 7)),
+                slobodan=False,
+            )
+            .values('datum', 'vrijeme_od', 'vrijeme_do')
+            .annotate(ukupno=Count('id'))
+        )
+        self.assertIn('termin_zauzet_salon_datum_idx', self.plan(queryset))
+
+    # Provjera da odabir slobodnog frizera pri rezervaciji (upit iz alokacija._kandidati, s provjerom
+    # preklapanja sa zauzetim terminima) koristi isti indeks
+    def test_indeks_zauzetih_frizera(self):
+        queryset = _kandidati(self.salon, date(2026, 3, 1), time(9, 0), time(9, 30), [self.frizer.id])
+        self.assertIn('termin_zauzet_salon_datum_idx', self.plan(queryset))
+
+    # Provjera da popis slobodnih termina salona za dan koristi indeks salona i datuma
+    def test_indeks_popisa_termina(self):
+        queryset = Termin.objects.filter(
+            salon_id=self.salon.id,
+            datum=date(2026, 3, 1),
+            slobodan=True,
+        ).order_by('datum', 'vrijeme_od')
+        self.assertIn('termin_salon_datum_idx', self.plan(queryset))
+
+    # Provjera da provjera postojece rezervacije korisnika koristi indeks korisnika i statusa
+    def test_indeks_rezervacija_korisnika(self):
+        queryset = Rezervacija.objects.filter(korisnik=self.korisnik, status='potvrdena')
+        self.assertIn('rezervacija_korisnik_stat_idx', self.plan(queryset))
+
+    # Provjera da trazenje korisnika po emailu kod prijave koristi indeks nad LOWER(email)
+    def test_indeks_emaila(self):
+        queryset = User.objects.alias(email_lower=Lower('email')).filter(email_lower='marko@test.com')
+        self.assertIn('korisnik_email_lower_idx', self.plan(queryset))
+
+
+# Testovi koji provjeravaju paginaciju, filtriranje i streaming admin pregleda rezervacija
+class AdminDashboardAPITest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(username='admindash', password='test1234', is_staff=True)
+        self.korisnik = User.objects.create_user(username='korisnikdash', password='test1234')
+        self.salon = Salon.objects.create(naziv='Salon Dash', adresa='Adresa Dash', vlasnik=self.admin)
+        self.frizer = Frizer.objects.create(salon=self.salon, ime_prezime='Frizer Dash')
+        for dan in range(1, 6):
+            termin = Termin.objects.create(
+                salon=self.salon,
+                frizer=self.frizer,
+                datum=date(2026, 3, dan),
+                vrijeme_od=time(9, 0),
+                vrijeme_do=time(9, 30),
+                slobodan=False,
+            )
+            Rezervacija.objects.create(
+                korisnik=self.korisnik,
+                termin=termin,
+                status='otkazana' if dan == 5 else 'potvrdena',
+            )
+        self.client.force_authenticate(user=self.admin)
+
+    # Provjera da bez parametara paginacije admin i dalje dobiva cijelu listu
+    def test_bez_paginacije(self):
+        response = self.client.get('/api/admin-dashboard/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 5)
+
+    # Provjera da paginacija po kursoru prolazi kroz sve rezervacije bez ponavljanja
+    def test_paginacija_kursorom(self):
+        response = self.client.get('/api/admin-dashboard/', {'page_size': 2})
+        ids = [rezervacija['id'] for rezervacija in response.data['results']]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            ids.extend(rezervacija['id'] for rezervacija in response.data['results'])
+        self.assertEqual(len(ids), 5)
+        self.assertEqual(len(set(ids)), 5)
+
+    # Provjera filtriranja po statusu i rasponu datuma termina
+    def test_filteri(self):
+        response = self.client.get('/api/admin-dashboard/', {'status': 'potvrdena', 'datum_od': '2026-03-02'})
+        self.assertEqual(len(response.data), 3)
+        response = self.client.get('/api/admin-dashboard/', {'datum_do': 'nije-datum'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    # Provjera da NDJSON streaming vraca jednu rezervaciju po retku
+    def test_ndjson_stream(self):
+        response = self.client.get('/api/admin-dashboard/', {'stream': 'ndjson'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        redovi = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(redovi), 5)
+        self.assertEqual(json.loads(redovi[0])['salon_naziv'], 'Salon Dash')
+
+    # Provjera da JSON streaming vraca ispravnu JSON listu
+    def test_json_stream(self):
+        response = self.client.get('/api/admin-dashboard/', {'stream': 'json', 'status': 'otkazana'})
+        podaci = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(podaci), 1)
+        self.assertEqual(podaci[0]['status'], 'otkazana')
+
+
+# Testovi koji provjeravaju statistiku salona za vlasnika
+class AdminStatistikaAPITest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(username='adminstat', password='test1234', is_staff=True)
+        self.korisnik = User.objects.create_user(username='korisnikstat', password='test1234')
+        # 08:00 - 10:00 po 30 minuta = 4 termina po frizeru dnevno
+        self.salon = Salon.objects.create(
+            naziv='Salon Stat',
+            adresa='Adresa Stat',
+            vlasnik=self.admin,
+            radno_od=time(8, 0),
+            radno_do=time(10, 0),
+            trajanje_termina_min=30,
+        )
+        self.frizer1 = Frizer.objects.create(salon=self.salon, ime_prezime='Ana Stat')
+        self.frizer2 = Frizer.objects.create(salon=self.salon, ime_prezime='Iva Stat')
+        rezervacije = [
+            (self.frizer1, time(9, 0), time(9, 30), 'potvrdena'),
+            (self.frizer2, time(9, 0), time(9, 30), 'potvrdena'),
+            (self.frizer1, time(8, 0), time(8, 30), 'potvrdena'),
+            (self.frizer2, time(8, 30), time(9, 0), 'otkazana'),
+        ]
+        for frizer, vrijeme_od, vrijeme_do, status_rezervacije in rezervacije:
+            termin = Termin.objects.create(
+                salon=self.salon,
+                frizer=frizer,
+                datum=date(2026, 3, 2),
+                vrijeme_od=vrijeme_od,
+                vrijeme_do=vrijeme_do,
+                slobodan=status_rezervacije == 'otkazana',
+            )
+            Rezervacija.objects.create(korisnik=self.korisnik, termin=termin, status=status_rezervacije)
+        self.client.force_authenticate(user=self.admin)
+        self.parametri = {'datum_od': '2026-03-02', 'datum_do': '2026-03-03'}
+
+    def provjeri_statistiku(self, salon):
+        self.assertEqual(salon['potvrdene'], 3)
+        self.assertEqual(salon['otkazane'], 1)
+        # 2 dana x 4 termina x 2 frizera = 16 mjesta
+        self.assertEqual(salon['ukupno_mjesta'], 16)
+        self.assertEqual(salon['popunjenost'], round(3 / 16, 4))
+        self.assertEqual(salon['vrsni_sati'][0], {'sat': 9, 'potvrdene': 2})
+        ana = next(frizer for frizer in salon['frizeri'] if frizer['frizer'] == self.frizer1.id)
+        self.assertEqual(ana['potvrdene'], 2)
+        self.assertEqual(ana['popunjenost'], 0.25)
+
+    # Provjera statistike izracunate izravno iz rezervacija, fiksnim brojem upita
+    # (saloni, frizeri, raspored aktivnih frizera i grupirane rezervacije)
+    def test_statistika_iz_rezervacija(self):
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/admin-statistika/', self.parametri)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.provjeri_statistiku(response.data['saloni'][0])
+
+    # Provjera da statistika iz dnevnih zbrojeva daje iste rezultate
+    def test_statistika_iz_dnevnih_zbrojeva(self):
+        call_command('osvjezi_statistiku', '--od', '2026-03-01', '--do', '2026-03-31', stdout=StringIO())
+        self.assertEqual(DnevnaStatistika.objects.count(), 4)
+        response = self.client.get('/api/admin-statistika/', {**self.parametri, 'dnevna': 'true'})
+        self.assertEqual(response.data['izvor'], 'dnevna_statistika')
+        self.provjeri_statistiku(response.data['saloni'][0])
+
+    # Provjera da ponudena mjesta slijede raspored: Iva drugi dan ne radi, a salon prvi dan radi do 09:30
+    def test_ponudena_mjesta_prema_rasporedu(self):
+        RadnoVrijeme.objects.create(salon=self.salon, frizer=self.frizer2, datum=date(2026, 3, 3))
+        RadnoVrijeme.objects.create(salon=self.salon, datum=date(2026, 3, 2), vrijeme_od=time(8, 0), vrijeme_do=time(9, 30))
+        salon = self.client.get('/api/admin-statistika/', self.parametri).data['saloni'][0]
+        # Prvi dan 3 termina x 2 frizera, drugi dan 4 termina samo za Anu
+        self.assertEqual(salon['ukupno_mjesta'], 10)
+        popunjenost = {frizer['frizer']: frizer['popunjenost'] for frizer in salon['frizeri']}
+        self.assertEqual(popunjenost, {self.frizer1.id: round(2 / 7, 4), self.frizer2.id: round(1 / 3, 4)})
+
+    # Provjera da obican korisnik nema pristup statistici
+    def test_statistika_samo_admin(self):
+        self.client.force_authenticate(user=self.korisnik)
+        response = self.client.get('/api/admin-statistika/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+# Testovi koji provjeravaju skupno otvaranje rasporeda salona
+class OtvoriRasporedTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(username='adminraspored', password='test1234', is_staff=True)
+        self.drugi_admin = User.objects.create_user(username='drugiraspored', password='test1234', is_staff=True)
+        # 08:00 - 10:00 po 30 minuta = 4 termina po frizeru dnevno
+        self.salon = Salon.objects.create(
+            naziv='Salon Raspored',
+            adresa='Adresa Raspored',
+            vlasnik=self.admin,
+            radno_od=time(8, 0),
+            radno_do=time(10, 0),
+            trajanje_termina_min=30,
+        )
+        self.frizer1 = Frizer.objects.create(salon=self.salon, ime_prezime='Frizer A')
+        self.frizer2 = Frizer.objects.create(salon=self.salon, ime_prezime='Frizer B')
+        Frizer.objects.create(salon=self.salon, ime_prezime='Frizer Neaktivan', aktivan=False)
+        self.url = f'/api/saloni/{self.salon.id}/otvori-raspored/'
+
+    # Provjera da se termini kreiraju za sve aktivne frizere, a ponovno otvaranje preskace postojece
+    def test_otvaranje_rasporeda(self):
+        self.client.force_authenticate(user=self.admin)
+        podaci = {'datum_od': '2026-03-02', 'datum_do': '2026-03-08'}
+        response = self.client.post(self.url, podaci, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['kreirano'], 7 * 4 * 2)
+        self.assertEqual(Termin.objects.filter(salon=self.salon).count(), 7 * 4 * 2)
+
+        response = self.client.post(self.url, {**podaci, 'datum_do': '2026-03-09'}, format='json')
+        self.assertEqual(response.data['kreirano'], 4 * 2)
+
+    # Provjera da se raspored moze otvoriti samo za odabrane frizere svog salona
+    def test_odabrani_frizeri(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post(self.url, {
+            'datum_od': '2026-03-02',
+            'datum_do': '2026-03-02',
+            'frizeri': [self.frizer1.id],
+        }, format='json')
+        self.assertEqual(response.data['kreirano'], 4)
+        self.assertFalse(Termin.objects.filter(frizer=self.frizer2).exists())
+
+    # Provjera da admin ne moze otvoriti raspored tudjeg salona
+    def test_tudji_salon(self):
+        self.client.force_authenticate(user=self.drugi_admin)
+        response = self.client.post(self.url, {'datum_od': '2026-03-02', 'datum_do': '2026-03-02'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    # Provjera naredbe za otvaranje rasporeda
+    def test_naredba(self):
+        call_command('otvori_raspored', self.salon.id, '--od', '2026-03-02', '--do', '2026-03-03', '--blok', '3', stdout=StringIO())
+        self.assertEqual(Termin.objects.filter(salon=self.salon).count(), 2 * 4 * 2)
+
+
+# Testovi koji provjeravaju generator testnih podataka
+class TestniPodaciTest(TestCase):
+    # Provjera da generator kreira trazeni broj redova i da su termini uskladeni s rezervacijama
+    def test_generiranje(self):
+        rezultat = generiraj_testne_podatke(
+            broj_salona=5,
+            frizera_po_salonu=3,
+            broj_dana=2,
+            broj_korisnika=10,
+            popunjenost=0.5,
+            seed=42,
+            velicina_bloka=50,
+        )
+        self.assertEqual(Salon.objects.count(), 5)
+        self.assertEqual(Frizer.objects.count(), 15)
+        # 08:00 - 16:00 po 30 minuta = 16 termina po frizeru dnevno
+        self.assertEqual(Termin.objects.count(), 5 * 3 * 2 * 16)
+        self.assertEqual(Rezervacija.objects.count(), rezultat['rezervacije'])
+        self.assertGreater(rezultat['rezervacije'], 0)
+        self.assertEqual(
+            Termin.objects.filter(slobodan=False).count(),
+            Rezervacija.objects.filter(status='potvrdena').count(),
+        )
+        self.assertFalse(Termin.objects.filter(slobodan=False, rezervacija__isnull=True).exists())
+
+
+# Testovi koji provjeravaju dodjelu frizera pri rezervaciji i stres test istovremenih rezervacija
+class DodjelaFrizeraTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(username='admindodjela', password='test1234', is_staff=True)
+        self.salon = Salon.objects.create(
+            naziv='Salon Dodjela',
+            adresa='Adresa Dodjela',
+            vlasnik=self.admin,
+            radno_od=time(8, 0),
+            radno_do=time(16, 0),
+            trajanje_termina_min=30,
+        )
+        self.frizeri = [
+            Frizer.objects.create(salon=self.salon, ime_prezime=f'Frizer {broj}') for broj in range(3)
+        ]
+        self.podaci = {
+            'salon': self.salon.id,
+            'datum': (date.today() + timedelta(days=1)).isoformat(),
+            'vrijeme_od': '10:00',
+            'vrijeme_do': '10:30',
+        }
+
+    def rezerviraj(self, korisnik):
+        self.client.force_authenticate(user=korisnik)
+        return self.client.post('/api/rezervacije/', self.podaci, format='json')
+
+    # Provjera da svaki korisnik dobiva drugog frizera dok ima slobodnih mjesta
+    def test_svaki_korisnik_dobiva_drugog_frizera(self):
+        korisnici = [User.objects.create_user(username=f'dodjela{broj}', password='x') for broj in range(4)]
+        odgovori = [self.rezerviraj(korisnik) for korisnik in korisnici]
+        self.assertEqual([odgovor.status_code for odgovor in odgovori[:3]], [status.HTTP_201_CREATED] * 3)
+        self.assertEqual(odgovori[3].status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            set(Termin.objects.filter(slobodan=False).values_list('frizer_id', flat=True)),
+            {frizer.id for frizer in self.frizeri},
+        )
+
+    # Provjera da isti korisnik ne moze dvaput rezervirati isti termin
+    def test_korisnik_ne_moze_dvaput(self):
+        korisnik = User.objects.create_user(username='dodjeladvaput', password='x')
+        self.assertEqual(self.rezerviraj(korisnik).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.rezerviraj(korisnik).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Rezervacija.objects.filter(korisnik=korisnik).count(), 1)
+
+    # Provjera da otkazani termin ponovno dobiva sljedeci korisnik
+    def test_otkazani_termin_se_ponovno_dodjeljuje(self):
+        prvi = User.objects.create_user(username='dodjelaprvi', password='x')
+        drugi = User.objects.create_user(username='dodjeladrugi', password='x')
+        rezervacija_id = self.rezerviraj(prvi).data['id']
+        self.client.post(f'/api/rezervacije/{rezervacija_id}/otkazi/')
+        response = self.rezerviraj(drugi)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['id'], rezervacija_id)
+        self.assertEqual(Termin.objects.filter(salon=self.salon).count(), 1)
+
+    # Provjera da se slobodan termin zauzima uvjetnim UPDATE-om i INSERT-om rezervacije, bez zakljucavanja termina
+    # (uz zakljucavanje korisnika, provjeru postojece rezervacije, odabir frizera i savepoint testne transakcije)
+    def test_rezervacija_s_dvije_naredbe_za_pisanje(self):
+        korisnik = User.objects.create_user(username='dodjelaupiti', password='x')
+        datum = date.today() + timedelta(days=1)
+        for frizer in self.frizeri:
+            Termin.objects.create(
+                salon=self.salon, frizer=frizer, datum=datum, vrijeme_od=time(10, 0), vrijeme_do=time(10, 30)
+            )
+        # Rezervira se iz prikazane mreze dana, uz koju je spremljeno i radno vrijeme frizera
+        dohvati_slobodna_mjesta(self.salon, datum, datum)
+        with self.assertNumQueries(7):
+            rezervacija = rezerviraj(korisnik, salon=self.salon, datum=datum, vrijeme_od=time(10, 0), vrijeme_do=time(10, 30))
+        self.assertEqual(rezervacija.termin.frizer_id, self.frizeri[0].id)
+        self.assertFalse(Termin.objects.get(pk=rezervacija.termin_id).slobodan)
+
+    # Provjera da se nakon izgubljene utrke za frizera (termin zauzet izmedu odabira i UPDATE-a) pokusava sljedeci
+    def test_izgubljena_utrka_prelazi_na_sljedeceg_frizera(self):
+        korisnik = User.objects.create_user(username='dodjelautrka', password='x')
+        datum = date.today() + timedelta(days=1)
+        zauzet = Termin.objects.create(
+            salon=self.salon, frizer=self.frizeri[0], datum=datum,
+            vrijeme_od=time(10, 0), vrijeme_do=time(10, 30), slobodan=False,
+        )
+        zastarjeli_kandidati = [(self.frizeri[0].id, zauzet.id, None), (self.frizeri[1].id, None, None)]
+        with mock.patch('rezervacije.alokacija._kandidati', return_value=zastarjeli_kandidati):
+            rezervacija = rezerviraj(korisnik, salon=self.salon, datum=datum, vrijeme_od=time(10, 0), vrijeme_do=time(10, 30))
+        self.assertEqual(rezervacija.termin.frizer_id, self.frizeri[1].id)
+        self.assertEqual(Rezervacija.objects.filter(termin=zauzet).count(), 0)
+
+    # Provjera da se frizer koji je izmedu odabira i pisanja dobio zauzeti termin drugog trajanja preskace,
+    # i kad termin vec postoji (UPDATE) i kad se kreira (INSERT)
+    def test_zastarjeli_kandidat_s_preklapanjem(self):
+        korisnik = User.objects.create_user(username='dodjelapreklapanje', password='x')
+        datum = date.today() + timedelta(days=1)
+        for frizer in self.frizeri[:2]:
+            Termin.objects.create(
+                salon=self.salon, frizer=frizer, datum=datum,
+                vrijeme_od=time(10, 0), vrijeme_do=time(11, 0), slobodan=False,
+            )
+        slobodan = Termin.objects.create(
+            salon=self.salon, frizer=self.frizeri[0], datum=datum, vrijeme_od=time(10, 30), vrijeme_do=time(11, 0)
+        )
+        zastarjeli_kandidati = [(self.frizeri[0].id, slobodan.id, None)] + [
+            (frizer.id, None, None) for frizer in self.frizeri[1:]
+        ]
+        with mock.patch('rezervacije.alokacija._kandidati', return_value=zastarjeli_kandidati):
+            rezervacija = rezerviraj(korisnik, salon=self.salon, datum=datum, vrijeme_od=time(10, 30), vrijeme_do=time(11, 0))
+        self.assertEqual(rezervacija.termin.frizer_id, self.frizeri[2].id)
+        slobodan.refresh_from_db()
+        self.assertTrue(slobodan.slobodan)
+        self.assertFalse(Termin.objects.filter(frizer=self.frizeri[1], vrijeme_od=time(10, 30)).exists())
+
+    # Provjera da se odbija termin koji ne pocinje na pocetku termina u mrezi salona
+    def test_termin_izvan_mreze_salona(self):
+        self.podaci.update(vrijeme_od='10:15', vrijeme_do='10:45')
+        response = self.rezerviraj(User.objects.create_user(username='dodjelamreza', password='x'))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error'], 'Termin mora počinjati na početku termina salona.')
+        self.assertFalse(Termin.objects.exists())
+
+    # Provjera da se vec zauzet termin zadan ID-om ne moze rezervirati
+    def test_zauzet_termin_po_id(self):
+        korisnik = User.objects.create_user(username='dodjelaid', password='x')
+        termin = Termin.objects.create(
+            salon=self.salon, frizer=self.frizeri[0], datum=date.today() + timedelta(days=1),
+            vrijeme_od=time(10, 0), vrijeme_do=time(10, 30), slobodan=False,
+        )
+        self.client.force_authenticate(user=korisnik)
+        response = self.client.post('/api/rezervacije/', {'termin': termin.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error'], 'Termin više nije slobodan.')
+
+    # Provjera da termin koji je osoblje rucno oslobodilo ne preuzima tudu potvrdenu rezervaciju
+    def test_rucno_oslobodeni_termin_ne_preuzima_potvrdenu_rezervaciju(self):
+        prvi = User.objects.create_user(username='dodjelaoslobodeniprvi', password='x')
+        drugi = User.objects.create_user(username='dodjelaoslobodenidrugi', password='x')
+        rezervacija_id = self.rezerviraj(prvi).data['id']
+        termin = Termin.objects.get(rezervacija__id=rezervacija_id)
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.patch(f'/api/termini/{termin.id}/', {'slobodan': True}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.client.force_authenticate(user=drugi)
+        response = self.client.post('/api/rezervacije/', {'termin': termin.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error'], 'Termin više nije slobodan.')
+        rezervacija = Rezervacija.objects.get(pk=rezervacija_id)
+        self.assertEqual((rezervacija.korisnik, rezervacija.status), (prvi, 'potvrdena'))
+
+        # Dodjela po vremenu preskace takav termin i daje drugom korisniku drugog frizera
+        response = self.rezerviraj(drugi)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotEqual(response.data['id'], rezervacija_id)
+        self.assertNotEqual(Rezervacija.objects.get(pk=response.data['id']).termin_id, termin.id)
+        self.assertEqual(Rezervacija.objects.get(pk=rezervacija_id).korisnik, prvi)
+
+
+# Testna SQLite baza je u memoriji i dijeljena medu dretvama zakljucava cijele tablice,
+# pa se ovdje provjerava samo ispravnost naredbe s jednom dretvom; pravi stres test pokrece se nad bazom:
+#   python manage.py stres_rezervacija --zahtjeva 200 --dretvi 50
+class StresRezervacijaTest(TransactionTestCase):
+    # Provjera da stres test popuni sva mjesta, odbije ostale zahtjeve i pocisti za sobom
+    def test_stres_bez_dvostrukih_rezervacija(self):
+        izlaz = StringIO()
+        call_command('stres_rezervacija', '--zahtjeva', '20', '--dretvi', '1', '--frizera', '3', stdout=izlaz)
+        self.assertIn('Uspješne: 3, odbijene (termin zauzet): 17, greške: 0', izlaz.getvalue())
+        self.assertIn('Nema dvostrukih rezervacija.', izlaz.getvalue())
+        self.assertFalse(Salon.objects.exists())
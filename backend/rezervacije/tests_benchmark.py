@@ -0,0 +1,336 @@
+import json
+import os
+import random
+import statistics
+import time
+from datetime import date, datetime, time as vrijeme, timedelta
+
+from django.core.cache import caches
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from .models import Salon, Termin
+from .mreza import maska, mjesta_po_terminu, pocetci_termina
+from .testni_podaci import generiraj_testne_podatke
+
+
+# Benchmark API endpointa: mjeri latenciju (p50/p95/p99) i broj SQL upita po endpointu
+# kroz stvarne URL rute i DRF test klijent, nad generiranim skupom podataka.
+#
+# Budzet upita provjerava se uvijek (hvata N+1 regresije u serijalizatorima).
+# Latencija se provjerava samo uz BENCHMARK=1, jer ovisi o racunalu:
+#   BENCHMARK=1 python manage.py test rezervacije.tests_benchmark
+# Velicina podataka i broj ponavljanja: BENCHMARK_SALONI, BENCHMARK_FRIZERI, BENCHMARK_DANA,
+# BENCHMARK_KORISNICI, BENCHMARK_PONAVLJANJA.
+# Usporedba s prethodnim mjerenjem: BENCHMARK_BASELINE=putanja.json (BENCHMARK_SPREMI=1 zapisuje novo mjerenje),
+# test pada ako je p95 veci od baseline * (1 + BENCHMARK_TOLERANCIJA).
+
+def _env_int(naziv, zadano):
+    return int(os.environ.get(naziv, zadano))
+
+
+UKLJUCEN = os.environ.get('BENCHMARK') == '1'
+PONAVLJANJA = _env_int('BENCHMARK_PONAVLJANJA', 30 if UKLJUCEN else 5)
+TOLERANCIJA = float(os.environ.get('BENCHMARK_TOLERANCIJA', 0.25))
+
+# Najveci dopusteni broj SQL upita po zahtjevu
+BUDZET_UPITA = {
+    'saloni': 1,
+    'frizeri': 1,
+    'termini_mreza_hladna': 3,
+    'termini_mreza_cache': 1,
+    'rezervacije_lista': 1,
+    'rezervacije_kreiranje': 9,
+    'rezervacije_iz_mreze': 8,
+    'rezervacije_otkazivanje': 3,
+    'admin_dashboard_stranica': 1,
+}
+
+# Najveca dopustena p95 latencija u milisekundama (provjerava se samo uz BENCHMARK=1)
+BUDZET_LATENCIJE_MS = {
+    'saloni': 50,
+    'frizeri': 50,
+    'termini_mreza_hladna': 50,
+    'termini_mreza_cache': 20,
+    'rezervacije_lista': 100,
+    'rezervacije_kreiranje': 50,
+    'rezervacije_iz_mreze': 50,
+    'rezervacije_otkazivanje': 30,
+    'admin_dashboard_stranica': 50,
+}
+
+
+def percentil(vrijednosti, p):
+    if len(vrijednosti) == 1:
+        return vrijednosti[0]
+    return statistics.quantiles(vrijednosti, n=100, method='inclusive')[p - 1]
+
+
+class EndpointBenchmarkTest(TestCase):
+    rezultati = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.podaci = generiraj_testne_podatke(
+            broj_salona=_env_int('BENCHMARK_SALONI', 200 if UKLJUCEN else 20),
+            frizera_po_salonu=_env_int('BENCHMARK_FRIZERI', 5 if UKLJUCEN else 3),
+            broj_dana=_env_int('BENCHMARK_DANA', 30 if UKLJUCEN else 5),
+            broj_korisnika=_env_int('BENCHMARK_KORISNICI', 1000 if UKLJUCEN else 50),
+            popunjenost=0.3,
+            seed=1,
+            datum_od=timezone.localdate() + timedelta(days=1),
+        )
+        cls.admin = cls.podaci['admini'][0]
+        cls.korisnik = cls.podaci['korisnici'][0]
+        cls.salon = Salon.objects.filter(vlasnik=cls.admin).first()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        if not UKLJUCEN or not cls.rezultati:
+            return
+        print('\n{:<28} {:>8} {:>8} {:>8} {:>7}'.format('endpoint', 'p50 ms', 'p95 ms', 'p99 ms', 'upiti'))
+        for naziv, rezultat in sorted(cls.rezultati.items()):
+            print('{:<28} {:>8.2f} {:>8.2f} {:>8.2f} {:>7}'.format(
+                naziv, rezultat['p50'], rezultat['p95'], rezultat['p99'], rezultat['upiti']
+            ))
+        putanja = os.environ.get('BENCHMARK_BASELINE')
+        if putanja and os.environ.get('BENCHMARK_SPREMI') == '1':
+            with open(putanja, 'w') as datoteka:
+                json.dump(cls.rezultati, datoteka, indent=2)
+
+    # Mreze, raspored i brojaci verzija su u cacheu, pa svaki test krece od praznog cachea,
+    # neovisno o testovima koji su se izvrsili prije njega
+    def setUp(self):
+        for kes in caches.all():
+            kes.clear()
+        self.client = APIClient()
+
+    # Poziva zahtjev vise puta, biljezi latenciju i najveci broj upita te provjerava budzete
+    def izmjeri(self, naziv, zahtjev, ocekivani_status=status.HTTP_200_OK, priprema=None):
+        trajanja = []
+        najvise_upita = 0
+        for ponavljanje in range(PONAVLJANJA):
+            argumenti = priprema(ponavljanje) if priprema else ()
+            with CaptureQueriesContext(connection) as upiti:
+                pocetak = time.perf_counter()
+                response = zahtjev(*argumenti)
+                trajanja.append((time.perf_counter() - pocetak) * 1000)
+            self.assertEqual(response.status_code, ocekivani_status, response.data)
+            najvise_upita = max(najvise_upita, len(upiti.captured_queries))
+
+        rezultat = {
+            'p50': percentil(trajanja, 50),
+            'p95': percentil(trajanja, 95),
+            'p99': percentil(trajanja, 99),
+            'upiti': najvise_upita,
+        }
+        self.rezultati[naziv] = rezultat
+
+        self.assertLessEqual(
+            najvise_upita,
+            BUDZET_UPITA[naziv],
+            f'{naziv}: {najvise_upita} SQL upita, budzet je {BUDZET_UPITA[naziv]}',
+        )
+        if UKLJUCEN:
+            self.assertLessEqual(
+                rezultat['p95'],
+                BUDZET_LATENCIJE_MS[naziv],
+                f"{naziv}: p95 {rezultat['p95']:.2f} ms, budzet je {BUDZET_LATENCIJE_MS[naziv]} ms",
+            )
+            self.provjeri_baseline(naziv, rezultat)
+        return response
+
+    def provjeri_baseline(self, naziv, rezultat):
+        putanja = os.environ.get('BENCHMARK_BASELINE')
+        if not putanja or os.environ.get('BENCHMARK_SPREMI') == '1' or not os.path.exists(putanja):
+            return
+        with open(putanja) as datoteka:
+            baseline = json.load(datoteka).get(naziv)
+        if baseline:
+            granica = baseline['p95'] * (1 + TOLERANCIJA)
+            self.assertLessEqual(
+                rezultat['p95'],
+                granica,
+                f"{naziv}: p95 {rezultat['p95']:.2f} ms je sporiji od baseline {baseline['p95']:.2f} ms",
+            )
+
+    def datum(self, pomak=0):
+        return (timezone.localdate() + timedelta(days=1 + pomak)).isoformat()
+
+    def test_saloni(self):
+        self.izmjeri('saloni', lambda: self.client.get('/api/saloni/'))
+
+    def test_frizeri(self):
+        self.izmjeri('frizeri', lambda: self.client.get('/api/frizeri/', {'salon': self.salon.id}))
+
+    def test_termini_mreza(self):
+        saloni = list(Salon.objects.values_list('id', flat=True))
+        # Svako ponavljanje trazi drugi salon, pa se mjeri izracun bez cachea
+        self.izmjeri(
+            'termini_mreza_hladna',
+            lambda salon_id: self.client.get(
+                '/api/termini/', {'salon': salon_id, 'datum': self.datum(), 'samo_slobodni': 'true'}
+            ),
+            priprema=lambda ponavljanje: (saloni[ponavljanje % len(saloni)],),
+        )
+        # Prvi zahtjev sprema mrezu u cache, a mjere se sljedeci
+        parametri = {'salon': self.salon.id, 'datum': self.datum(), 'samo_slobodni': 'true'}
+        self.client.get('/api/termini/', parametri)
+        self.izmjeri('termini_mreza_cache', lambda: self.client.get('/api/termini/', parametri))
+
+    def test_rezervacije(self):
+        self.client.force_authenticate(user=self.korisnik)
+        self.izmjeri('rezervacije_lista', lambda: self.client.get('/api/rezervacije/'))
+
+        # Slotovi sa slobodnim frizerom u kojima korisnik jos nema potvrdenu rezervaciju
+        zauzeti_korisniku = set(
+            Termin.objects.filter(
+                salon=self.salon,
+                rezervacija__korisnik=self.korisnik,
+                rezervacija__status='potvrdena',
+            ).values_list('datum', 'vrijeme_od', 'vrijeme_do')
+        )
+        slobodni = [
+            slot for slot in dict.fromkeys(
+                Termin.objects.filter(salon=self.salon, slobodan=True)
+                .order_by('datum', 'vrijeme_od')
+                .values_list('datum', 'vrijeme_od', 'vrijeme_do')
+            )
+            if slot not in zauzeti_korisniku
+        ][:2 * PONAVLJANJA]
+        self.assertEqual(len(slobodni), 2 * PONAVLJANJA)
+        kreirane = []
+
+        def rezerviraj(datum, vrijeme_od, vrijeme_do):
+            response = self.client.post('/api/rezervacije/', {
+                'salon': self.salon.id,
+                'datum': datum.isoformat(),
+                'vrijeme_od': vrijeme_od.strftime('%H:%M'),
+                'vrijeme_do': vrijeme_do.strftime('%H:%M'),
+            }, format='json')
+            if response.status_code == status.HTTP_201_CREATED:
+                kreirane.append(response.data['id'])
+            return response
+
+        # Rezervacija dana koji nije u cacheu cita i raspored frizera (radno_vrijeme_frizera), jednim upitom vise
+        self.izmjeri(
+            'rezervacije_kreiranje',
+            rezerviraj,
+            ocekivani_status=status.HTTP_201_CREATED,
+            priprema=lambda ponavljanje: slobodni[ponavljanje],
+        )
+
+        # Uobicajeni tijek: korisnik rezervira iz prikazane mreze dana, uz koju je spremljen i raspored frizera
+        def iz_mreze(ponavljanje):
+            slot = slobodni[PONAVLJANJA + ponavljanje]
+            self.client.get('/api/termini/', {'salon': self.salon.id, 'datum': slot[0].isoformat(), 'samo_slobodni': 'true'})
+            return slot
+
+        self.izmjeri(
+            'rezervacije_iz_mreze',
+            rezerviraj,
+            ocekivani_status=status.HTTP_201_CREATED,
+            priprema=iz_mreze,
+        )
+        self.izmjeri(
+            'rezervacije_otkazivanje',
+            lambda rezervacija_id: self.client.post(f'/api/rezervacije/{rezervacija_id}/otkazi/'),
+            priprema=lambda ponavljanje: (kreirane[ponavljanje],),
+        )
+
+    def test_admin_dashboard(self):
+        self.client.force_authenticate(user=self.admin)
+        self.izmjeri('admin_dashboard_stranica', lambda: self.client.get('/api/admin-dashboard/', {'page_size': 50}))
+
+
+# Mikrobenchmark racunanja mreze (mreza.mjesta_po_terminu, kako ga za svaki dan poziva
+# dostupnost.izracunaj_slobodna_mjesta) bez baze i HTTP-a: mjesecna mreza za vise salona iz radnog vremena
+# i zauzeca frizera (i termina drugog trajanja), usporedena s racunanjem po terminu preko datetime intervala.
+# Ispravnost se provjerava uvijek, a brzina samo uz BENCHMARK=1.
+MREZA_SALONI = _env_int('BENCHMARK_MREZA_SALONI', 50 if UKLJUCEN else 3)
+MREZA_DANA = 31
+MREZA_FRIZERA = 5
+
+
+def _u_datetime(datum, minute):
+    return datetime.combine(datum, vrijeme()) + timedelta(minutes=minute)
+
+
+# Frizer je slobodan za termin ako radi cijeli termin i nijedno njegovo zauzece se s terminom ne preklapa
+def _referentna_mreza(datum, pocetci, trajanje, frizeri):
+    mjesta = []
+    for pocetak in pocetci:
+        od = _u_datetime(datum, pocetak)
+        do = od + timedelta(minutes=trajanje)
+        mjesta.append(sum(
+            1 for rad, zauzeca in frizeri
+            if rad and rad[0] <= od and do <= rad[1] and not any(z_od < do and z_do > od for z_od, z_do in zauzeca)
+        ))
+    return mjesta
+
+
+class MrezaBenchmarkTest(SimpleTestCase):
+    def setUp(self):
+        slucajno = random.Random(1)
+        datum_od = date(2026, 3, 1)
+        self.saloni = []
+        for _ in range(MREZA_SALONI):
+            trajanje = slucajno.choice([15, 20, 30, 45, 60])
+            pocetci = pocetci_termina(8 * 60, 20 * 60, trajanje)
+            dani = []
+            for dan in range(MREZA_DANA):
+                datum = datum_od + timedelta(days=dan)
+                bitmape, intervali = [], []
+                for _frizer in range(MREZA_FRIZERA):
+                    # Radno vrijeme u koracima od 5 minuta ili slobodan dan, a zauzeca su termini razlicitih trajanja
+                    rad = None
+                    if slucajno.random() < 0.85:
+                        rad = (slucajno.randrange(8 * 60, 11 * 60, 5), slucajno.randrange(15 * 60, 20 * 60 + 1, 5))
+                    zauzeca = []
+                    for pocetak in range(8 * 60, 20 * 60, 60):
+                        if slucajno.random() < 0.3:
+                            zauzeca.append((pocetak, pocetak + slucajno.choice([15, 30, 45, 60])))
+                    bitmape.append((
+                        maska(*rad) if rad else 0,
+                        sum(maska(z_od, z_do) for z_od, z_do in zauzeca),
+                    ))
+                    intervali.append((
+                        (_u_datetime(datum, rad[0]), _u_datetime(datum, rad[1])) if rad else None,
+                        [(_u_datetime(datum, z_od), _u_datetime(datum, z_do)) for z_od, z_do in zauzeca],
+                    ))
+                dani.append((datum, tuple(bitmape), intervali))
+            self.saloni.append((trajanje, pocetci, dani))
+
+    def izracunaj(self):
+        return [
+            [mjesta_po_terminu(bitmape, pocetci, trajanje) for _datum, bitmape, _intervali in dani]
+            for trajanje, pocetci, dani in self.saloni
+        ]
+
+    def izracunaj_referentno(self):
+        return [
+            [_referentna_mreza(datum, pocetci, trajanje, intervali) for datum, _bitmape, intervali in dani]
+            for trajanje, pocetci, dani in self.saloni
+        ]
+
+    def izmjeri(self, izracun):
+        trajanja = []
+        for _ in range(PONAVLJANJA):
+            pocetak = time.perf_counter()
+            izracun()
+            trajanja.append((time.perf_counter() - pocetak) * 1000)
+        return percentil(trajanja, 50)
+
+    def test_mreza(self):
+        self.assertEqual(self.izracunaj(), self.izracunaj_referentno())
+        if not UKLJUCEN:
+            return
+        mreza_ms = self.izmjeri(self.izracunaj)
+        referentno_ms = self.izmjeri(self.izracunaj_referentno)
+        print(f'\nmreza {MREZA_SALONI} salona x {MREZA_DANA} dana: {mreza_ms:.2f} ms (po terminu {referentno_ms:.2f} ms)')
+        self.assertLess(mreza_ms, referentno_ms)
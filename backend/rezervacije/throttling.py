@@ -0,0 +1,97 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+
+# Ogranicavanje prijava kliznim prozorom: svaki kljuc (IP adresa ili racun) smije potrositi `kapacitet` pokusaja
+# u prozoru od kapacitet / po_minuti minuta (vrijeme u kojem bi se prazan spremnik ponovno napunio).
+# Broje se pokusaji u trenutnom i prethodnom fiksnom prozoru, a prethodni se uzima razmjerno dijelu koji je jos
+# unutar kliznog prozora, pa se ogranicenje ne udvostrucuje na granici prozora.
+# Brojaci su u zasebnom cacheu (PRIJAVA_LIMITI_CACHE) i povecavaju se atomski naredbama add i incr,
+# pa istovremeni zahtjevi (i workeri koji dijele Redis) ne mogu potrositi vise pokusaja od dopustenog.
+def _kes():
+    return caches[getattr(settings, 'PRIJAVA_LIMITI_CACHE', 'default')]
+
+
+class KlizniProzor:
+    def __init__(self, naziv, kapacitet, po_minuti):
+        self.naziv = naziv
+        self.kapacitet = kapacitet
+        self.trajanje = kapacitet * 60 / po_minuti
+
+    def _kljuc(self, kljuc, prozor):
+        return f'limit:{self.naziv}:{kljuc}:{prozor}'
+
+    # Redni broj fiksnog prozora i dio njegova trajanja koji je protekao
+    def _prozor(self, sada):
+        prozor = int(sada // self.trajanje)
+        return prozor, sada / self.trajanje - prozor
+
+    # Pokusaji u trenutnom i prethodnom prozoru
+    def _brojevi(self, kljuc, prozor):
+        kljucevi = [self._kljuc(kljuc, prozor), self._kljuc(kljuc, prozor - 1)]
+        brojevi = _kes().get_many(kljucevi)
+        return brojevi.get(kljucevi[0], 0), brojevi.get(kljucevi[1], 0)
+
+    # Broj sekundi do sljedeceg dopustenog pokusaja ili 0 ako je pokusaj dopusten
+    def cekanje(self, kljuc):
+        prozor, proteklo = self._prozor(time.time())
+        trenutni, prethodni = self._brojevi(kljuc, prozor)
+        preostalo = self.kapacitet - 1 - trenutni
+        if prethodni * (1 - proteklo) <= preostalo:
+            return 0
+        if preostalo >= 0:
+            # Dovoljno je pricekati da se udio prethodnog prozora smanji
+            return self.trajanje * (1 - preostalo / prethodni - proteklo)
+        # Inace tek u sljedecem prozoru, kad trenutni postane prethodni
+        return self.trajanje * (1 - proteklo + 1 - (self.kapacitet - 1) / trenutni)
+
+    # Trosi jedan pokusaj; vraca False (bez trosenja) ako je ogranicenje dosegnuto
+    def potrosi(self, kljuc):
+        prozor, proteklo = self._prozor(time.time())
+        kes = _kes()
+        kljuc_prozora = self._kljuc(kljuc, prozor)
+        # Brojac treba dok je njegov prozor trenutni ili prethodni
+        kes.add(kljuc_prozora, 0, int(2 * self.trajanje) + 1)
+        trenutni = kes.incr(kljuc_prozora)
+        prethodni = kes.get(self._kljuc(kljuc, prozor - 1), 0)
+        if prethodni * (1 - proteklo) + trenutni > self.kapacitet:
+            kes.decr(kljuc_prozora)
+            return False
+        return True
+
+    # Vraca pokusaj potrosen u trenutnom prozoru (npr. nakon uspjesne prijave)
+    def vrati(self, kljuc):
+        prozor, _ = self._prozor(time.time())
+        try:
+            _kes().decr(self._kljuc(kljuc, prozor))
+        except ValueError:
+            # Prozor se u meduvremenu promijenio, a brojac novog prozora jos ne postoji
+            pass
+
+
+def _spremnik(naziv):
+    kapacitet, po_minuti = getattr(settings, 'PRIJAVA_LIMITI', {})[naziv]
+    return KlizniProzor(naziv, kapacitet, po_minuti)
+
+
+# Neuspjele prijave po racunu (emailu); uspjesna prijava ne trosi pokusaje
+def spremnik_racuna():
+    return _spremnik('racun')
+
+
+# Svi pokusaji prijave i registracije s iste IP adrese
+class PrijavaIPThrottle(BaseThrottle):
+    def allow_request(self, request, view):
+        spremnik = _spremnik('ip')
+        self.ident = self.get_ident(request)
+        if spremnik.potrosi(self.ident):
+            self.cekanje = None
+            return True
+        self.cekanje = spremnik.cekanje(self.ident)
+        return False
+
+    def wait(self):
+        return self.cekanje
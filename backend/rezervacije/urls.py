@@ -3,10 +3,14 @@ from rest_framework.routers import DefaultRouter
 
 from .views import (
     admin_dashboard,
+    admin_statistika,
+    dogadaji_termina,
+    odjava,
     prijava,
     registracija,
     SalonViewSet,
     FrizerViewSet,
+    RadnoVrijemeViewSet,
     TerminViewSet,
     RezervacijaViewSet,
 )
@@ -14,12 +18,16 @@ from .views import (
 router = DefaultRouter()
 router.register('saloni', SalonViewSet, basename='saloni')
 router.register('frizeri', FrizerViewSet, basename='frizeri')
+router.register('radno-vrijeme', RadnoVrijemeViewSet, basename='radno-vrijeme')
 router.register('termini', TerminViewSet, basename='termini')
 router.register('rezervacije', RezervacijaViewSet, basename='rezervacije')
 
 urlpatterns = [
     path('auth/registracija/', registracija, name='registracija'),
     path('auth/prijava/', prijava, name='prijava'),
+    path('auth/odjava/', odjava, name='odjava'),
     path('admin-dashboard/', admin_dashboard, name='admin-dashboard'),
+    path('admin-statistika/', admin_statistika, name='admin-statistika'),
+    path('termini/dogadaji/', dogadaji_termina, name='dogadaji-termina'),
     path('', include(router.urls)),
 ]
@@ -0,0 +1,61 @@
+import hashlib
+
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+
+# Uvjetni GET zahtjevi (If-None-Match): ETag se racuna iz brojaca verzija u cacheu (dostupnost.py),
+# adrese zahtjeva, korisnika i formata odgovora, pa se nepromijenjeni odgovor (304) vraca bez upita u bazu
+# i bez serijalizacije. Korisnik je dio ETaga jer admin vidi samo svoje salone.
+def izracunaj_etag(request, verzije):
+    korisnik = request.user.pk if request.user.is_authenticated else ''
+    dijelovi = (*verzije, korisnik, request.accepted_media_type, request.get_full_path())
+    return quote_etag(hashlib.sha1('|'.join(str(dio) for dio in dijelovi).encode()).hexdigest())
+
+
+# Slaba usporedba ETagova (RFC 9110), kao u Djangovom ConditionalGetMiddleware
+def nije_promijenjeno(request, etag):
+    zaglavlje = request.headers.get('If-None-Match')
+    if not zaglavlje:
+        return False
+    etagovi = parse_etags(zaglavlje)
+    if '*' in etagovi:
+        return True
+    return etag.removeprefix('W/') in {poslani.removeprefix('W/') for poslani in etagovi}
+
+
+def oznaci_odgovor(response, etag):
+    response['ETag'] = etag
+    patch_vary_headers(response, ('Accept', 'Authorization'))
+    return response
+
+
+# Vraca 304 ako klijent vec ima odgovor s istim ETagom, inace izvodi view i dodaje ETag uspjesnom odgovoru
+def uvjetni_odgovor(request, verzije, izvedi):
+    etag = izracunaj_etag(request, verzije)
+    if nije_promijenjeno(request, etag):
+        return oznaci_odgovor(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+    response = izvedi()
+    if response.status_code != status.HTTP_200_OK:
+        return response
+    return oznaci_odgovor(response, etag)
+
+
+# Viewset navodi verzije o kojima ovise list i retrieve (verzije_etaga); None znaci bez ETaga
+class UvjetniZahtjevMixin:
+    def verzije_etaga(self):
+        return None
+
+    def _uvjetno(self, izvedi, request, *args, **kwargs):
+        verzije = self.verzije_etaga() if request.method in ('GET', 'HEAD') else None
+        if verzije is None:
+            return izvedi(request, *args, **kwargs)
+        return uvjetni_odgovor(request, verzije, lambda: izvedi(request, *args, **kwargs))
+
+    def list(self, request, *args, **kwargs):
+        return self._uvjetno(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._uvjetno(super().retrieve, request, *args, **kwargs)
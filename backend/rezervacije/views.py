@@ -1,36 +1,70 @@
-from django.contrib.auth import authenticate
-from django.contrib.auth.models import User
-from django.db import transaction
-from django.db.models import Count
+import json
+import math
+
+from django.db.models import Prefetch, Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.http import require_GET
 from datetime import datetime, timedelta
 from rest_framework import status, viewsets
 from rest_framework.authtoken.models import Token
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import action, api_view, authentication_classes, permission_classes, throttle_classes
 from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
-
-from .models import Salon, Frizer, Termin, Rezervacija
+from rest_framework.settings import api_settings
+
+from .alokacija import GreskaRezervacije, rezerviraj
+from .authentication import PotpisaniToken, izdaj_token, korisnik_po_emailu, opozovi_token
+from .dostupnost import (
+    dohvati_slobodne_termine,
+    pocetci_termina,
+    ponisti_dan,
+    prvi_slobodni_termini,
+    slobodni_frizeri,
+    stupci_slobodnih_termina,
+    verzija_kataloga,
+    verzija_mreze,
+    verzije_salona,
+)
+from .lokacije import MAKS_RADIJUS_KM, saloni_u_blizini
+from .models import Salon, Frizer, RadnoVrijeme, Termin, Rezervacija
+from .mreza import minute
+from .obavijesti import broker, javi_promjenu, kanal_dana
+from .pagination import KursorPaginacija
+from .polja import OdabranaPoljaMixin, odabrana_polja, suzi_zapis
 from .permissions import IsAdminOrReadOnly
+from .pretraga import pretrazi_salone
+from .raspored import otvori_raspored
+from .renderers import MSGPACK_RENDERERI
 from .serializers import (
     UserRegisterSerializer,
     SalonSerializer,
+    SalonSFrizerimaSerializer,
     FrizerSerializer,
+    RadnoVrijemeSerializer,
     TerminSerializer,
     RezervacijaSerializer,
+    OtvoriRasporedSerializer,
 )
+from .statistika import izracunaj_statistiku
+from .throttling import PrijavaIPThrottle, spremnik_racuna
+from .uvjetni import UvjetniZahtjevMixin, uvjetni_odgovor
 
  
+# Prijava i registracija ne provjeravaju poslani token, kako istekao ili opozvan token ne bi sprijecio novu prijavu
 @api_view(['POST'])
+@authentication_classes([])
 @permission_classes([AllowAny])
+@throttle_classes([PrijavaIPThrottle])
 def registracija(request):
     serializer = UserRegisterSerializer(data=request.data)
     if serializer.is_valid():
         user = serializer.save()
-        token, _ = Token.objects.get_or_create(user=user)
         return Response(
             {
-                'token': token.key,
+                'token': izdaj_token(user),
                 'user': {
                     'id': user.id,
                     'username': user.username,
@@ -45,20 +79,34 @@ def registracija(request):
 
 
 @api_view(['POST'])
+@authentication_classes([])
 @permission_classes([AllowAny])
+@throttle_classes([PrijavaIPThrottle])
 def prijava(request):
-    email = request.data.get('email', '').strip()
+    email = request.data.get('email', '').strip().lower()
     password = request.data.get('password')
-    user = User.objects.filter(email__iexact=email).first() if email else None
-    user = authenticate(username=user.username, password=password) if user else None
+    # Prazni podaci i racun s previse neuspjelih prijava odbijaju se prije racunanja hasha lozinke
+    if not email or not password:
+        return Response({'error': 'Neispravni podaci za prijavu.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Pokusaj se trosi atomski prije provjere lozinke, pa istovremeni zahtjevi ne mogu provjeriti vise
+    # lozinki od dopustenog; uspjesna prijava vraca potroseni pokusaj
+    spremnik = spremnik_racuna()
+    if not spremnik.potrosi(email):
+        return Response(
+            {'error': 'Previše neuspjelih prijava. Pokušajte ponovno kasnije.'},
+            status=status.HTTP_429_TOO_MANY_REQUESTS,
+            headers={'Retry-After': str(math.ceil(spremnik.cekanje(email)))},
+        )
 
-    if not user:
+    user = korisnik_po_emailu(email)
+    if not user or not user.is_active or not user.check_password(password):
         return Response({'error': 'Neispravni podaci za prijavu.'}, status=status.HTTP_400_BAD_REQUEST)
+    spremnik.vrati(email)
 
-    token, _ = Token.objects.get_or_create(user=user)
     return Response(
         {
-            'token': token.key,
+            'token': izdaj_token(user),
             'user': {
                 'id': user.id,
                 'username': user.username,
@@ -70,9 +118,26 @@ def prijava(request):
     )
 
 
-class SalonViewSet(viewsets.ModelViewSet):
-    queryset = Salon.objects.all().order_by('naziv')
+# Odjava brise token, pa se mora ponovno prijaviti (token se uklanja i iz cachea autentikacije),
+# a potpisani token se upisuje u listu opoziva
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def odjava(request):
+    if isinstance(request.auth, PotpisaniToken):
+        opozovi_token(request.auth)
+    Token.objects.filter(user=request.user).delete()
+    return Response({'success': 'Odjava je uspješna.'})
+
+
+# Pretraga po udaljenosti: zadani i najveci broj salona u odgovoru
+BLIZINA_BROJ = 20
+MAKS_BLIZINA_BROJ = 100
+
+
+class SalonViewSet(UvjetniZahtjevMixin, OdabranaPoljaMixin, viewsets.ModelViewSet):
+    queryset = Salon.objects.select_related('vlasnik').order_by('naziv')
     serializer_class = SalonSerializer
+    kursor_poredak = ('naziv', 'id')
 
     # Samo admin može mijenjati podatke, ostali mogu samo čitati
     permission_classes = [IsAdminOrReadOnly]
@@ -88,15 +153,112 @@ class SalonViewSet(viewsets.ModelViewSet):
             # Obični korisnik vidi samo aktivne salone
             queryset = queryset.filter(aktivan=True)
 
+        # Saloni zajedno s frizerima (?frizeri=true): svi frizeri dohvacaju se jednim dodatnim upitom
+        if self.s_frizerima():
+            queryset = queryset.prefetch_related(Prefetch('frizeri', queryset=Frizer.objects.order_by('ime_prezime')))
+
+        # Pretraga po nazivu, adresi i opisu bez obzira na dijakritike, rangirana po relevantnosti
         q = self.request.query_params.get('q')
         if q:
-            queryset = queryset.filter(naziv__icontains=q)
+            queryset = pretrazi_salone(queryset, q)
         return queryset
 
+    # Saloni oko lokacije (?lokacija=45.81,15.98): najblizih `broj` (zadano 20) ili svi unutar `radijus` km,
+    # od najblizeg, uz udaljenost_km. Kandidati dolaze iz prostornog indeksa (lokacije.py), a iz baze
+    # se ucitavaju samo oni, uz sve ostale filtre popisa. Indeks sadrzi sve aktivne salone, pa se uz pretragu (?q=)
+    # i za admina (vidi samo svoje salone, i neaktivne) udaljenost racuna za vec suzeni queryset.
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        lokacija = self.request.query_params.get('lokacija')
+        if self.action != 'list' or not lokacija:
+            return queryset
+
+        try:
+            sirina, duzina = (float(dio) for dio in lokacija.split(','))
+            radijus = self.request.query_params.get('radijus')
+            radijus = float(radijus) if radijus else None
+            broj = int(self.request.query_params.get('broj', BLIZINA_BROJ))
+        except ValueError:
+            raise ValidationError('Lokacija nije ispravna.')
+        if not (-90 <= sirina <= 90 and -180 <= duzina <= 180) or not 1 <= broj <= MAKS_BLIZINA_BROJ:
+            raise ValidationError('Lokacija nije ispravna.')
+        if radijus is not None and not 0 < radijus <= MAKS_RADIJUS_KM:
+            raise ValidationError(f'Radijus mora biti između 0 i {MAKS_RADIJUS_KM:g} km.')
+
+        suzeni = self.request.query_params.get('q') or self.request.user.is_staff
+        blizu = saloni_u_blizini(sirina, duzina, broj, radijus, queryset if suzeni else None)
+        saloni = {salon.id: salon for salon in queryset.filter(id__in=[salon_id for _udaljenost, salon_id in blizu])}
+        rezultat = []
+        for udaljenost, salon_id in blizu:
+            salon = saloni.get(salon_id)
+            if salon is not None:
+                salon.udaljenost_km = round(udaljenost, 3)
+                rezultat.append(salon)
+        return rezultat
+
+    # Rezultati pretrage poredani su po relevantnosti ili udaljenosti, koju kursor po nazivu ne moze zadrzati
+    def paginate_queryset(self, queryset):
+        if self.request.query_params.get('q') or self.request.query_params.get('lokacija'):
+            return None
+        return super().paginate_queryset(queryset)
+
+    # Popis i detalji salona (s frizerima) mijenjaju se samo s promjenom nekog salona ili frizera
+    def verzije_etaga(self):
+        return (verzija_kataloga(),)
+
+    def s_frizerima(self):
+        return self.action in ('list', 'retrieve') and self.request.query_params.get('frizeri') == 'true'
+
+    def get_serializer_class(self):
+        if self.s_frizerima():
+            return SalonSFrizerimaSerializer
+        return super().get_serializer_class()
+
     def perform_create(self, serializer):
         # Automatski postavi trenutnog korisnika kao vlasnika salona
         serializer.save(vlasnik=self.request.user)
 
+    # Skupno otvaranje termina za raspon datuma (POST /api/saloni/<id>/otvori-raspored/)
+    @action(detail=True, methods=['post'], url_path='otvori-raspored')
+    def otvori_raspored(self, request, pk=None):
+        salon = self.get_object()
+        serializer = OtvoriRasporedSerializer(data=request.data, context={'salon': salon})
+        serializer.is_valid(raise_exception=True)
+
+        frizeri = serializer.validated_data.get('frizeri') or list(salon.frizeri.filter(aktivan=True))
+        if not frizeri:
+            return Response({'error': 'Salon nema aktivnih zaposlenika.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        kreirano = otvori_raspored(
+            salon,
+            frizeri,
+            serializer.validated_data['datum_od'],
+            serializer.validated_data['datum_do'],
+        )
+        return Response({'kreirano': kreirano}, status=status.HTTP_201_CREATED)
+
+
+# Velicina bloka pri citanju rezervacija za streaming, memorija ostaje ista bez obzira na broj rezervacija
+STREAM_CHUNK_SIZE = 500
+
+
+# Serijalizira rezervacije jednu po jednu, kao JSON listu ili NDJSON (jedan JSON objekt po retku)
+def _stream_rezervacija(rezervacije, oblik):
+    renderer = JSONRenderer()
+    if oblik == 'ndjson':
+        for rezervacija in rezervacije.iterator(chunk_size=STREAM_CHUNK_SIZE):
+            yield renderer.render(RezervacijaSerializer(rezervacija).data) + b'\n'
+        return
+
+    yield b'['
+    prvi = True
+    for rezervacija in rezervacije.iterator(chunk_size=STREAM_CHUNK_SIZE):
+        if not prvi:
+            yield b','
+        yield renderer.render(RezervacijaSerializer(rezervacija).data)
+        prvi = False
+    yield b']'
+
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -107,13 +269,80 @@ def admin_dashboard(request):
     rezervacije = Rezervacija.objects.select_related('korisnik', 'termin', 'termin__salon').filter(
         termin__salon__vlasnik=request.user
     )
+
+    # Filtriranje po statusu i rasponu datuma termina (?status=potvrdena&datum_od=2026-01-01&datum_do=2026-01-31)
+    status_rezervacije = request.query_params.get('status')
+    if status_rezervacije:
+        rezervacije = rezervacije.filter(status=status_rezervacije)
+    try:
+        datum_od = request.query_params.get('datum_od')
+        if datum_od:
+            rezervacije = rezervacije.filter(termin__datum__gte=datetime.strptime(datum_od, '%Y-%m-%d').date())
+        datum_do = request.query_params.get('datum_do')
+        if datum_do:
+            rezervacije = rezervacije.filter(termin__datum__lte=datetime.strptime(datum_do, '%Y-%m-%d').date())
+    except ValueError:
+        return Response({'error': 'Datum nije ispravan.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    oblik = request.query_params.get('stream')
+    if oblik in ('json', 'ndjson'):
+        rezervacije = rezervacije.order_by(*KursorPaginacija.ordering)
+        content_type = 'application/x-ndjson' if oblik == 'ndjson' else 'application/json'
+        return StreamingHttpResponse(_stream_rezervacija(rezervacije, oblik), content_type=content_type)
+
+    paginacija = KursorPaginacija()
+    stranica = paginacija.paginate_queryset(rezervacije, request)
+    if stranica is not None:
+        return paginacija.get_paginated_response(RezervacijaSerializer(stranica, many=True).data)
+
     serializer = RezervacijaSerializer(rezervacije, many=True)
     return Response(serializer.data)
 
 
-class FrizerViewSet(viewsets.ModelViewSet):
+# Najveci raspon za statistiku (jedna godina)
+MAKS_RASPON_STATISTIKE = 366
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def admin_statistika(request):
+    if not request.user.is_staff:
+        return Response({'error': 'Samo admin može pristupiti.'}, status=status.HTTP_403_FORBIDDEN)
+
+    # Bez zadanog raspona prikazuje se zadnjih 30 dana
+    danas = timezone.localdate()
+    try:
+        datum_od = request.query_params.get('datum_od')
+        datum_od = datetime.strptime(datum_od, '%Y-%m-%d').date() if datum_od else danas - timedelta(days=29)
+        datum_do = request.query_params.get('datum_do')
+        datum_do = datetime.strptime(datum_do, '%Y-%m-%d').date() if datum_do else danas
+    except ValueError:
+        return Response({'error': 'Datum nije ispravan.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if datum_od > datum_do:
+        return Response({'error': 'Početni datum mora biti prije završnog.'}, status=status.HTTP_400_BAD_REQUEST)
+    if (datum_do - datum_od).days >= MAKS_RASPON_STATISTIKE:
+        return Response(
+            {'error': f'Raspon datuma ne smije biti dulji od {MAKS_RASPON_STATISTIKE} dana.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    # ?dnevna=true cita unaprijed izracunate redove iz DnevnaStatistika (osvjezi_statistiku)
+    iz_dnevne_statistike = request.query_params.get('dnevna') == 'true'
+    return Response(
+        {
+            'datum_od': datum_od,
+            'datum_do': datum_do,
+            'izvor': 'dnevna_statistika' if iz_dnevne_statistike else 'rezervacije',
+            'saloni': izracunaj_statistiku(request.user, datum_od, datum_do, iz_dnevne_statistike),
+        }
+    )
+
+
+class FrizerViewSet(UvjetniZahtjevMixin, OdabranaPoljaMixin, viewsets.ModelViewSet):
     queryset = Frizer.objects.all().order_by('ime_prezime')
     serializer_class = FrizerSerializer
+    kursor_poredak = ('ime_prezime', 'id')
     permission_classes = [IsAdminOrReadOnly]
 
     def get_queryset(self):
@@ -127,8 +356,61 @@ class FrizerViewSet(viewsets.ModelViewSet):
         salon_id = self.request.query_params.get('salon')
         if salon_id:
             queryset = queryset.filter(salon_id=salon_id)
+
+        # Frizeri vise salona u jednom zahtjevu (?salon__in=1,2,3)
+        saloni_ids = self.odabrani_saloni()
+        if saloni_ids is not None:
+            queryset = queryset.filter(salon_id__in=saloni_ids)
         return queryset
 
+    def odabrani_saloni(self):
+        saloni = self.request.query_params.get('salon__in')
+        if not saloni:
+            return None
+        try:
+            return [int(salon) for salon in saloni.split(',') if salon.strip()]
+        except ValueError:
+            raise ValidationError('Popis salona nije ispravan.')
+
+    # Frizeri odabranih salona ovise samo o verzijama tih salona, a ostali popisi o svim salonima
+    def verzije_etaga(self):
+        saloni_ids = [self.request.query_params.get('salon')] if self.request.query_params.get('salon') else []
+        saloni_ids += self.odabrani_saloni() or []
+        if self.action == 'list' and saloni_ids:
+            return verzije_salona(saloni_ids)
+        return (verzija_kataloga(),)
+
+    # Frizeri salona koji rade i slobodni su u zadanom vremenu (GET /api/frizeri/slobodni/?salon=1&datum=2026-03-03
+    # &vrijeme=10:15&trajanje=45), bez obzira na trajanje vec rezerviranih termina. Trajanje je zadano trajanje termina salona.
+    @action(detail=False, methods=['get'])
+    def slobodni(self, request):
+        try:
+            salon_id = int(request.query_params.get('salon', ''))
+            datum = datetime.strptime(request.query_params.get('datum', ''), '%Y-%m-%d').date()
+            vrijeme_od = datetime.strptime(request.query_params.get('vrijeme', ''), '%H:%M')
+            trajanje = request.query_params.get('trajanje')
+            trajanje = int(trajanje) if trajanje else None
+        except ValueError:
+            return Response({'error': 'Neispravni parametri pretrage.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        salon_queryset = Salon.objects.filter(id=salon_id)
+        if request.user.is_authenticated and request.user.is_staff:
+            salon_queryset = salon_queryset.filter(vlasnik=request.user)
+        else:
+            salon_queryset = salon_queryset.filter(aktivan=True)
+        salon = salon_queryset.only('id', 'radno_od', 'radno_do', 'trajanje_termina_min').first()
+        if not salon:
+            return Response({'error': 'Salon ne postoji.'}, status=status.HTTP_404_NOT_FOUND)
+
+        trajanje = trajanje or salon.trajanje_termina_min
+        vrijeme_do = vrijeme_od + timedelta(minutes=trajanje)
+        if trajanje <= 0 or vrijeme_do.date() != vrijeme_od.date():
+            return Response({'error': 'Neispravni parametri pretrage.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        slobodni = slobodni_frizeri(salon, datum, vrijeme_od.time(), vrijeme_do.time())
+        frizeri = Frizer.objects.filter(id__in=slobodni).order_by('ime_prezime')
+        return Response(FrizerSerializer(frizeri, many=True, context=self.get_serializer_context()).data)
+
     def perform_create(self, serializer):
         # Provjera integriteta: Admin smije dodati frizera samo u svoj salon
         salon = serializer.validated_data['salon']
@@ -137,91 +419,196 @@ class FrizerViewSet(viewsets.ModelViewSet):
         serializer.save()
 
 
-class TerminViewSet(viewsets.ModelViewSet):
+# Tjedni raspored i iznimke salona i frizera (GET /api/radno-vrijeme/?salon=1, uz ?frizer= i ?datum_od=&datum_do=
+# za iznimke u rasponu; tjedni redovi vracaju se uvijek). Raspored vide svi, a mijenja ga samo vlasnik salona.
+# Dostupnost termina racuna se iz rasporeda, pa termine nije potrebno unaprijed otvarati.
+class RadnoVrijemeViewSet(viewsets.ModelViewSet):
+    queryset = RadnoVrijeme.objects.select_related('frizer').order_by('datum', 'dan_u_tjednu', 'vrijeme_od', 'id')
+    serializer_class = RadnoVrijemeSerializer
+    kursor_poredak = ('id',)
+    permission_classes = [IsAdminOrReadOnly]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.user.is_authenticated and self.request.user.is_staff:
+            queryset = queryset.filter(salon__vlasnik=self.request.user)
+        else:
+            queryset = queryset.filter(salon__aktivan=True)
+
+        salon_id = self.request.query_params.get('salon')
+        frizer_id = self.request.query_params.get('frizer')
+        datum_od = procitaj_datum(self.request.query_params, 'datum_od')
+        datum_do = procitaj_datum(self.request.query_params, 'datum_do')
+        if salon_id:
+            queryset = queryset.filter(salon_id=salon_id)
+        if frizer_id:
+            queryset = queryset.filter(frizer_id=frizer_id)
+        if datum_od:
+            queryset = queryset.filter(Q(datum__isnull=True) | Q(datum__gte=datum_od))
+        if datum_do:
+            queryset = queryset.filter(Q(datum__isnull=True) | Q(datum__lte=datum_do))
+        return queryset
+
+    # Provjera integriteta: Admin smije mijenjati samo raspored svog salona
+    def perform_create(self, serializer):
+        if serializer.validated_data['salon'].vlasnik_id != self.request.user.id:
+            raise ValidationError('Ne možeš mijenjati raspored tuđeg salona.')
+        serializer.save()
+
+    def perform_update(self, serializer):
+        if serializer.validated_data.get('salon', serializer.instance.salon).vlasnik_id != self.request.user.id:
+            raise ValidationError('Ne možeš mijenjati raspored tuđeg salona.')
+        serializer.save()
+
+
+# Najveci broj dana koji se moze dohvatiti u jednom zahtjevu (mjesecni prikaz)
+MAKS_RASPON_DANA = 31
+
+
+# Datum iz parametra upita ili None ako parametar nije zadan; neispravan datum vraca 400
+def procitaj_datum(parametri, naziv):
+    vrijednost = parametri.get(naziv)
+    if not vrijednost:
+        return None
+    try:
+        return datetime.strptime(vrijednost, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValidationError('Datum nije ispravan.')
+
+
+# Jedan dan (?datum=) ili raspon (?datum_od=&datum_do=), uz provjeru poretka i duljine raspona
+def procitaj_raspon_datuma(parametri):
+    try:
+        if parametri.get('datum'):
+            datum_od = datum_do = datetime.strptime(parametri['datum'], '%Y-%m-%d').date()
+        else:
+            datum_od = datetime.strptime(parametri.get('datum_od', ''), '%Y-%m-%d').date()
+            datum_do = datetime.strptime(parametri.get('datum_do', ''), '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError('Datum nije ispravan.')
+
+    if datum_od > datum_do:
+        raise ValueError('Početni datum mora biti prije završnog.')
+    if (datum_do - datum_od).days >= MAKS_RASPON_DANA:
+        raise ValueError(f'Raspon datuma ne smije biti dulji od {MAKS_RASPON_DANA} dana.')
+    return datum_od, datum_do
+
+
+# Pretraga prvih slobodnih termina: zadani raspon, najveci broj termina i najveci broj salona koji se pretrazuju
+PRVI_SLOBODNI_DANA = 14
+PRVI_SLOBODNI_BROJ = 10
+MAKS_PRVI_SLOBODNI_BROJ = 50
+MAKS_PRVI_SLOBODNI_SALONA = 100
+
+
+class TerminViewSet(OdabranaPoljaMixin, viewsets.ModelViewSet):
     queryset = Termin.objects.select_related('salon', 'frizer').all()
     serializer_class = TerminSerializer
+    kursor_poredak = ('datum', 'vrijeme_od', 'id')
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, *MSGPACK_RENDERERI]
     permission_classes = [IsAdminOrReadOnly]
 
     def list(self, request, *args, **kwargs):
         salon_id = request.query_params.get('salon')
         datum = request.query_params.get('datum')
+        datum_od = request.query_params.get('datum_od')
+        datum_do = request.query_params.get('datum_do')
         samo_slobodni = request.query_params.get('samo_slobodni')
 
-        if samo_slobodni == 'true' and salon_id and datum:
-            salon_queryset = Salon.objects.filter(id=salon_id)
-            if request.user.is_authenticated and request.user.is_staff:
-                salon_queryset = salon_queryset.filter(vlasnik=request.user)
-            else:
-                salon_queryset = salon_queryset.filter(aktivan=True)
-            salon = salon_queryset.first()
-            if not salon:
-                return Response([], status=status.HTTP_200_OK)
-
+        if samo_slobodni == 'true' and salon_id and (datum or (datum_od and datum_do)):
             try:
-                datum_obj = datetime.strptime(datum, '%Y-%m-%d').date()
-            except ValueError:
-                return Response({'error': 'Datum nije ispravan.'}, status=status.HTTP_400_BAD_REQUEST)
-
-            broj_aktivnih_frizera = Frizer.objects.filter(salon=salon, aktivan=True).count()
-            if broj_aktivnih_frizera == 0:
-                return Response([], status=status.HTTP_200_OK)
-
-            zauzeca = (
-                Termin.objects.filter(
-                    salon_id=salon.id,
-                    datum=datum_obj,
-                    slobodan=False,
-                )
-                .values('vrijeme_od', 'vrijeme_do')
-                .annotate(ukupno=Count('id'))
+                datum_od_obj, datum_do_obj = procitaj_raspon_datuma(request.query_params)
+            except ValueError as greska:
+                return Response({'error': str(greska)}, status=status.HTTP_400_BAD_REQUEST)
+
+            # Ako se mreza salona nije promijenila od klijentovog zadnjeg dohvata, vraca se 304 bez upita u bazu
+            return uvjetni_odgovor(
+                request,
+                verzija_mreze(salon_id),
+                lambda: self.mreza_slobodnih_termina(request, salon_id, datum_od_obj, datum_do_obj),
             )
-            zauzeca_po_slotu = {
-                (zauzece['vrijeme_od'], zauzece['vrijeme_do']): zauzece['ukupno'] for zauzece in zauzeca
-            }
-
-            rezultat = []
-            trajanje = timedelta(minutes=salon.trajanje_termina_min)
-            trenutno = datetime.combine(datum_obj, salon.radno_od)
-            kraj = datetime.combine(datum_obj, salon.radno_do)
-
-            while trenutno + trajanje <= kraj:
-                vrijeme_od = trenutno.time().strftime('%H:%M')
-                vrijeme_do_obj = (trenutno + trajanje).time()
-                vrijeme_do = vrijeme_do_obj.strftime('%H:%M')
-                zauzeto = zauzeca_po_slotu.get((trenutno.time(), vrijeme_do_obj), 0)
-                slobodnih_mjesta = max(broj_aktivnih_frizera - zauzeto, 0)
-                rezultat.append(
-                    {
-                        'id': f'{datum}-{vrijeme_od}-{vrijeme_do}',
-                        'salon': salon.id,
-                        'salon_naziv': salon.naziv,
-                        'datum': datum,
-                        'vrijeme_od': vrijeme_od,
-                        'vrijeme_do': vrijeme_do,
-                        'slobodan': slobodnih_mjesta > 0,
-                        'slobodnih_mjesta': slobodnih_mjesta,
-                        'ukupno_mjesta': broj_aktivnih_frizera,
-                    }
-                )
-                trenutno += trajanje
-
-            return Response(rezultat, status=status.HTTP_200_OK)
 
         return super().list(request, *args, **kwargs)
 
+    # Najraniji slobodni termini u vise salona (GET /api/termini/prvi-slobodni/?saloni=1,2,3 ili ?q=centar),
+    # od sadasnjeg trenutka kroz sljedecih `dana` dana (zadano 14), najvise `broj` termina (zadano 10)
+    @action(detail=False, methods=['get'], url_path='prvi-slobodni')
+    def prvi_slobodni(self, request):
+        try:
+            dana = int(request.query_params.get('dana', PRVI_SLOBODNI_DANA))
+            broj = int(request.query_params.get('broj', PRVI_SLOBODNI_BROJ))
+            saloni_ids = [int(salon) for salon in request.query_params.get('saloni', '').split(',') if salon.strip()]
+        except ValueError:
+            return Response({'error': 'Neispravni parametri pretrage.'}, status=status.HTTP_400_BAD_REQUEST)
+        q = request.query_params.get('q')
+        if not saloni_ids and not q:
+            return Response({'error': 'Odaberite salone ili upišite pojam za pretragu.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= dana <= MAKS_RASPON_DANA or not 1 <= broj <= MAKS_PRVI_SLOBODNI_BROJ:
+            return Response({'error': 'Neispravni parametri pretrage.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        saloni = Salon.objects.only('id', 'naziv', 'radno_od', 'radno_do', 'trajanje_termina_min')
+        if request.user.is_authenticated and request.user.is_staff:
+            saloni = saloni.filter(vlasnik=request.user)
+        else:
+            saloni = saloni.filter(aktivan=True)
+        if saloni_ids:
+            saloni = saloni.filter(id__in=saloni_ids)
+        # Ogranicenje broja salona uzima najbolje pogotke pretrage, a bez pretrage salone najmanjeg ID-a,
+        # kako bi isti zahtjev uvijek pretrazivao iste salone
+        if q:
+            saloni = pretrazi_salone(saloni, q)
+        else:
+            saloni = saloni.order_by('id')
+
+        sada = timezone.localtime()
+        rezultat = prvi_slobodni_termini(
+            saloni[:MAKS_PRVI_SLOBODNI_SALONA],
+            sada.date(),
+            sada.hour * 60 + sada.minute,
+            sada.date() + timedelta(days=dana - 1),
+            broj,
+        )
+        return Response(rezultat, status=status.HTTP_200_OK)
+
+    def mreza_slobodnih_termina(self, request, salon_id, datum_od, datum_do):
+        salon_queryset = Salon.objects.filter(id=salon_id)
+        if request.user.is_authenticated and request.user.is_staff:
+            salon_queryset = salon_queryset.filter(vlasnik=request.user)
+        else:
+            salon_queryset = salon_queryset.filter(aktivan=True)
+        salon = salon_queryset.first()
+        if not salon:
+            return Response([], status=status.HTTP_200_OK)
+
+        # Sazeti oblik u stupcima za mjesecne prikaze (?oblik=stupci)
+        if request.query_params.get('oblik') == 'stupci':
+            return Response(stupci_slobodnih_termina(salon, datum_od, datum_do), status=status.HTTP_200_OK)
+
+        rezultat = dohvati_slobodne_termine(salon, datum_od, datum_do)
+        polja = odabrana_polja(request)
+        if polja:
+            rezultat = [suzi_zapis(termin, polja) for termin in rezultat]
+        return Response(rezultat, status=status.HTTP_200_OK)
+
     def get_queryset(self):
         queryset = super().get_queryset()
         if self.request.user.is_authenticated and self.request.user.is_staff:
             queryset = queryset.filter(salon__vlasnik=self.request.user)
 
         salon_id = self.request.query_params.get('salon')
-        datum = self.request.query_params.get('datum')
+        datum = procitaj_datum(self.request.query_params, 'datum')
+        datum_od = procitaj_datum(self.request.query_params, 'datum_od')
+        datum_do = procitaj_datum(self.request.query_params, 'datum_do')
         samo_slobodni = self.request.query_params.get('samo_slobodni')
 
         if salon_id:
             queryset = queryset.filter(salon_id=salon_id)
         if datum:
             queryset = queryset.filter(datum=datum)
+        if datum_od:
+            queryset = queryset.filter(datum__gte=datum_od)
+        if datum_do:
+            queryset = queryset.filter(datum__lte=datum_do)
         if samo_slobodni == 'true':
             queryset = queryset.filter(slobodan=True)
 
@@ -238,10 +625,68 @@ class TerminViewSet(viewsets.ModelViewSet):
 
         serializer.save()
 
-
-class RezervacijaViewSet(viewsets.ModelViewSet):
+    def perform_update(self, serializer):
+        # Ako se termin premjesti na drugi dan, i stari dan treba ponovno izracunati,
+        # a pretplatnici starog dana i vremena dobivaju novo stanje oslobodenog mjesta
+        stari_salon_id = serializer.instance.salon_id
+        stari_datum = serializer.instance.datum
+        staro_vrijeme_od = serializer.instance.vrijeme_od
+        termin = serializer.save()
+        if (termin.salon_id, termin.datum) != (stari_salon_id, stari_datum):
+            ponisti_dan(stari_salon_id, stari_datum)
+        if (termin.salon_id, termin.datum, termin.vrijeme_od) != (stari_salon_id, stari_datum, staro_vrijeme_od):
+            javi_promjenu(stari_salon_id, stari_datum, staro_vrijeme_od)
+
+
+# Interval komentara koji odrzava SSE vezu otvorenom kroz proxyje i otkriva zatvorene veze
+SSE_PING_SEKUNDI = 15
+
+
+async def _tok_dogadaja(pretplata):
+    try:
+        yield 'retry: 3000\n\n'
+        while True:
+            poruka = await pretplata.primi(SSE_PING_SEKUNDI)
+            if poruka is None:
+                yield ': ping\n\n'
+            else:
+                yield f'event: termin\ndata: {json.dumps(poruka)}\n\n'
+    finally:
+        await pretplata.zatvori()
+
+
+# Promjene slobodnih mjesta salona u stvarnom vremenu (Server-Sent Events):
+# GET /api/termini/dogadaji/?salon=1&datum=2026-03-03 (ili datum_od i datum_do).
+# Svaki dogadaj 'termin' nosi novo stanje jednog termina u obliku zapisa mreze slobodnih termina,
+# pa ga klijent samo zamijeni u vec dohvacenoj mrezi (po id-u). Zahtijeva ASGI posluzitelj (core.asgi),
+# jer pod WSGI-jem svaka otvorena veza zauzima radnu nit.
+@require_GET
+async def dogadaji_termina(request):
+    try:
+        salon_id = int(request.GET.get('salon', ''))
+    except ValueError:
+        return JsonResponse({'error': 'Salon nije ispravan.'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        datum_od, datum_do = procitaj_raspon_datuma(request.GET)
+    except ValueError as greska:
+        return JsonResponse({'error': str(greska)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if not await Salon.objects.filter(id=salon_id, aktivan=True).aexists():
+        return JsonResponse({'error': 'Salon ne postoji.'}, status=status.HTTP_404_NOT_FOUND)
+
+    kanali = [kanal_dana(salon_id, datum_od + timedelta(days=pomak)) for pomak in range((datum_do - datum_od).days + 1)]
+    pretplata = await broker().pretplati(kanali)
+    response = StreamingHttpResponse(_tok_dogadaja(pretplata), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # nginx inace sprema odgovor u meduspremnik pa dogadaji kasne
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+class RezervacijaViewSet(OdabranaPoljaMixin, viewsets.ModelViewSet):
     serializer_class = RezervacijaSerializer
     permission_classes = [IsAuthenticated]
+    kursor_poredak = KursorPaginacija.ordering
 
     def get_queryset(self):
         queryset = Rezervacija.objects.select_related('korisnik', 'termin', 'termin__salon').all()
@@ -271,70 +716,25 @@ class RezervacijaViewSet(viewsets.ModelViewSet):
             trajanje = int((datetime.combine(datum, vrijeme_do) - datetime.combine(datum, vrijeme_od)).seconds / 60)
             if trajanje != salon.trajanje_termina_min:
                 return Response({'error': 'Termin mora odgovarati trajanju salona.'}, status=status.HTTP_400_BAD_REQUEST)
-
-            aktivni_frizeri = list(Frizer.objects.filter(salon=salon, aktivan=True).order_by('id'))
-            if not aktivni_frizeri:
-                return Response({'error': 'Salon nema aktivnih zaposlenika.'}, status=status.HTTP_400_BAD_REQUEST)
-
-            zauzeti_frizeri = set(
-                Termin.objects.filter(
+            # Termin mora pocinjati na jednom od pocetaka u mrezi salona, kako se ne bi preklapao sa susjednima
+            if minute(vrijeme_od) not in pocetci_termina(salon):
+                return Response({'error': 'Termin mora počinjati na početku termina salona.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Termin se zauzima uvjetnim UPDATE-om bez zakljucavanja (vidi alokacija.py)
+        try:
+            if termin:
+                rezervacija = rezerviraj(request.user, serializer.validated_data.get('napomena', ''), termin=termin)
+            else:
+                rezervacija = rezerviraj(
+                    request.user,
+                    serializer.validated_data.get('napomena', ''),
                     salon=salon,
                     datum=datum,
                     vrijeme_od=vrijeme_od,
                     vrijeme_do=vrijeme_do,
-                    slobodan=False,
-                ).values_list('frizer_id', flat=True)
-            )
-            slobodni_frizer = next((frizer for frizer in aktivni_frizeri if frizer.id not in zauzeti_frizeri), None)
-            if not slobodni_frizer:
-                return Response({'error': 'Termin više nije slobodan.'}, status=status.HTTP_400_BAD_REQUEST)
-
-            termin, _ = Termin.objects.get_or_create(
-                salon=salon,
-                frizer=slobodni_frizer,
-                datum=datum,
-                vrijeme_od=vrijeme_od,
-                vrijeme_do=vrijeme_do,
-                defaults={'slobodan': True},
-            )
-
-        with transaction.atomic():
-            termin = Termin.objects.select_for_update().get(pk=termin.pk)
-
-            postojeca_rezervacija_korisnika = Rezervacija.objects.filter(
-                korisnik=request.user,
-                termin__salon=termin.salon,
-                termin__datum=termin.datum,
-                termin__vrijeme_od=termin.vrijeme_od,
-                status='potvrdena'
-            ).exists()
-
-            if postojeca_rezervacija_korisnika:
-                return Response({'error': 'Već imate rezervaciju u ovom salonu za odabrano vrijeme.'}, status=status.HTTP_400_BAD_REQUEST)
-
-            if not termin.slobodan:
-                return Response({'error': 'Termin više nije slobodan.'}, status=status.HTTP_400_BAD_REQUEST)
-
-            postojeca_rezervacija = Rezervacija.objects.select_for_update().filter(termin=termin).first()
-            if postojeca_rezervacija:
-                if postojeca_rezervacija.status != 'otkazana':
-                    return Response({'error': 'Termin više nije slobodan.'}, status=status.HTTP_400_BAD_REQUEST)
-
-                postojeca_rezervacija.korisnik = request.user
-                postojeca_rezervacija.status = 'potvrdena'
-                postojeca_rezervacija.napomena = serializer.validated_data.get('napomena', '')
-                postojeca_rezervacija.save(update_fields=['korisnik', 'status', 'napomena'])
-                rezervacija = postojeca_rezervacija
-            else:
-                rezervacija = Rezervacija.objects.create(
-                    korisnik=request.user,
-                    termin=termin,
-                    status='potvrdena',
-                    napomena=serializer.validated_data.get('napomena', ''),
                 )
-
-            termin.slobodan = False
-            termin.save(update_fields=['slobodan'])
+        except GreskaRezervacije as greska:
+            return Response({'error': str(greska)}, status=status.HTTP_400_BAD_REQUEST)
 
         out_serializer = self.get_serializer(rezervacija)
         return Response(out_serializer.data, status=status.HTTP_201_CREATED)